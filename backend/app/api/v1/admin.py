@@ -0,0 +1,50 @@
+"""
+Admin API Routes
+Operational endpoints (model hot reload), protected by ADMIN_API_KEY
+"""
+
+import asyncio
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from typing import Optional
+
+from app.config import settings
+from app.services.ml_service import get_ml_service
+
+router = APIRouter()
+
+
+async def verify_admin_key(x_admin_key: Optional[str] = Header(None)):
+    """Dependency that requires the X-Admin-Key header to match ADMIN_API_KEY"""
+    if not settings.ADMIN_API_KEY:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Admin API is disabled")
+    if not x_admin_key or not secrets.compare_digest(x_admin_key, settings.ADMIN_API_KEY):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid admin key")
+
+
+@router.get("/models", dependencies=[Depends(verify_admin_key)])
+async def get_model_info():
+    """Model version currently being served"""
+    ml_service = get_ml_service()
+    return {
+        "mode": "demo" if ml_service.use_mock else "production",
+        "bundle": ml_service.bundle.info(),
+        "result_cache": ml_service.result_cache.stats()
+    }
+
+
+@router.post("/models/reload", dependencies=[Depends(verify_admin_key)])
+async def reload_models():
+    """
+    Load the model files currently in MODEL_DIR, warm them and swap them in
+
+    In-flight predictions finish on the previous models. On failure the
+    previous models keep serving and 409 is returned.
+    """
+    ml_service = get_ml_service()
+    loop = asyncio.get_running_loop()
+    try:
+        bundle = await loop.run_in_executor(None, ml_service.reload_models)
+    except Exception as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Model reload failed: {str(e)}")
+    return {"status": "reloaded", "bundle": bundle}
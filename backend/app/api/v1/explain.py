@@ -9,6 +9,7 @@ from sqlalchemy.orm import Session
 from app.database import get_db
 from app.services.explainability_service import get_explainability_service
 from app.services.ml_service import get_ml_service
+from app.services.inference_backends import InferenceUnavailable
 
 router = APIRouter()
 
@@ -34,7 +35,7 @@ async def generate_gradcam_visualization(
         
         # Get prediction first
         ml_service = get_ml_service()
-        prediction_result = ml_service.predict(image_bytes)
+        prediction_result = await ml_service.predict_async(image_bytes)
         
         # Generate Grad-CAM
         explainability_service = get_explainability_service()
@@ -53,6 +54,8 @@ async def generate_gradcam_visualization(
         
     except HTTPException:
         raise
+    except InferenceUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Grad-CAM generation failed: {str(e)}")
 
@@ -78,7 +81,7 @@ async def generate_lime_explanation(
         
         # Get prediction first
         ml_service = get_ml_service()
-        prediction_result = ml_service.predict(image_bytes)
+        prediction_result = await ml_service.predict_async(image_bytes)
         
         # Generate LIME explanation
         explainability_service = get_explainability_service()
@@ -97,6 +100,8 @@ async def generate_lime_explanation(
         
     except HTTPException:
         raise
+    except InferenceUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"LIME explanation failed: {str(e)}")
 
@@ -122,7 +127,7 @@ async def generate_combined_explanation(
         
         # Get prediction
         ml_service = get_ml_service()
-        prediction_result = ml_service.predict(image_bytes)
+        prediction_result = await ml_service.predict_async(image_bytes)
         
         # Generate both explanations
         explainability_service = get_explainability_service()
@@ -147,6 +152,8 @@ async def generate_combined_explanation(
         
     except HTTPException:
         raise
+    except InferenceUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Combined explanation failed: {str(e)}")
 
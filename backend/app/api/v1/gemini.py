@@ -9,6 +9,7 @@ from typing import Optional
 
 from app.database import get_db
 from app.services.gemini_service import get_gemini_service
+from app.services.inference_backends import InferenceUnavailable
 from app.models.plant import Plant
 
 router = APIRouter()
@@ -37,7 +38,7 @@ async def describe_plant_image(
         image_bytes = await file.read()
         
         # Use ML model to identify the plant first
-        prediction = ml_service.predict(image_bytes)
+        prediction = await ml_service.predict_async(image_bytes)
         plant_name = prediction["predicted_class"]
         
         # Now get botanical description for THIS specific plant
@@ -48,6 +49,9 @@ async def describe_plant_image(
         
         return description
         
+    except InferenceUnavailable as e:
+        from fastapi import HTTPException
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         from fastapi import HTTPException
         raise HTTPException(status_code=500, detail=f"Failed to generate description: {str(e)}")
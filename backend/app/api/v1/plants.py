@@ -9,6 +9,7 @@ from typing import Optional, List
 
 from app.database import get_db
 from app.models.plant import Plant, MedicinalProperty
+from app.services.plant_search import search_plants as run_plant_search
 
 router = APIRouter()
 
@@ -25,21 +26,19 @@ async def list_plants(
     
     - **skip**: Number of records to skip
     - **limit**: Maximum number of records to return
-    - **search**: Optional search query
+    - **search**: Optional search query (names in every language and description, ranked, typo tolerant)
+
+    With **search**, results are the best SEARCH_MAX_CANDIDATES matches in one
+    fixed order, paged by skip/limit; `total` is capped at that number.
     """
     try:
-        query = db.query(Plant)
-        
         if search:
-            search_filter = f"%{search}%"
-            query = query.filter(
-                (Plant.species_name.ilike(search_filter)) |
-                (Plant.common_name_en.ilike(search_filter)) |
-                (Plant.description.ilike(search_filter))
-            )
-        
-        total = query.count()
-        plants = query.offset(skip).limit(limit).all()
+            matches, total = run_plant_search(db, search, limit=limit, offset=skip, include_description=True)
+            plants = [plant for plant, _ in matches]
+        else:
+            query = db.query(Plant)
+            total = query.count()
+            plants = query.offset(skip).limit(limit).all()
         
         results = []
         for plant in plants:
@@ -162,25 +161,24 @@ async def search_plants(
     db: Session = Depends(get_db)
 ):
     """
-    Search plants by name (scientific or common)
+    Search plants by name (scientific or common, in any language)
+    
+    Prefix matches rank first, so it serves autocomplete; misspellings
+    still find the closest names.
     
     - **q**: Search query
     """
     try:
-        search_filter = f"%{q}%"
-        plants = db.query(Plant).filter(
-            (Plant.species_name.ilike(search_filter)) |
-            (Plant.common_name_en.ilike(search_filter)) |
-            (Plant.common_name_hi.ilike(search_filter))
-        ).limit(20).all()
+        matches, _ = run_plant_search(db, q, limit=20)
         
         results = []
-        for plant in plants:
+        for plant, score in matches:
             results.append({
                 "id": plant.id,
                 "species_name": plant.species_name,
                 "common_name": plant.common_name_en,
-                "image_url": plant.image_url
+                "image_url": plant.image_url,
+                "score": round(score, 3)
             })
         
         return {
@@ -3,16 +3,20 @@ Prediction API Routes
 Plant identification from leaf images
 """
 
-from fastapi import APIRouter, File, UploadFile, Depends, HTTPException
+from fastapi import APIRouter, File, UploadFile, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+import asyncio
 import time
-import os
-from datetime import datetime
 
 from app.database import get_db
 from app.services.ml_service import get_ml_service
+from app.services.inference_backends import InferenceUnavailable
 from app.services.gemini_service import get_gemini_service
+from app.services.upload_reader import UploadRejected, read_image_upload
+from app.services.upload_store import get_upload_store
+from app.services.prediction_writer import get_prediction_writer
+from app.services.prediction_history import MAX_PAGE_SIZE, get_prediction_count_cache, history_page
 from app.models.prediction import Prediction
 from app.models.plant import Plant
 from app.config import settings
@@ -32,33 +36,32 @@ async def predict_plant(
     - Returns: Predicted plant species, confidence score, and details
     """
     try:
-        # Validate file type
-        if not file.content_type.startswith('image/'):
-            raise HTTPException(status_code=400, detail="File must be an image")
+        # Chunked read: size limit and magic-byte check apply before the whole file is buffered
+        try:
+            upload = await read_image_upload(file)
+        except UploadRejected as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+        image_bytes = upload.data
         
-        # Read image bytes
-        image_bytes = await file.read()
-        
-        # Validate file size
-        if len(image_bytes) > settings.MAX_UPLOAD_SIZE:
-            raise HTTPException(
-                status_code=400, 
-                detail=f"File size exceeds maximum of {settings.MAX_UPLOAD_SIZE} bytes"
-            )
-        
-        # Save uploaded file
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        filename = f"{timestamp}_{file.filename}"
-        filepath = os.path.join(settings.UPLOAD_DIR, filename)
-        
-        with open(filepath, 'wb') as f:
-            f.write(image_bytes)
+        # Persist the upload (content-addressed, off the event loop) while the prediction runs
+        save_task = asyncio.create_task(get_upload_store().save(image_bytes, upload.digest))
         
         # Get ML service and make prediction
         ml_service = get_ml_service()
         start_time = time.time()
-        prediction_result = ml_service.predict(image_bytes)
+        try:
+            prediction_result = await ml_service.predict_async(image_bytes, upload.digest)
+        except ValueError as e:
+            save_task.cancel()
+            raise HTTPException(status_code=400, detail=str(e))
+        except InferenceUnavailable as e:
+            save_task.cancel()
+            raise HTTPException(status_code=503, detail=str(e))
+        except Exception:
+            save_task.cancel()
+            raise
         processing_time = (time.time() - start_time) * 1000  # Convert to ms
+        filepath = await save_task
         
         # Find plant in database - Superior Rejection Logic
         CONFIDENCE_THRESHOLD = 0.65
@@ -88,8 +91,8 @@ async def predict_plant(
                 Plant.species_name == predicted_class
             ).first()
         
-        # Store prediction in database
-        prediction_record = Prediction(
+        # Store prediction in database (queued; inserted in batches by the write-behind task)
+        prediction_id = await get_prediction_writer().submit(
             image_url=filepath,
             predicted_plant_id=plant.id if plant else None,
             confidence_score=prediction_result["confidence"],
@@ -97,18 +100,16 @@ async def predict_plant(
             ensemble_used=prediction_result["ensemble_used"],
             processing_time_ms=processing_time
         )
-        db.add(prediction_record)
-        db.commit()
-        db.refresh(prediction_record)
         
         # Prepare response
         response = {
-            "prediction_id": prediction_record.id,
+            "prediction_id": prediction_id,
             "predicted_plant": predicted_class,
             "confidence": prediction_result["confidence"],
             "top_predictions": prediction_result["top_predictions"],
             "processing_time_ms": processing_time,
             "model_version": prediction_result["model_version"],
+            "stages_run": prediction_result.get("stages_run", []),
             "plant_details": None,
             "expert_verification": None
         }
@@ -163,42 +164,51 @@ async def predict_batch(
     - Returns: List of predictions
     """
     try:
-        if len(files) > 10:
+        if len(files) > settings.MAX_BATCH_IMAGES:
             raise HTTPException(
                 status_code=400, 
-                detail="Maximum 10 images allowed per batch"
+                detail=f"Maximum {settings.MAX_BATCH_IMAGES} images allowed per batch"
             )
         
-        results = []
-        ml_service = get_ml_service()
+        results = [None] * len(files)
+        pending_indices = []
+        pending_uploads = []
         
-        for file in files:
+        for i, file in enumerate(files):
             try:
-                # Validate file type
-                if not file.content_type.startswith('image/'):
-                    results.append({
-                        "filename": file.filename,
-                        "error": "File must be an image"
-                    })
-                    continue
-                
-                # Read and predict
-                image_bytes = await file.read()
-                prediction_result = ml_service.predict(image_bytes)
-                
-                results.append({
+                upload = await read_image_upload(file)
+            except UploadRejected as e:
+                results[i] = {
                     "filename": file.filename,
+                    "error": str(e),
+                    "success": False
+                }
+                continue
+            
+            pending_indices.append(i)
+            pending_uploads.append(upload)
+        
+        # One vectorized pass over every readable image
+        ml_service = get_ml_service()
+        predictions = await ml_service.predict_batch_async(
+            [upload.data for upload in pending_uploads],
+            [upload.digest for upload in pending_uploads]
+        ) if pending_uploads else []
+        
+        for i, prediction_result in zip(pending_indices, predictions):
+            if "error" in prediction_result:
+                results[i] = {
+                    "filename": files[i].filename,
+                    "error": prediction_result["error"],
+                    "success": False
+                }
+            else:
+                results[i] = {
+                    "filename": files[i].filename,
                     "predicted_plant": prediction_result["predicted_class"],
                     "confidence": prediction_result["confidence"],
                     "success": True
-                })
-                
-            except Exception as e:
-                results.append({
-                    "filename": file.filename,
-                    "error": str(e),
-                    "success": False
-                })
+                }
         
         return {
             "total": len(files),
@@ -214,49 +224,45 @@ async def predict_batch(
 
 @router.get("/history")
 async def get_prediction_history(
-    skip: int = 0,
+    cursor: Optional[str] = None,
     limit: int = 20,
+    skip: int = Query(0, ge=0, deprecated=True),
     db: Session = Depends(get_db)
 ):
     """
-    Get user's prediction history
+    Get user's prediction history, newest first
     
-    - **skip**: Number of records to skip
-    - **limit**: Maximum number of records to return
+    - **cursor**: `next_cursor` from the previous page (omit for the first page)
+    - **limit**: Maximum number of records to return (up to 100)
+    - **skip**: Deprecated offset for the first page; ignored with a cursor. Follow `next_cursor` instead
+    - Returns: One page of predictions; `total` is an estimate
     """
     try:
-        predictions = db.query(Prediction).order_by(
-            Prediction.created_at.desc()
-        ).offset(skip).limit(limit).all()
-        
-        results = []
-        for pred in predictions:
-            plant = db.query(Plant).filter(Plant.id == pred.predicted_plant_id).first()
-            
-            results.append({
-                "id": pred.id,
-                "image_url": pred.image_url,
-                "predicted_plant": plant.species_name if plant else "Unknown",
-                "common_name": plant.common_name_en if plant else None,
-                "confidence": pred.confidence_score,
-                "created_at": pred.created_at.isoformat() if pred.created_at else None,
-                "feedback_correct": pred.feedback_correct
-            })
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        if cursor:
+            skip = 0
+        try:
+            results, next_cursor = history_page(db, cursor, limit, skip)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         
         return {
-            "total": db.query(Prediction).count(),
+            "total": get_prediction_count_cache().get(db),
             "skip": skip,
             "limit": limit,
+            "next_cursor": next_cursor,
             "predictions": results
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to retrieve history: {str(e)}")
 
 
 @router.post("/{prediction_id}/feedback")
 async def submit_feedback(
-    prediction_id: int,
+    prediction_id: str,
     correct: bool,
     comment: str = None,
     db: Session = Depends(get_db)
@@ -264,12 +270,23 @@ async def submit_feedback(
     """
     Submit feedback for a prediction
     
-    - **prediction_id**: ID of the prediction
+    - **prediction_id**: ID of the prediction (UUID; numeric ids of older records also work)
     - **correct**: Whether the prediction was correct
     - **comment**: Optional feedback comment
     """
     try:
-        prediction = db.query(Prediction).filter(Prediction.id == prediction_id).first()
+        # Feedback can arrive before the write-behind task has inserted the row
+        writer = get_prediction_writer()
+        if writer.is_pending(prediction_id):
+            await writer.flush()
+            if writer.is_pending(prediction_id):
+                # The insert failed and is queued for a retry
+                raise HTTPException(status_code=503, detail="Prediction is not stored yet, try again shortly")
+        
+        if prediction_id.isdigit():
+            prediction = db.query(Prediction).filter(Prediction.id == int(prediction_id)).first()
+        else:
+            prediction = db.query(Prediction).filter(Prediction.public_id == prediction_id).first()
         
         if not prediction:
             raise HTTPException(status_code=404, detail="Prediction not found")
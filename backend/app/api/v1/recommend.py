@@ -3,12 +3,15 @@ Recommendation API Routes
 Plant recommendations based on various criteria
 """
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
 from sqlalchemy.orm import Session
 from typing import Optional
 
 from app.database import get_db
+from app.services.ml_service import get_ml_service
+from app.services.inference_backends import InferenceUnavailable
 from app.services.recommendation_service import get_recommendation_service
+from app.services.upload_reader import UploadRejected, read_image_upload
 
 router = APIRouter()
 
@@ -44,6 +47,51 @@ async def get_similar_plants(
         raise HTTPException(status_code=500, detail=f"Failed to get recommendations: {str(e)}")
 
 
+@router.post("/visual")
+async def get_visually_similar_images(
+    file: UploadFile = File(...),
+    limit: int = Query(10, ge=1, le=50),
+    db: Session = Depends(get_db)
+):
+    """
+    Find reference leaf images that look like an uploaded one
+    
+    - **file**: Image file (JPEG/PNG)
+    - **limit**: Number of images
+    
+    The upload is embedded by the same model run that predicts its species.
+    """
+    recommendation_service = get_recommendation_service()
+    if recommendation_service.get_visual_index() is None:
+        raise HTTPException(status_code=503, detail="Visual search is not available")
+    
+    try:
+        upload = await read_image_upload(file)
+    except UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    
+    try:
+        prediction, embedding = await get_ml_service().predict_with_embedding_async(upload.data, upload.digest)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except InferenceUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if embedding is None:
+        raise HTTPException(status_code=503, detail="The served model does not provide image embeddings")
+    
+    try:
+        images = recommendation_service.get_similar_images(embedding, db=db, limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to find similar images: {str(e)}")
+    
+    return {
+        "predicted_plant": prediction["predicted_class"],
+        "confidence": prediction["confidence"],
+        "count": len(images),
+        "images": images
+    }
+
+
 @router.post("/ailment")
 async def get_plants_for_ailment(
     ailment: str = Query(..., min_length=2),
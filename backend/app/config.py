@@ -5,9 +5,11 @@ Loads environment variables and provides application configuration
 
 from pydantic_settings import BaseSettings
 from pydantic import field_validator
-from typing import List, Union
+from typing import List, Literal, Union
 import os
 
+GraphOptLevel = Literal["disable", "basic", "extended", "all"]
+
 
 class Settings(BaseSettings):
     """Application settings"""
@@ -25,6 +27,13 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///./medicinal_plants.db"
+    PREDICTION_WRITE_BEHIND: bool = True  # Queue prediction rows and insert them in batches off the request path
+    PREDICTION_FLUSH_SIZE: int = 64  # Rows that trigger an immediate flush
+    PREDICTION_FLUSH_INTERVAL_MS: float = 250.0  # Max time a row waits in the queue (0 = flush as soon as one is queued)
+    PREDICTION_MAX_PENDING: int = 2048  # Queued rows before requests wait for a flush (backpressure)
+    PREDICTION_WRITE_RETRIES: int = 5  # Failed flushes re-queue their rows up to this many times
+    PREDICTION_SPILL_PATH: str | None = "./logs/prediction_spill.jsonl"  # Rows that still fail are appended here (None drops them)
+    HISTORY_COUNT_CACHE_SECONDS: float = 60.0  # How long /predict/history reuses its (approximate) total
     
     # Redis
     REDIS_URL: str = "redis://localhost:6379/0"
@@ -49,6 +58,7 @@ class Settings(BaseSettings):
     # File Upload
     UPLOAD_DIR: str = "./uploads"
     MAX_UPLOAD_SIZE: int = 10485760  # 10MB
+    UPLOAD_CHUNK_SIZE: int = 1048576  # Bytes hashed/validated per read of an upload
     
     # ML Models
     MODEL_DIR: str = "./ml_models"
@@ -57,6 +67,73 @@ class Settings(BaseSettings):
     ENHANCED_MODEL_PATH: str = "./ml_models/efficientnetv2_best.onnx"
     CLASS_NAMES_PATH: str = "./ml_models/class_names.json"
     ENSEMBLE_WEIGHTS_PATH: str = "./ml_models/ensemble_weights.json"
+    USE_QUANTIZED_MODELS: bool = False  # Load <name>_int8.onnx variants when present (see ml_pipeline/quantize_onnx.py)
+    ML_EAGER_LOAD: bool = True  # Load and warm models at startup instead of on the first request
+    ML_WARMUP_BATCH_SIZES: List[int] = [1, 4, 16]  # Synthetic batch sizes run once per session at startup
+    MODEL_WATCH_INTERVAL_SECONDS: float = 0  # Poll MODEL_DIR and hot-reload changed models (0 = off)
+    
+    # Image Decoding
+    IMAGE_DECODE_BACKEND: str = "pillow"  # "pillow" or "opencv"
+    IMAGE_DECODE_DRAFT: bool = True  # Decode JPEGs at reduced DCT scale when much larger than the model input
+    PREPROCESS_CACHE_SIZE: int = 256  # Decoded uploads kept for reuse across predict/explain (~150KB each)
+    
+    # Prediction Result Cache
+    RESULT_CACHE_SIZE: int = 2048  # In-memory predictions keyed by image hash + model fingerprint (0 = off)
+    RESULT_CACHE_TTL_SECONDS: int = 3600
+    RESULT_CACHE_DIR: str | None = None  # Optional on-disk tier shared by workers and restarts
+    
+    # Inference Scheduling
+    INFERENCE_EXECUTOR_WORKERS: int = 16  # Threads for decode/preprocess work
+    INFERENCE_BATCHING_ENABLED: bool = True  # Group concurrent requests into one session run
+    INFERENCE_MAX_BATCH_SIZE: int = 16
+    INFERENCE_MAX_WAIT_MS: float = 5.0  # Max time the first request waits for a batch to fill
+    INFERENCE_BATCH_WORKERS: int = 1  # Dispatcher threads pulling batches
+    MAX_BATCH_IMAGES: int = 500  # Files accepted by /predict/batch
+    BATCH_INFERENCE_CHUNK_SIZE: int = 32  # Images stacked per session run in predict_batch
+    ENSEMBLE_EXECUTION_MODE: Literal["sequential", "parallel", "cascade"] = "sequential"  # "sequential", "parallel" (members run concurrently) or "cascade" (early exit)
+    CASCADE_CONFIDENCE_THRESHOLD: float = 0.90  # Cascade: MobileNetV2 top-1 needed to skip the larger members
+    CASCADE_MARGIN_THRESHOLD: float = 0.50  # Cascade: and its minimum lead over the runner-up class
+    
+    # Inference Backend
+    INFERENCE_BACKEND: str = "local"  # local (API threads) | process (worker pool) | socket (standalone daemon)
+    INFERENCE_WORKERS: int = 2  # Worker processes for INFERENCE_BACKEND=process
+    INFERENCE_SHM_MB: int = 64  # Initial shared-memory input buffer per worker (grows for larger batches)
+    INFERENCE_SOCKET_PATH: str = "/tmp/medicinal-plants-inference.sock"  # Daemon for INFERENCE_BACKEND=socket
+    INFERENCE_SOCKET_POOL_SIZE: int = 8  # Idle daemon connections kept open
+    INFERENCE_TIMEOUT_SECONDS: float = 30.0
+    
+    # ONNX Runtime Session Tuning
+    ORT_GRAPH_OPT_LEVEL: GraphOptLevel = "all"  # disable | basic | extended | all
+    ORT_INTRA_OP_THREADS: int = 0  # 0 = ORT default (cores // members in parallel ensemble mode)
+    ORT_INTER_OP_THREADS: int = 0  # 0 = ORT default; only used with ORT_EXECUTION_MODE=parallel
+    ORT_EXECUTION_MODE: Literal["sequential", "parallel"] = "sequential"  # Operator scheduling inside a graph: sequential | parallel
+    ORT_ENABLE_CPU_MEM_ARENA: bool = True
+    ORT_ENABLE_MEM_PATTERN: bool = True
+    ORT_OPTIMIZED_MODEL_DIR: str | None = None  # Save optimized graphs here and reuse them on later starts
+    ORT_MMAP_WEIGHTS: bool = False  # Serve weights from mmapped external-data files shared by all worker processes
+    
+    # Per-model overrides of the ORT_* defaults above (unset = inherit)
+    MOBILENET_INTRA_OP_THREADS: int | None = None
+    MOBILENET_INTER_OP_THREADS: int | None = None
+    MOBILENET_GRAPH_OPT_LEVEL: GraphOptLevel | None = None
+    VIT_INTRA_OP_THREADS: int | None = None
+    VIT_INTER_OP_THREADS: int | None = None
+    VIT_GRAPH_OPT_LEVEL: GraphOptLevel | None = None
+    EFFICIENTNET_INTRA_OP_THREADS: int | None = None
+    EFFICIENTNET_INTER_OP_THREADS: int | None = None
+    EFFICIENTNET_GRAPH_OPT_LEVEL: GraphOptLevel | None = None
+    
+    # Recommendations
+    RECOMMENDATION_TOP_K: int = 20  # Neighbours precomputed per plant by the similarity index
+    CATALOGUE_CHECK_SECONDS: float = 5.0  # How often recommendation indexes look for catalogue writes from other processes
+    PLANT_EMBEDDING_INDEX_DIR: str | None = None  # IVF index of plant embeddings (scripts/build_plant_embeddings.py); unset = TF-IDF only
+    ANN_NPROBE: int = 8  # Inverted lists scanned per ANN query: higher = better recall, slower
+    VISUAL_INDEX_DIR: str | None = None  # IVF index of reference-image embeddings (scripts/build_visual_index.py); unset = /recommend/visual off
+    VISUAL_EMBEDDING_MODEL: str = "mobilenet"  # Ensemble member whose penultimate-layer features are the image embedding
+    
+    # Plant search
+    SEARCH_MIN_SIMILARITY: float = 0.3  # Typo tolerance: trigram similarity (as pg_trgm) a fuzzy name match needs
+    SEARCH_MAX_CANDIDATES: int = 200  # Rows read from the trigram index per search, then re-ranked; also caps results
     
     # Google Gemini
     GEMINI_API_KEY: str | None = None
@@ -68,11 +145,16 @@ class Settings(BaseSettings):
     AWS_SECRET_ACCESS_KEY: str | None = None
     AWS_REGION: str = "us-east-1"
     S3_BUCKET_NAME: str | None = None
+    S3_ENDPOINT_URL: str | None = None  # S3-compatible stand-in such as MinIO (unset = AWS)
+    S3_UPLOAD_PREFIX: str = "uploads/"
     
     # Logging
     LOG_LEVEL: str = "INFO"
     LOG_FILE: str = "./logs/app.log"
     
+    # Admin API (model reloads); disabled when unset
+    ADMIN_API_KEY: str | None = None
+    
     # Rate Limiting
     RATE_LIMIT_PER_MINUTE: int = 60
     
@@ -3,11 +3,16 @@ Database Configuration
 SQLAlchemy setup for database connection and session management
 """
 
-from sqlalchemy import create_engine
+import logging
+
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Create database engine
 engine = create_engine(
     settings.DATABASE_URL,
@@ -31,3 +36,34 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def ensure_schema(bind: Engine):
+    """
+    Bring existing tables up to the models after create_all
+
+    create_all skips tables that already exist, so columns and indexes added
+    to a model later (e.g. predictions.public_id) never reach a deployed
+    database. This adds missing nullable columns and missing indexes;
+    anything else still needs a real migration.
+    """
+    inspector = inspect(bind)
+    preparer = bind.dialect.identifier_preparer
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                if not column.nullable or column.primary_key:
+                    logger.warning(f"Cannot add required column {table.name}.{column.name}; migrate it by hand")
+                    continue
+                connection.execute(text(
+                    f"ALTER TABLE {preparer.format_table(table)} ADD COLUMN "
+                    f"{preparer.format_column(column)} {column.type.compile(dialect=bind.dialect)}"
+                ))
+                logger.info(f"Added column {table.name}.{column.name}")
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
@@ -0,0 +1,136 @@
+"""
+Standalone Inference Daemon
+Serves ensemble inference over a Unix domain socket to API processes running
+with INFERENCE_BACKEND=socket, so inference capacity is sized and restarted
+independently of the API workers.
+
+Usage:
+    python -m app.inference_server
+    python -m app.inference_server --socket /run/plants/inference.sock --workers 4
+
+With --workers the daemon fans requests out to its own pool of worker
+processes (INFERENCE_BACKEND=process); without it sessions run on the
+connection threads. Set MODEL_WATCH_INTERVAL_SECONDS here rather than in the
+API processes to pick up new model files.
+"""
+
+import os
+import argparse
+import logging
+import threading
+import socketserver
+
+from app.config import settings
+from app.services.inference_backends import reload_if_changed, recv_message, send_message
+from app.services.ml_service import MLService
+
+logger = logging.getLogger(__name__)
+
+
+class InferenceRequestHandler(socketserver.BaseRequestHandler):
+    """One API connection; serves requests until the client disconnects"""
+
+    def handle(self):
+        service: MLService = self.server.service
+        while True:
+            try:
+                header, arrays = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+
+            try:
+                op = header.get("op")
+                if op == "infer":
+                    inference = service.infer_tensors(arrays)
+                    if inference is None:
+                        send_message(self.request, {"ok": True})
+                    else:
+                        probs, model_version, ensemble_used, stages_run = inference
+                        send_message(
+                            self.request,
+                            {
+                                "ok": True,
+                                "model_version": model_version,
+                                "ensemble_used": ensemble_used,
+                                "stages_run": stages_run
+                            },
+                            {"probs": probs}
+                        )
+                elif op == "ping":
+                    send_message(self.request, {"ok": True, "members": self.server.members()})
+                elif op == "reload":
+                    # Every API process forwards admin reloads; only the first one does work
+                    with self.server.reload_lock:
+                        if service.inference_backend is not None:
+                            service.reload_models()
+                            info = service.bundle.info()
+                        else:
+                            info = reload_if_changed(service)
+                    send_message(self.request, {"ok": True, "bundle": info})
+                else:
+                    send_message(self.request, {"ok": False, "error": f"Unknown operation: {op}"})
+            except (ConnectionError, OSError):
+                return
+            except Exception as e:
+                logger.error(f"Inference request failed: {e}")
+                send_message(self.request, {"ok": False, "error": str(e)})
+
+
+class InferenceServer(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server in front of an MLService"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, service: MLService):
+        # A socket file left by a previous run would make bind() fail
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, InferenceRequestHandler)
+        os.chmod(socket_path, 0o660)
+        self.socket_path = socket_path
+        self.service = service
+        self.reload_lock = threading.Lock()
+
+    def members(self):
+        """Ensemble members being served"""
+        if self.service.inference_backend is not None:
+            return self.service.inference_backend.members
+        return sorted(self.service.bundle.sessions)
+
+    def server_close(self):
+        super().server_close()
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=settings.INFERENCE_SOCKET_PATH, help="Unix socket to listen on")
+    parser.add_argument("--workers", type=int, default=0, help="Inference worker processes (0 = in-process sessions)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=settings.LOG_LEVEL, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    settings.INFERENCE_BACKEND = "process" if args.workers > 0 else "local"
+    settings.INFERENCE_WORKERS = args.workers
+    settings.INFERENCE_BATCHING_ENABLED = False  # API processes batch before sending
+    settings.RESULT_CACHE_SIZE = 0
+    settings.RESULT_CACHE_DIR = None
+
+    service = MLService()
+    service.startup()
+    if service.use_mock:
+        raise SystemExit(f"No models could be loaded from {settings.MODEL_DIR}")
+
+    server = InferenceServer(args.socket, service)
+    logger.info(f"Inference daemon listening on {args.socket}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -8,13 +8,19 @@ from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 import logging
 import time
 
 from app.config import settings
-from app.database import engine, Base
-from app.api.v1 import auth, predict, plants, explain, recommend, gemini
+from app.database import engine, Base, SessionLocal, ensure_schema
+from app.api.v1 import auth, predict, plants, explain, recommend, gemini, admin
 from app.middleware.rate_limit import RateLimitMiddleware
+from app.middleware.upload_limit import UploadLimitMiddleware
+from app.services.ml_service import get_ml_service
+from app.services.plant_search import ensure_search_index
+from app.services.prediction_writer import get_prediction_writer
+from app.services.recommendation_service import get_recommendation_service
 
 # Configure logging
 logging.basicConfig(
@@ -31,12 +37,60 @@ async def lifespan(app: FastAPI):
     logger.info("Starting up application...")
     # Create database tables
     Base.metadata.create_all(bind=engine)
+    # Columns and indexes added to models after their table was created
+    ensure_schema(engine)
+    # Trigram index for plant search on databases created before it existed
+    ensure_search_index(engine)
     logger.info("Database tables created")
     
+    # Batched, write-behind inserts of prediction records
+    if settings.PREDICTION_WRITE_BEHIND:
+        await get_prediction_writer().start()
+    
+    # Precompute plant similarity neighbours off the event loop
+    index_task = asyncio.create_task(build_similarity_index())
+    
+    # Load and warm the models off the event loop; /ready flips once done
+    warmup_task = None
+    if settings.ML_EAGER_LOAD:
+        warmup_task = asyncio.create_task(warm_up_ml_service())
+    
     yield
     
     # Shutdown
     logger.info("Shutting down application...")
+    if warmup_task is not None:
+        await warmup_task
+    await index_task
+    await get_prediction_writer().stop()
+    get_ml_service().shutdown()
+
+
+async def build_similarity_index():
+    """Recommendation similarity index, built once; later catalogue edits update it incrementally"""
+    def build():
+        db = SessionLocal()
+        try:
+            get_recommendation_service().build_index(db)
+        finally:
+            db.close()
+    
+    try:
+        await asyncio.to_thread(build)
+    except Exception as e:
+        logger.error(f"Similarity index build failed (will build on first use): {e}")
+
+
+async def warm_up_ml_service():
+    """Eager model load + warmup on the ML executor"""
+    ml_service = get_ml_service()
+    loop = asyncio.get_running_loop()
+    start = time.perf_counter()
+    try:
+        await loop.run_in_executor(ml_service.executor, ml_service.startup)
+        logger.info(f"ML service ready in {time.perf_counter() - start:.2f}s")
+    except Exception as e:
+        logger.error(f"ML service warmup failed: {e}")
 
 
 # Initialize FastAPI app
@@ -79,6 +133,9 @@ app.add_middleware(
 # Rate Limiting Middleware
 app.add_middleware(RateLimitMiddleware)
 
+# Upload Size Limit Middleware (outermost: rejects oversized bodies while they stream in)
+app.add_middleware(UploadLimitMiddleware)
+
 # Include API routers
 app.include_router(auth.router, prefix=f"{settings.API_V1_PREFIX}/auth", tags=["Authentication"])
 app.include_router(predict.router, prefix=f"{settings.API_V1_PREFIX}/predict", tags=["Prediction"])
@@ -86,6 +143,7 @@ app.include_router(plants.router, prefix=f"{settings.API_V1_PREFIX}/plants", tag
 app.include_router(explain.router, prefix=f"{settings.API_V1_PREFIX}/explain", tags=["Explainability"])
 app.include_router(recommend.router, prefix=f"{settings.API_V1_PREFIX}/recommend", tags=["Recommendations"])
 app.include_router(gemini.router, prefix=f"{settings.API_V1_PREFIX}/gemini", tags=["Gemini AI"])
+app.include_router(admin.router, prefix=f"{settings.API_V1_PREFIX}/admin", tags=["Admin"])
 
 
 @app.get("/")
@@ -102,10 +160,29 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
+    ml_service = get_ml_service()
     return {
         "status": "healthy",
-        "version": settings.APP_VERSION
+        "version": settings.APP_VERSION,
+        "caches": {
+            "predictions": ml_service.result_cache.stats(),
+            "preprocessing": ml_service.preprocess_cache.stats()
+        }
+    }
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until the models are loaded and warmed up"""
+    ml_service = get_ml_service()
+    ready = ml_service.ready or not settings.ML_EAGER_LOAD
+    content = {
+        "ready": ready,
+        "models_loaded": ml_service.models_loaded,
+        "mode": "demo" if ml_service.use_mock else "production",
+        "visual_search": ml_service.visual_search_status()
     }
+    return JSONResponse(status_code=200 if ready else 503, content=content)
 
 
 if __name__ == "__main__":
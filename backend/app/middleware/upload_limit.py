@@ -0,0 +1,59 @@
+"""
+Upload Limit Middleware
+Rejects oversized multipart bodies while they are still streaming in
+"""
+
+from fastapi import HTTPException
+from fastapi.responses import JSONResponse
+
+from app.config import settings
+
+# Boundaries, part headers and form fields on top of the file bytes
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadLimitMiddleware:
+    """
+    Pure ASGI middleware capping multipart request bodies.
+
+    A Content-Length over the cap is answered with 413 before any of the body
+    is read. Otherwise `receive` is wrapped so the 413 is raised as soon as the
+    running total crosses the cap, instead of after Starlette has spooled the
+    whole upload. Batch routes get MAX_BATCH_IMAGES times the per-file limit.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    @staticmethod
+    def limit_for(path: str) -> int:
+        files = settings.MAX_BATCH_IMAGES if path.rstrip("/").endswith("/batch") else 1
+        return settings.MAX_UPLOAD_SIZE * files + MULTIPART_OVERHEAD
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        if not headers.get(b"content-type", b"").startswith(b"multipart/form-data"):
+            return await self.app(scope, receive, send)
+
+        limit = self.limit_for(scope["path"])
+        detail = f"Request body exceeds maximum of {limit} bytes"
+        content_length = headers.get(b"content-length")
+        if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse(status_code=413, content={"detail": detail})
+            return await response(scope, receive, send)
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Re-raised by FastAPI's body parsing and turned into the 413 response
+                    raise HTTPException(status_code=413, detail=detail)
+            return message
+
+        await self.app(scope, limited_receive, send)
@@ -3,7 +3,7 @@ Prediction Model
 Database model for storing user predictions and feedback
 """
 
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, ForeignKey, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -15,6 +15,7 @@ class Prediction(Base):
     __tablename__ = "predictions"
     
     id = Column(Integer, primary_key=True, index=True)
+    public_id = Column(String(36), unique=True, index=True, nullable=True)  # UUID returned to clients
     user_id = Column(Integer, ForeignKey("users.id"), nullable=True)
     image_url = Column(String, nullable=False)
     predicted_plant_id = Column(Integer, ForeignKey("plants.id"))
@@ -26,6 +27,11 @@ class Prediction(Base):
     processing_time_ms = Column(Float)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    __table_args__ = (
+        # Keyset pagination of /predict/history: ORDER BY created_at DESC, id DESC
+        Index("ix_predictions_created_at_id", "created_at", "id"),
+    )
+    
     def __repr__(self):
         return f"<Prediction(id={self.id}, confidence={self.confidence_score})>"
 
@@ -0,0 +1,284 @@
+"""
+Ailment Index
+In-memory inverted index over MedicinalProperty.ailment for RecommendationService.
+
+Ailment text and queries go through the same normalization: lowercasing,
+multi-word phrases folded to one term ("high blood pressure" ->
+hypertension), stop words and generic words ("problems", "issues")
+dropped, a light suffix stemmer, and synonym groups mapped to one
+canonical term. A query term matches a property when they share a term;
+a query term with no exact match falls back to terms it is a prefix of
+("diab" -> diabetes).
+
+Each indexed property keeps its plant id and efficacy rating, so ranking
+and de-duplication by plant happen in memory and the database is read
+once per search, for the final rows only. Like the similarity index, it is
+built on first use and kept current by catalogue change events
+(similarity_index.track_catalogue_changes).
+"""
+
+import re
+import math
+import bisect
+import logging
+import threading
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.plant import MedicinalProperty
+from app.services.similarity_index import CatalogueWatch
+
+logger = logging.getLogger(__name__)
+
+STOP_WORDS = {
+    "a", "an", "and", "or", "the", "of", "for", "to", "in", "on", "with", "by", "from",
+    "common", "general", "problem", "problems", "issue", "issues", "disorder", "disorders",
+    "condition", "conditions", "booster", "relief", "treatment"
+}
+
+# Rewritten before tokenizing, longest first
+PHRASES = {
+    "high blood pressure": "hypertension",
+    "blood pressure": "hypertension",
+    "blood sugar": "diabetes",
+    "common cold": "cold",
+    "sore throat": "throat",
+}
+
+# Synonym groups; every member is indexed and queried as the first one
+SYNONYM_GROUPS = [
+    ["fever", "pyrexia", "febrile"],
+    ["diabetes", "diabetic", "hyperglycemia"],
+    ["hypertension", "bp"],
+    ["digestion", "digestive", "indigestion", "dyspepsia", "stomach", "gastric", "acidity", "bloating"],
+    ["cold", "flu", "influenza"],
+    ["respiratory", "breathing", "lung", "lungs", "bronchial"],
+    ["anxiety", "anxious", "nervousness"],
+    ["fatigue", "tiredness", "exhaustion", "weakness"],
+    ["inflammation", "inflammatory", "swelling"],
+    ["pain", "ache", "aches", "sore"],
+    ["headache", "migraine"],
+    ["joint", "arthritis", "rheumatism"],
+    ["wound", "cut", "injury"],
+    ["burn", "sunburn", "scald"],
+    ["skin", "dermatitis", "eczema", "rash"],
+    ["immunity", "immune"],
+    ["insomnia", "sleeplessness"],
+]
+
+# (suffix, replacement); the first that leaves a stem of at least 3 letters applies
+SUFFIXES = [
+    ("ational", ""), ("ations", ""), ("ation", ""), ("atory", ""), ("ness", ""),
+    ("ities", ""), ("ity", ""), ("ings", ""), ("ing", ""), ("ions", ""), ("ion", ""),
+    ("ives", ""), ("ive", ""), ("ies", "y"), ("ied", "y"), ("ics", ""), ("ic", ""),
+    ("ed", ""), ("es", ""), ("ly", ""), ("e", ""),
+]
+MIN_STEM = 3
+# Vocabulary terms a query term may expand to by prefix
+MAX_PREFIX_EXPANSIONS = 20
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def stem(word: str) -> str:
+    """Strip one common English suffix (plural "s" handled separately)"""
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")) and len(word) > MIN_STEM:
+        word = word[:-1]
+    for suffix, replacement in SUFFIXES:
+        if word.endswith(suffix) and len(word) - len(suffix) + len(replacement) >= MIN_STEM:
+            return word[:-len(suffix)] + replacement
+    return word
+
+
+_SYNONYMS: Dict[str, str] = {
+    stem(word): stem(group[0])
+    for group in SYNONYM_GROUPS
+    for word in group
+}
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase ASCII-folded text with PHRASES rewritten"""
+    text = unicodedata.normalize("NFKD", text or "").encode("ascii", "ignore").decode().lower()
+    text = " ".join(_TOKEN_PATTERN.findall(text))
+    for phrase in sorted(PHRASES, key=len, reverse=True):
+        text = re.sub(rf"\b{phrase}\b", PHRASES[phrase], text)
+    return text
+
+
+def ailment_terms(text: str) -> List[str]:
+    """Index terms of an ailment or query, in order, without duplicates"""
+    terms = []
+    for word in normalize_text(text).split():
+        if word in STOP_WORDS:
+            continue
+        term = stem(word)
+        term = _SYNONYMS.get(term, term)
+        if term not in terms:
+            terms.append(term)
+    return terms
+
+
+class AilmentIndex:
+    """Term -> property postings, with each property's plant and efficacy"""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.postings: Dict[str, Set[int]] = {}  # term -> property ids
+        self.property_terms: Dict[int, List[str]] = {}
+        self.property_plant: Dict[int, int] = {}
+        self.property_efficacy: Dict[int, int] = {}
+        self.plant_properties: Dict[int, Set[int]] = {}
+        self.bind_key: Optional[str] = None
+        self._vocabulary: Optional[List[str]] = None  # Sorted terms for prefix lookups, rebuilt lazily
+        self._dirty: Set[int] = set()
+        self._watch = CatalogueWatch()  # Writes by other processes (see similarity_index)
+
+    @property
+    def built(self) -> bool:
+        return self.bind_key is not None
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def mark_dirty(self, plant_ids: Iterable[int]):
+        with self._lock:
+            self._dirty.update(plant_ids)
+
+    def ensure_current(self, db: Session):
+        """Build on first use (or for a different database), then apply pending changes"""
+        with self._lock:
+            if not self.built or self.bind_key != str(db.get_bind().url):
+                self.build(db)
+            elif self._dirty:
+                dirty, self._dirty = self._dirty, set()
+                self.update(db, dirty)
+                self._watch.stamp(db)
+            elif self._watch.changed(db):
+                logger.info("Catalogue changed outside this process; rebuilding ailment index")
+                self.build(db)
+
+    def build(self, db: Session):
+        """Index every medicinal property from one column query"""
+        with self._lock:
+            self._reset()
+            self._watch.stamp(db)
+            self.bind_key = str(db.get_bind().url)
+            for row in self._property_rows(db):
+                self._add(*row)
+            logger.info(f"Ailment index built for {len(self.property_plant)} properties, {len(self.postings)} terms")
+
+    def update(self, db: Session, plant_ids: Iterable[int]):
+        """Re-index the properties of the given plants (added, edited or deleted)"""
+        with self._lock:
+            plant_ids = set(plant_ids)
+            for plant_id in plant_ids:
+                for property_id in self.plant_properties.pop(plant_id, set()):
+                    self._remove(property_id)
+            for row in self._property_rows(db, plant_ids):
+                self._add(*row)
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[int, int, float]]:
+        """
+        Best matching property per plant for up to `limit` plants
+
+        Relevance is the IDF-weighted share of the query terms a property
+        matches. Plants are ranked by their best property's relevance, then
+        its efficacy rating, then how specific its ailment is (fewer terms).
+
+        Returns:
+            [(plant id, property id, relevance)], best first
+        """
+        with self._lock:
+            num_properties = max(len(self.property_plant), 1)
+            weights: Dict[int, float] = {}
+            total = 0.0
+            for term in ailment_terms(query):
+                matches = self._term_matches(term)
+                idf = math.log(1 + num_properties / max(len(matches), 1))
+                total += idf
+                for property_id in matches:
+                    weights[property_id] = weights.get(property_id, 0.0) + idf
+            if not weights:
+                return []
+
+            best: Dict[int, Tuple] = {}
+            for property_id, weight in weights.items():
+                relevance = weight / total
+                key = (
+                    round(relevance, 6),
+                    self.property_efficacy.get(property_id) or 0,
+                    -len(self.property_terms[property_id]),
+                    -property_id
+                )
+                plant_id = self.property_plant[property_id]
+                if plant_id not in best or key > best[plant_id][0]:
+                    best[plant_id] = (key, property_id, relevance)
+            ranked = sorted(best.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+            return [(plant_id, property_id, relevance) for plant_id, (_, property_id, relevance) in ranked]
+
+    def stats(self) -> Dict:
+        return {
+            "properties": len(self.property_plant),
+            "plants": len(self.plant_properties),
+            "terms": len(self.postings),
+            "pending_updates": len(self._dirty)
+        }
+
+    @staticmethod
+    def _property_rows(db: Session, plant_ids: Optional[Set[int]] = None):
+        query = db.query(
+            MedicinalProperty.id,
+            MedicinalProperty.plant_id,
+            MedicinalProperty.ailment,
+            MedicinalProperty.efficacy_rating
+        )
+        if plant_ids is not None:
+            if not plant_ids:
+                return []
+            query = query.filter(MedicinalProperty.plant_id.in_(list(plant_ids)))
+        return query.all()
+
+    def _add(self, property_id: int, plant_id: int, ailment: Optional[str], efficacy: Optional[int]):
+        terms = ailment_terms(ailment or "")
+        self.property_terms[property_id] = terms
+        self.property_plant[property_id] = plant_id
+        self.property_efficacy[property_id] = efficacy
+        self.plant_properties.setdefault(plant_id, set()).add(property_id)
+        for term in terms:
+            if term not in self.postings:
+                self._vocabulary = None
+            self.postings.setdefault(term, set()).add(property_id)
+
+    def _remove(self, property_id: int):
+        for term in self.property_terms.pop(property_id, []):
+            postings = self.postings.get(term)
+            if postings is not None:
+                postings.discard(property_id)
+                if not postings:
+                    del self.postings[term]
+                    self._vocabulary = None
+        self.property_plant.pop(property_id, None)
+        self.property_efficacy.pop(property_id, None)
+
+    def _term_matches(self, term: str) -> Set[int]:
+        """Properties containing `term`, else those containing a term it prefixes"""
+        if term in self.postings:
+            return self.postings[term]
+        if len(term) < MIN_STEM:
+            return set()
+        if self._vocabulary is None:
+            self._vocabulary = sorted(self.postings)
+        matches: Set[int] = set()
+        start = bisect.bisect_left(self._vocabulary, term)
+        for candidate in self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS]:
+            if not candidate.startswith(term):
+                break
+            matches |= self.postings[candidate]
+        return matches
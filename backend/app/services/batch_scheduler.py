@@ -0,0 +1,130 @@
+"""
+Batch Scheduler
+Collects concurrent inference requests into micro-batches so each ONNX
+session runs once per batch instead of once per image.
+"""
+
+import threading
+import queue
+import time
+import logging
+import concurrent.futures
+from typing import Any, Callable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatchScheduler:
+    """Dynamic micro-batching scheduler backed by dispatcher threads"""
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[Any]], List[Any]],
+        max_batch_size: int = 16,
+        max_wait_ms: float = 5.0,
+        num_workers: int = 1,
+        name: str = "inference-batcher"
+    ):
+        """
+        Args:
+            batch_fn: Callable taking a list of items and returning one result
+                per item (an Exception instance marks a per-item failure)
+            max_batch_size: Upper bound on items dispatched together
+            max_wait_ms: How long the first item of a batch waits for company
+            num_workers: Number of dispatcher threads pulling batches
+            name: Thread name prefix
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.num_workers = max(1, num_workers)
+        self.name = name
+
+        self._queue: "queue.Queue[Tuple[Any, concurrent.futures.Future] | None]" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._running = False
+
+    def start(self):
+        """Start dispatcher threads (idempotent)"""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
+            for i in range(self.num_workers):
+                thread = threading.Thread(
+                    target=self._worker,
+                    name=f"{self.name}-{i}",
+                    daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        logger.info(
+            f"Batch scheduler started (max_batch_size={self.max_batch_size}, "
+            f"max_wait_ms={self.max_wait * 1000:.1f}, workers={self.num_workers})"
+        )
+
+    def submit(self, item: Any) -> concurrent.futures.Future:
+        """Queue an item for batched execution and return its future"""
+        if not self._running:
+            raise RuntimeError("Batch scheduler is not running")
+        future: concurrent.futures.Future = concurrent.futures.Future()
+        self._queue.put((item, future))
+        return future
+
+    def shutdown(self, wait: bool = True):
+        """Stop dispatcher threads after draining queued work"""
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            for _ in self._threads:
+                self._queue.put(None)
+            threads, self._threads = self._threads, []
+        if wait:
+            for thread in threads:
+                thread.join()
+
+    def _collect(self, first) -> List[Tuple[Any, concurrent.futures.Future]]:
+        """Gather items until the batch is full or the wait budget is spent"""
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is None:
+                # Re-queue the stop sentinel for this worker's next loop
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _worker(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+
+            batch = self._collect(first)
+            # Skip callers that gave up before dispatch
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            items = [item for item, _ in batch]
+            try:
+                results = self.batch_fn(items)
+            except Exception as e:
+                logger.error(f"Batch of {len(items)} failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), result in zip(batch, results):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
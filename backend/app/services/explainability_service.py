@@ -11,6 +11,8 @@ import base64
 from typing import Dict, Tuple
 import logging
 
+from app.services.preprocessing import get_preprocess_cache
+
 logger = logging.getLogger(__name__)
 
 
@@ -36,14 +38,8 @@ class ExplainabilityService:
             Dictionary with Grad-CAM visualization data
         """
         try:
-            # Open and process image
-            image = Image.open(io.BytesIO(image_bytes))
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize to model input size
-            image_resized = image.resize((224, 224))
-            img_array = np.array(image_resized, dtype=np.float32)
+            # Reuse the decode done for the prediction
+            img_array = self._load_image(image_bytes)
             
             # Generate mock heatmap (replace with actual Grad-CAM when models are loaded)
             # This creates a realistic-looking attention map
@@ -83,13 +79,8 @@ class ExplainabilityService:
             Dictionary with LIME explanation data
         """
         try:
-            # Open and process image
-            image = Image.open(io.BytesIO(image_bytes))
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            image_resized = image.resize((224, 224))
-            img_array = np.array(image_resized, dtype=np.float32)
+            # Reuse the decode done for the prediction
+            img_array = self._load_image(image_bytes)
             
             # Generate mock superpixel segmentation
             segments = self._generate_mock_segments(img_array)
@@ -117,6 +108,10 @@ class ExplainabilityService:
             logger.error(f"Error generating LIME explanation: {e}")
             raise RuntimeError(f"LIME generation failed: {e}")
     
+    def _load_image(self, image_bytes: bytes) -> np.ndarray:
+        """224x224 RGB float32 array from the shared preprocessing cache"""
+        return get_preprocess_cache().get(image_bytes, (224, 224)).rgb.astype(np.float32)
+    
     def _generate_mock_heatmap(self, img_array: np.ndarray) -> np.ndarray:
         """Generate a realistic image-aware mock heatmap"""
         h, w = img_array.shape[:2]
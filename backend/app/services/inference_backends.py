@@ -0,0 +1,483 @@
+"""
+Inference Backends
+Where MLService runs its ONNX sessions when they should not share the API
+process: a pool of dedicated worker processes, or a standalone local daemon
+(see app/inference_server.py).
+
+The API process still decodes, batches and formats results; only the stacked
+NCHW tensors cross the process boundary. Worker processes read them straight
+out of a shared memory segment, the daemon receives them over a Unix socket,
+and both answer with the small [N, C] probability matrix.
+"""
+
+import os
+import json
+import time
+import queue
+import socket
+import struct
+import logging
+import threading
+import multiprocessing
+from abc import ABC, abstractmethod
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# (ensembled probabilities [N, C], then model_version, ensemble_used and stages_run per row)
+InferenceOutput = Tuple[np.ndarray, List[str], List[bool], List[List[str]]]
+
+_LENGTH = struct.Struct("!I")
+_SHM_ALIGNMENT = 64
+
+
+# --- Unix socket framing: 4-byte header length, JSON header, raw array bytes ---
+
+def send_message(sock: socket.socket, header: Dict, arrays: Optional[Dict[str, np.ndarray]] = None):
+    """Send a JSON header followed by the raw bytes of each array"""
+    arrays = {name: np.ascontiguousarray(array) for name, array in (arrays or {}).items()}
+    header = dict(header, arrays=[
+        {"name": name, "dtype": array.dtype.str, "shape": list(array.shape)}
+        for name, array in arrays.items()
+    ])
+    encoded = json.dumps(header).encode()
+    sock.sendall(_LENGTH.pack(len(encoded)) + encoded)
+    for array in arrays.values():
+        sock.sendall(memoryview(array).cast("B"))
+
+
+def recv_message(sock: socket.socket) -> Tuple[Dict, Dict[str, np.ndarray]]:
+    """Receive one message sent with send_message"""
+    (length,) = _LENGTH.unpack(_recv_exact(sock, _LENGTH.size))
+    header = json.loads(bytes(_recv_exact(sock, length)))
+    arrays = {}
+    for spec in header.pop("arrays", []):
+        dtype = np.dtype(spec["dtype"])
+        nbytes = int(np.prod(spec["shape"])) * dtype.itemsize
+        arrays[spec["name"]] = np.frombuffer(_recv_exact(sock, nbytes), dtype=dtype).reshape(spec["shape"])
+    return header, arrays
+
+
+def _recv_exact(sock: socket.socket, size: int) -> bytearray:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("Inference connection closed")
+        received += count
+    return buffer
+
+
+class InferenceUnavailable(RuntimeError):
+    """The backend could not answer: timeout, no free worker, dead worker or lost daemon connection"""
+
+
+class InferenceBackend(ABC):
+    """Runs ensemble inference on stacked input tensors outside the API threads"""
+
+    members: List[str] = []  # Ensemble members loaded by the backend, known after start()
+
+    def start(self):
+        """Connect or spawn workers; raises if the backend cannot serve"""
+
+    @abstractmethod
+    def infer(self, inputs: Dict[str, np.ndarray]) -> Optional[InferenceOutput]:
+        """
+        Run the ensemble on a batch
+
+        Args:
+            inputs: NCHW float32 batch per input scaling ("symmetric" at minimum)
+
+        Returns:
+            InferenceOutput, or None when the backend has no models loaded
+
+        Raises:
+            InferenceUnavailable: the workers or daemon did not answer
+        """
+
+    def reload(self):
+        """Pick up changed model files"""
+
+    def shutdown(self):
+        """Release workers and connections"""
+
+
+# --- Process pool ---
+
+def _worker_settings(num_workers: int) -> Dict:
+    """Settings snapshot for a worker process (picks up runtime overrides too)"""
+    overrides = settings.model_dump()
+    overrides.update(
+        INFERENCE_BACKEND="local",
+        INFERENCE_BATCHING_ENABLED=False,  # the API process batches before sending
+        MODEL_WATCH_INTERVAL_SECONDS=0,  # reloads are driven by the API process
+        RESULT_CACHE_SIZE=0,
+        RESULT_CACHE_DIR=None
+    )
+    if not overrides["ORT_INTRA_OP_THREADS"]:
+        # Split the cores between workers instead of every worker claiming all of them
+        overrides["ORT_INTRA_OP_THREADS"] = max(1, (os.cpu_count() or 1) // num_workers)
+    return overrides
+
+
+def reload_if_changed(service) -> Dict:
+    """Reload a worker's models unless it already serves the files on disk"""
+    if service._disk_fingerprint() != service.bundle.fingerprint:
+        return service.reload_models()
+    return service.bundle.info()
+
+
+def _process_worker_main(conn, overrides: Dict):
+    """Entry point of an inference worker process"""
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    from app.services.ml_service import MLService
+
+    try:
+        service = MLService()
+        service.startup()
+    except Exception as e:
+        conn.send(("error", f"Worker failed to load models: {e}"))
+        return
+    conn.send(("ok", {"members": sorted(service.bundle.sessions), "pid": os.getpid()}))
+
+    segment = None
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        op = message[0]
+        if op == "stop":
+            break
+        try:
+            if op == "infer":
+                _, shm_name, layout = message
+                if segment is None or segment.name != shm_name:
+                    if segment is not None:
+                        segment.close()
+                    # Spawned workers share the API process's resource tracker, which
+                    # already tracks this segment; the API process unlinks it
+                    segment = shared_memory.SharedMemory(name=shm_name)
+                inputs = {
+                    name: np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf, offset=offset)
+                    for name, dtype, shape, offset in layout
+                }
+                output = service.infer_tensors(inputs)
+                del inputs
+                conn.send(("ok", output))
+            elif op == "reload":
+                conn.send(("ok", reload_if_changed(service)))
+            else:
+                conn.send(("error", f"Unknown operation: {op}"))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+    if segment is not None:
+        segment.close()
+    service.shutdown()
+
+
+class _PoolWorker:
+    """API-side handle of one worker process and its input segment"""
+
+    def __init__(self, ctx, overrides: Dict, shm_bytes: int, generation: int = 0):
+        self.generation = generation  # Last ProcessPoolBackend reload this worker went through
+        self.shm = shared_memory.SharedMemory(create=True, size=max(shm_bytes, _SHM_ALIGNMENT))
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(
+            target=_process_worker_main,
+            args=(child_conn, overrides),
+            name="inference-worker",
+            daemon=True
+        )
+        self.process.start()
+        child_conn.close()
+
+    def receive(self, timeout: float):
+        if not self.conn.poll(timeout):
+            raise TimeoutError(f"Inference worker {self.process.pid} did not answer within {timeout}s")
+        status, payload = self.conn.recv()
+        if status == "error":
+            raise RuntimeError(payload)
+        return payload
+
+    def infer(self, inputs: Dict[str, np.ndarray], timeout: float) -> Optional[InferenceOutput]:
+        layout = self._write_inputs(inputs)  # may replace self.shm
+        self.conn.send(("infer", self.shm.name, layout))
+        return self.receive(timeout)
+
+    def _write_inputs(self, inputs: Dict[str, np.ndarray]) -> List[Tuple]:
+        """Copy the batch into shared memory, growing the segment if needed"""
+        offsets, total = [], 0
+        for array in inputs.values():
+            offsets.append(total)
+            total += -(-array.nbytes // _SHM_ALIGNMENT) * _SHM_ALIGNMENT
+        if total > self.shm.size:
+            self.shm.close()
+            self.shm.unlink()
+            self.shm = shared_memory.SharedMemory(create=True, size=total)
+
+        layout = []
+        for (name, array), offset in zip(inputs.items(), offsets):
+            view = np.ndarray(array.shape, dtype=array.dtype, buffer=self.shm.buf, offset=offset)
+            np.copyto(view, array)
+            layout.append((name, array.dtype.str, array.shape, offset))
+        return layout
+
+    def close(self):
+        try:
+            self.conn.send(("stop",))
+        except (OSError, ValueError):
+            pass
+        self.process.join(timeout=10)
+        if self.process.is_alive():
+            self.process.terminate()
+        self.conn.close()
+        self.shm.close()
+        self.shm.unlink()
+
+
+class ProcessPoolBackend(InferenceBackend):
+    """
+    Dedicated inference worker processes fed through shared memory
+
+    Each worker loads its own sessions and owns one input segment; a request
+    borrows an idle worker, writes the batch into its segment and waits for
+    the probabilities on a pipe. API threads never hold the GIL for ORT work.
+    """
+
+    def __init__(self, num_workers: int, shm_bytes: int, timeout: float):
+        self.num_workers = max(1, num_workers)
+        self.shm_bytes = shm_bytes
+        self.timeout = timeout
+        self._ctx = multiprocessing.get_context("spawn")
+        self._workers: List[_PoolWorker] = []
+        self._idle: "queue.Queue[_PoolWorker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._reload_lock = threading.Lock()
+        self._generation = 0
+        self._closed = False
+
+    def start(self):
+        if self._workers:
+            return
+        self._closed = False
+        overrides = _worker_settings(self.num_workers)
+        workers = [_PoolWorker(self._ctx, overrides, self.shm_bytes) for _ in range(self.num_workers)]
+        try:
+            # Model loading and warmup happen in the worker before it answers
+            for worker in workers:
+                info = worker.receive(max(self.timeout, 300))
+                if not info["members"]:
+                    raise RuntimeError("Inference worker found no models to load")
+                self.members = info["members"]
+        except Exception:
+            for worker in workers:
+                worker.close()
+            raise
+        self._workers = workers
+        for worker in workers:
+            self._idle.put(worker)
+        logger.info(f"Started {len(workers)} inference worker processes")
+
+    def infer(self, inputs: Dict[str, np.ndarray]) -> Optional[InferenceOutput]:
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise InferenceUnavailable(f"No inference worker became free within {self.timeout}s")
+        try:
+            return worker.infer(inputs, self.timeout)
+        except (TimeoutError, EOFError, OSError) as e:
+            # A stuck or dead worker can't be trusted with the next request
+            self._replace(worker)
+            worker = None
+            raise InferenceUnavailable(f"Inference worker failed: {e}") from e
+        finally:
+            if worker is not None:
+                self._idle.put(worker)
+
+    def reload(self):
+        """
+        Reload every worker, one at a time so the others keep serving
+
+        Idle workers are checked out until each one has gone through this
+        reload; busy ones are picked up when their request hands them back.
+        Raises if any worker failed, so the caller keeps its current class
+        names.
+        """
+        with self._reload_lock:
+            self._generation += 1
+            generation = self._generation
+            failed: Dict[int, str] = {}
+            while True:
+                with self._lock:
+                    pending = [
+                        w for w in self._workers
+                        if w.generation < generation and id(w) not in failed
+                    ]
+                if not pending:
+                    break
+                try:
+                    worker = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise RuntimeError(f"{len(pending)} inference workers stayed busy through the reload")
+                if worker not in pending:
+                    # Already reloaded; give the busy ones a moment to come back
+                    self._idle.put(worker)
+                    time.sleep(0.01)
+                    continue
+                try:
+                    worker.conn.send(("reload",))
+                    worker.receive(max(self.timeout, 300))
+                    worker.generation = generation
+                except (TimeoutError, EOFError, OSError) as e:
+                    failed[id(worker)] = str(e)
+                    self._replace(worker)
+                    worker = None
+                except RuntimeError as e:
+                    # The worker keeps serving its current models
+                    failed[id(worker)] = str(e)
+                finally:
+                    if worker is not None:
+                        self._idle.put(worker)
+            if failed:
+                raise RuntimeError(
+                    f"{len(failed)} inference workers failed to reload: {next(iter(failed.values()))}"
+                )
+
+    def shutdown(self):
+        with self._lock:
+            workers, self._workers = self._workers, []
+            self._closed = True
+        for worker in workers:
+            worker.close()
+        self._idle = queue.Queue()
+
+    def _replace(self, worker: _PoolWorker):
+        """Drop a stuck or dead worker and start its replacement in the background"""
+        logger.error(f"Replacing unresponsive inference worker {worker.process.pid}")
+        with self._lock:
+            if worker in self._workers:
+                self._workers.remove(worker)
+            generation = self._generation
+        worker.process.terminate()
+        worker.close()
+        threading.Thread(
+            target=self._start_replacement,
+            args=(generation,),
+            name="inference-worker-respawn",
+            daemon=True
+        ).start()
+
+    def _start_replacement(self, generation: int):
+        # Loads the model files on disk now, i.e. those of the current generation
+        replacement = _PoolWorker(self._ctx, _worker_settings(self.num_workers), self.shm_bytes, generation)
+        try:
+            replacement.receive(max(self.timeout, 300))
+        except Exception as e:
+            logger.error(f"Replacement inference worker failed to start: {e}")
+            replacement.close()
+            return
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._workers.append(replacement)
+        if closed:
+            replacement.close()
+            return
+        self._idle.put(replacement)
+        logger.info(f"Replacement inference worker {replacement.process.pid} is serving")
+
+
+# --- Standalone daemon ---
+
+class UnixSocketBackend(InferenceBackend):
+    """Client of the standalone inference daemon (python -m app.inference_server)"""
+
+    def __init__(self, socket_path: str, pool_size: int, timeout: float):
+        self.socket_path = socket_path
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._pool: "queue.LifoQueue[socket.socket]" = queue.LifoQueue()
+
+    def start(self):
+        header, _ = self._request({"op": "ping"})
+        if not header.get("members"):
+            raise RuntimeError(f"Inference daemon at {self.socket_path} has no models loaded")
+        self.members = header["members"]
+        logger.info(f"Connected to inference daemon at {self.socket_path} ({', '.join(header['members'])})")
+
+    def infer(self, inputs: Dict[str, np.ndarray]) -> Optional[InferenceOutput]:
+        try:
+            header, arrays = self._request({"op": "infer"}, inputs)
+        except OSError as e:  # Timeouts and refused or dropped connections
+            raise InferenceUnavailable(f"Inference daemon at {self.socket_path} did not answer: {e}") from e
+        if "probs" not in arrays:
+            return None
+        return arrays["probs"], header["model_version"], header["ensemble_used"], header["stages_run"]
+
+    def reload(self):
+        self._request({"op": "reload"})
+
+    def shutdown(self):
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def _connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.socket_path)
+        return sock
+
+    def _request(self, header: Dict, arrays: Optional[Dict[str, np.ndarray]] = None):
+        # A pooled connection may have been closed by a daemon restart; retry once on a fresh one
+        for attempt in range(2):
+            try:
+                sock = self._pool.get_nowait()
+                pooled = True
+            except queue.Empty:
+                sock = self._connect()
+                pooled = False
+            try:
+                send_message(sock, header, arrays)
+                reply, reply_arrays = recv_message(sock)
+            except (ConnectionError, OSError):
+                sock.close()
+                if pooled and attempt == 0:
+                    continue
+                raise
+            if self._pool.qsize() < self.pool_size:
+                self._pool.put(sock)
+            else:
+                sock.close()
+            if not reply.get("ok"):
+                raise RuntimeError(reply.get("error", "Inference daemon error"))
+            return reply, reply_arrays
+
+
+def create_inference_backend(name: str) -> InferenceBackend:
+    """Build the backend selected by INFERENCE_BACKEND"""
+    if name == "process":
+        return ProcessPoolBackend(
+            num_workers=settings.INFERENCE_WORKERS,
+            shm_bytes=settings.INFERENCE_SHM_MB * 1024 * 1024,
+            timeout=settings.INFERENCE_TIMEOUT_SECONDS
+        )
+    if name == "socket":
+        return UnixSocketBackend(
+            socket_path=settings.INFERENCE_SOCKET_PATH,
+            pool_size=settings.INFERENCE_SOCKET_POOL_SIZE,
+            timeout=settings.INFERENCE_TIMEOUT_SECONDS
+        )
+    raise ValueError(f"Unknown inference backend: {name}")
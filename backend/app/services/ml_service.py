@@ -6,97 +6,143 @@ Supports MobileNetV2 and Vision Transformer ensemble.
 
 import os
 import json
+import shutil
+import tempfile
+import copy
 import numpy as np
-from typing import Dict, List, Tuple, Any
-from PIL import Image
-import io
+from typing import Dict, List, Tuple, Any, Optional
 import logging
 import concurrent.futures
+import asyncio
+import threading
+import time
 
 try:
     import onnxruntime as ort
     ONNX_AVAILABLE = True
+    GRAPH_OPT_LEVELS = {
+        "disable": ort.GraphOptimizationLevel.ORT_DISABLE_ALL,
+        "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+        "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+        "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+    }
 except ImportError:
     ONNX_AVAILABLE = False
 
 from app.config import settings
+from app.services.batch_scheduler import MicroBatchScheduler
+from app.services.inference_backends import InferenceBackend, InferenceUnavailable, create_inference_backend
+from app.services.postprocessing import softmax, summarize
+from app.services.preprocessing import PreprocessedImage, get_preprocess_cache, image_digest, stack_views
+from app.services.model_registry import EnsembleWeights, ModelBundle, ModelDirWatcher
+from app.services.model_embeddings import EMBEDDING_OUTPUT, expose_embedding_output
+from app.services.result_cache import ResultCache, model_fingerprint
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Input scaling each ensemble member was trained with (see preprocessing.normalize_into)
+MEMBER_INPUT_SCALING = {
+    "mobilenet": "symmetric",
+    "vit": "symmetric",  # ViT might expect different preprocessing, but assuming consistent pipeline here
+    "efficientnet": "raw",  # EfficientNetV2 internally handles rescaling, so it gets raw [0, 255]
+}
+
+
 class MLService:
     """Machine Learning inference service using ONNX Runtime"""
     
     def __init__(self):
         self.models_loaded = False
         self.use_mock = False
-        self.class_names = []
-        
-        # ONNX Sessions
-        self.mobilenet_session = None
-        self.vit_session = None
-        self.efficientnet_session = None
+        self.ready = False  # Models loaded and warmed up; reported by /ready
         
+        # ONNX sessions and class names currently served; replaced whole on reload
+        self.bundle = ModelBundle()
+        self._reload_lock = threading.Lock()
+        self.model_watcher = None
         
         # Thread pool for CPU-bound inference
-        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=4)
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=settings.INFERENCE_EXECUTOR_WORKERS
+        )
+        
+        # Micro-batching scheduler (created once real sessions are loaded)
+        self.batch_scheduler = None
+        
+        # Per-member pool for ENSEMBLE_EXECUTION_MODE="parallel"
+        self.member_executor = None
+        
+        # Out-of-process sessions when INFERENCE_BACKEND is not "local"
+        self.inference_backend: Optional[InferenceBackend] = None
+        
+        # Decoded uploads, shared with the explainability service
+        self.preprocess_cache = get_preprocess_cache()
+        
+        # Finished predictions keyed by image hash; re-keyed on every model load
+        self.result_cache = ResultCache(
+            max_entries=settings.RESULT_CACHE_SIZE,
+            ttl_seconds=settings.RESULT_CACHE_TTL_SECONDS,
+            disk_dir=settings.RESULT_CACHE_DIR
+        )
+        
+        # Default ensemble weights per member combination (ENSEMBLE_WEIGHTS_PATH overrides them per bundle)
+        self.ensemble_weights = {
+            "efficientnet_mobilenet": (0.7, 0.3),
+            "mobilenet_vit": (0.5, 0.5)
+        }
         
         # OOD Threshold - The "Intelligence" Filters
         self.CONFIDENCE_THRESHOLD = 0.65  # Below this is "Unknown Object"
         self.AMBIGUOUS_THRESHOLD = 0.80   # Below this triggers "Check with Gemini" flag
 
         
+    # Sessions and class names live on the current bundle
+    mobilenet_session = property(
+        lambda self: self.bundle.sessions.get("mobilenet"),
+        lambda self, session: self._set_session("mobilenet", session)
+    )
+    vit_session = property(
+        lambda self: self.bundle.sessions.get("vit"),
+        lambda self, session: self._set_session("vit", session)
+    )
+    efficientnet_session = property(
+        lambda self: self.bundle.sessions.get("efficientnet"),
+        lambda self, session: self._set_session("efficientnet", session)
+    )
+
+    @property
+    def class_names(self) -> List[str]:
+        return self.bundle.class_names
+
+    @class_names.setter
+    def class_names(self, class_names: List[str]):
+        self.bundle.class_names = list(class_names)
+
+    def _set_session(self, name: str, session):
+        if session is None:
+            self.bundle.sessions.pop(name, None)
+        else:
+            self.bundle.sessions[name] = session
+
     def load_models(self):
         """Load ML models and class names"""
         try:
-            # 1. Load class names
-            if os.path.exists(settings.CLASS_NAMES_PATH):
-                with open(settings.CLASS_NAMES_PATH, 'r') as f:
-                    self.class_names = json.load(f)
-                logger.info(f"Loaded {len(self.class_names)} class names")
-            else:
-                logger.warning("Class names file not found. Using default mock classes.")
-                self.class_names = [
-                    "Ocimum_tenuiflorum", "Azadirachta_indica", "Aloe_vera",
-                    "Mentha", "Tinospora_cordifolia"
-                ]
-
-            # 2. Check dependencies
-            if not ONNX_AVAILABLE:
-                logger.warning("ONNX Runtime not installed. Falling back to DEMO mode.")
-                self.use_mock = True
-                self.models_loaded = True
-                return
-
-            # 3. Load ONNX models
-            model_files_exist = (
-                os.path.exists(settings.MOBILENET_MODEL_PATH) or 
-                os.path.exists(settings.VIT_MODEL_PATH)
-            )
+            bundle = self._build_bundle(load_sessions=not self._remote_inference())
+            self._swap_bundle(bundle)
+            self._start_model_watcher()
             
-            if not model_files_exist:
-                logger.warning(f"Model files not found in {settings.MODEL_DIR}. Falling back to DEMO mode.")
+            if self._remote_inference():
+                self._start_inference_backend()
+            elif not bundle.sessions:
                 self.use_mock = True
                 self.models_loaded = True
                 return
-
-            # Initialize sessions
-            providers = ['CPUExecutionProvider'] # Add 'CUDAExecutionProvider' if GPU available
-            
-            if os.path.exists(settings.MOBILENET_MODEL_PATH):
-                self.mobilenet_session = ort.InferenceSession(settings.MOBILENET_MODEL_PATH, providers=providers)
-                logger.info(f"Loaded MobileNetV2 from {settings.MOBILENET_MODEL_PATH}")
-
-            if os.path.exists(settings.VIT_MODEL_PATH):
-                self.vit_session = ort.InferenceSession(settings.VIT_MODEL_PATH, providers=providers)
-                logger.info(f"Loaded ViT from {settings.VIT_MODEL_PATH}")
-            
-            if os.path.exists(settings.ENHANCED_MODEL_PATH):
-                self.efficientnet_session = ort.InferenceSession(settings.ENHANCED_MODEL_PATH, providers=providers)
-                logger.info(f"Loaded EfficientNetV2 from {settings.ENHANCED_MODEL_PATH}")
             
             self.use_mock = False
             self.models_loaded = True
+            self._start_member_executor()
+            self._start_batch_scheduler()
             logger.info("ML Sercice initialized (Production Mode)")
             
         except Exception as e:
@@ -108,37 +154,464 @@ class MLService:
             logger.warning("Falling back to DEMO mode due to load error.")
             self.use_mock = True
             self.models_loaded = True
+
+    def reload_models(self) -> Dict:
+        """
+        Hot-swap to the model files currently on disk
+        
+        The new bundle is loaded and warmed next to the live one, then swapped
+        in with a single reference assignment. Requests already running finish
+        on the sessions they started with; the old sessions are freed once the
+        last of them completes. If loading fails the current models keep
+        serving and the error is raised to the caller.
+        
+        Returns:
+            Description of the bundle now being served
+        """
+        with self._reload_lock:
+            if self._remote_inference():
+                # Workers swap their own sessions; this process only needs the new class names
+                bundle = self._build_bundle(load_sessions=False)
+                self._start_inference_backend()
+                self.inference_backend.reload()
+            else:
+                bundle = self._build_bundle()
+                if not bundle.sessions:
+                    raise RuntimeError(f"No loadable model files in {settings.MODEL_DIR}; keeping current models")
+                self.warmup(bundle=bundle)
+            
+            previous = self._swap_bundle(bundle)
+            self.use_mock = False
+            self.models_loaded = True
+            self._start_member_executor()
+            self._start_batch_scheduler()
+            logger.info(f"Hot reload complete: model version {previous.version} -> {bundle.version}")
+            return bundle.info()
+
+    def _model_files(self) -> Dict[str, str]:
+        """Resolved path of each member's model file"""
+        return {
+            "mobilenet": self._resolve_model_path(settings.MOBILENET_MODEL_PATH),
+            "vit": self._resolve_model_path(settings.VIT_MODEL_PATH),
+            "efficientnet": self._resolve_model_path(settings.ENHANCED_MODEL_PATH)
+        }
+
+    def _disk_fingerprint(self) -> str:
+        """Fingerprint of the model files and inference parameters as they are on disk now"""
+        return model_fingerprint(
+            [*self._model_files().values(), settings.CLASS_NAMES_PATH, settings.ENSEMBLE_WEIGHTS_PATH],
+            ensemble_weights=self.ensemble_weights,
+            thresholds=[self.CONFIDENCE_THRESHOLD, self.AMBIGUOUS_THRESHOLD],
+            cascade=(
+                [settings.CASCADE_CONFIDENCE_THRESHOLD, settings.CASCADE_MARGIN_THRESHOLD]
+                if settings.ENSEMBLE_EXECUTION_MODE == "cascade" else None
+            )
+        )
+
+    def _build_bundle(self, load_sessions: bool = True) -> ModelBundle:
+        """
+        Load class names and every available ONNX model into a new bundle
+        
+        The bundle has no sessions when ONNX Runtime or the model files are
+        missing (DEMO mode), or when `load_sessions` is False because an
+        inference backend runs them. Nothing on the service is modified.
+        """
+        # Computed before reading the files, so a change mid-load is picked up next time
+        fingerprint = self._disk_fingerprint()
+        
+        # 1. Load class names
+        if os.path.exists(settings.CLASS_NAMES_PATH):
+            with open(settings.CLASS_NAMES_PATH, 'r') as f:
+                class_names = json.load(f)
+            logger.info(f"Loaded {len(class_names)} class names")
+        else:
+            logger.warning("Class names file not found. Using default mock classes.")
+            class_names = [
+                "Ocimum_tenuiflorum", "Azadirachta_indica", "Aloe_vera",
+                "Mentha", "Tinospora_cordifolia"
+            ]
+        # Fitted weights and temperatures; a malformed file fails the load like a broken model would
+        ensemble = EnsembleWeights.load(settings.ENSEMBLE_WEIGHTS_PATH, self.ensemble_weights, len(class_names))
+        bundle = ModelBundle(
+            class_names=class_names,
+            fingerprint=fingerprint,
+            version=self.bundle.version + 1,
+            ensemble=ensemble
+        )
+        if not load_sessions:
+            return bundle
+
+        # 2. Check dependencies
+        if not ONNX_AVAILABLE:
+            logger.warning("ONNX Runtime not installed. Falling back to DEMO mode.")
+            return bundle
+
+        # 3. Load ONNX models
+        paths = self._model_files()
+        model_files_exist = (
+            os.path.exists(paths["mobilenet"]) or 
+            os.path.exists(paths["vit"])
+        )
+        
+        if not model_files_exist:
+            logger.warning(f"Model files not found in {settings.MODEL_DIR}. Falling back to DEMO mode.")
+            return bundle
+
+        # Initialize sessions
+        available = {name: path for name, path in paths.items() if os.path.exists(path)}
+        labels = {"mobilenet": "MobileNetV2", "vit": "ViT", "efficientnet": "EfficientNetV2"}
+        for name, path in available.items():
+            embeddings = self._wants_embeddings(name)
+            if embeddings:
+                path = self._embedding_model_path(path)
+            bundle.sessions[name] = self._create_session(name, path, len(available))
+            bundle.paths[name] = path
+            if embeddings:
+                outputs = [output.name for output in bundle.sessions[name].get_outputs()]
+                if EMBEDDING_OUTPUT in outputs:
+                    bundle.embedding_outputs[name] = (outputs[0], EMBEDDING_OUTPUT)
+            logger.info(f"Loaded {labels[name]} from {path}")
+        
+        return bundle
+
+    def _swap_bundle(self, bundle: ModelBundle) -> ModelBundle:
+        """Atomically serve `bundle`; returns the one it replaced"""
+        previous, self.bundle = self.bundle, bundle
+        self.result_cache.set_fingerprint(bundle.fingerprint)
+        return previous
+
+    def _start_model_watcher(self):
+        """Watch MODEL_DIR for new model files if MODEL_WATCH_INTERVAL_SECONDS is set"""
+        if settings.MODEL_WATCH_INTERVAL_SECONDS <= 0 or self.model_watcher is not None:
+            return
+        self.model_watcher = ModelDirWatcher(
+            disk_fingerprint=self._disk_fingerprint,
+            served_fingerprint=lambda: self.bundle.fingerprint,
+            on_change=self.reload_models,
+            interval_seconds=settings.MODEL_WATCH_INTERVAL_SECONDS
+        )
+        self.model_watcher.start()
+    
+    def _remote_inference(self) -> bool:
+        return settings.INFERENCE_BACKEND != "local"
+
+    def _start_inference_backend(self):
+        """Spawn or connect to the out-of-process inference backend"""
+        if self.inference_backend is not None:
+            return
+        backend = create_inference_backend(settings.INFERENCE_BACKEND)
+        backend.start()
+        self.inference_backend = backend
+        logger.info(f"Inference runs out of process (INFERENCE_BACKEND={settings.INFERENCE_BACKEND})")
+
+    def _parallel_members(self) -> bool:
+        """Whether ensemble members run concurrently"""
+        return settings.ENSEMBLE_EXECUTION_MODE == "parallel"
+
+    def _resolve_model_path(self, model_path: str) -> str:
+        """
+        Pick the INT8 variant (<name>_int8.onnx) of a model when
+        USE_QUANTIZED_MODELS is on and ml_pipeline/quantize_onnx.py promoted one
+        """
+        if not settings.USE_QUANTIZED_MODELS:
+            return model_path
+        stem, ext = os.path.splitext(model_path)
+        quantized_path = f"{stem}_int8{ext}"
+        if os.path.exists(quantized_path):
+            return quantized_path
+        if os.path.exists(model_path):
+            logger.warning(f"No INT8 variant for {os.path.basename(model_path)}, using FP32")
+        return model_path
+
+    def _model_setting(self, model_key: str, name: str):
+        """Per-model override (e.g. MOBILENET_INTRA_OP_THREADS) falling back to ORT_<name>"""
+        value = getattr(settings, f"{model_key.upper()}_{name}", None)
+        return value if value is not None else getattr(settings, f"ORT_{name}")
+
+    @staticmethod
+    def _wants_embeddings(model_key: str) -> bool:
+        """Whether this member's penultimate features are served (VISUAL_INDEX_DIR set)"""
+        return bool(settings.VISUAL_INDEX_DIR) and model_key == settings.VISUAL_EMBEDDING_MODEL
+
+    def _embedding_model_path(self, model_path: str) -> str:
+        """
+        Variant of a model that also outputs its penultimate features
+        
+        Written once to an "embedding" directory next to the model and
+        rewritten when the model is newer. Falls back to the plain model
+        (no embeddings) when the graph can't be rewritten.
+        """
+        stem = os.path.splitext(os.path.basename(model_path))[0]
+        embedding_path = os.path.join(os.path.dirname(model_path), "embedding", f"{stem}.embedding.onnx")
+        if self._is_fresh(embedding_path, model_path):
+            return embedding_path
+        try:
+            expose_embedding_output(model_path, embedding_path)
+            logger.info(f"Wrote embedding-output graph {embedding_path}")
+            return embedding_path
+        except Exception as e:
+            logger.error(f"Cannot expose embeddings of {os.path.basename(model_path)} ({e}); visual search disabled")
+            return model_path
+
+    def visual_search_status(self) -> str:
+        """
+        "on", "off" (VISUAL_INDEX_DIR unset) or "unavailable": configured, but
+        the served models give no embeddings (DEMO mode, an out-of-process
+        INFERENCE_BACKEND, or a graph that could not be rewritten)
+        """
+        if not settings.VISUAL_INDEX_DIR:
+            return "off"
+        if self.use_mock or self.inference_backend is not None or not self.bundle.embedding_outputs:
+            return "unavailable"
+        return "on"
+
+    def _session_options(self, model_key: str, num_sessions: int):
+        """
+        Build ONNX Runtime SessionOptions for one ensemble member from Settings
+        
+        Thread counts of 0 keep the ORT default, except in parallel ensemble
+        mode where each session gets an equal share of the cores so members
+        running side by side don't oversubscribe.
+        """
+        sess_options = ort.SessionOptions()
+        sess_options.graph_optimization_level = GRAPH_OPT_LEVELS[self._model_setting(model_key, "GRAPH_OPT_LEVEL")]
+        sess_options.execution_mode = (
+            ort.ExecutionMode.ORT_PARALLEL
+            if settings.ORT_EXECUTION_MODE == "parallel"
+            else ort.ExecutionMode.ORT_SEQUENTIAL
+        )
+        sess_options.enable_cpu_mem_arena = settings.ORT_ENABLE_CPU_MEM_ARENA
+        sess_options.enable_mem_pattern = settings.ORT_ENABLE_MEM_PATTERN
+        if settings.ORT_MMAP_WEIGHTS:
+            # Prepacking copies weights into private buffers, defeating the shared mapping
+            sess_options.add_session_config_entry("session.disable_prepacking", "1")
+        
+        intra_op_threads = self._model_setting(model_key, "INTRA_OP_THREADS")
+        if not intra_op_threads and self._parallel_members() and num_sessions > 1:
+            intra_op_threads = max(1, (os.cpu_count() or 1) // num_sessions)
+        if intra_op_threads:
+            sess_options.intra_op_num_threads = intra_op_threads
+        
+        inter_op_threads = self._model_setting(model_key, "INTER_OP_THREADS")
+        if inter_op_threads:
+            sess_options.inter_op_num_threads = inter_op_threads
+        
+        return sess_options
+
+    def _optimized_model_path(self, model_key: str, model_path: str) -> Optional[str]:
+        """
+        Where the optimized graph for a model is cached, if caching is enabled
+        
+        ORT_MMAP_WEIGHTS always caches (next to the model unless
+        ORT_OPTIMIZED_MODEL_DIR is set) and uses a separate file name, since
+        its graphs keep their weights in an external .data file.
+        """
+        cache_dir = settings.ORT_OPTIMIZED_MODEL_DIR
+        if not cache_dir and settings.ORT_MMAP_WEIGHTS:
+            cache_dir = os.path.join(os.path.dirname(model_path), "optimized")
+        if not cache_dir:
+            return None
+        opt_level = self._model_setting(model_key, "GRAPH_OPT_LEVEL")
+        stem = os.path.splitext(os.path.basename(model_path))[0]
+        suffix = "external.onnx" if settings.ORT_MMAP_WEIGHTS else "onnx"
+        return os.path.join(cache_dir, f"{stem}.{opt_level}.optimized.{suffix}")
+
+    def _write_external_model(self, model_key: str, model_path: str, optimized_path: str):
+        """
+        Save the optimized graph with its initializers in `<optimized_path>.data`
+        
+        ORT writes large initializers at page-aligned offsets, which is what
+        lets later sessions mmap them instead of copying. Files are produced
+        in a private temp dir and renamed into place, so workers racing on a
+        cold cache never see partial files.
+        """
+        cache_dir = os.path.dirname(optimized_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        name = os.path.basename(optimized_path)
+        data_name = f"{name}.data"
+        
+        tmp_dir = tempfile.mkdtemp(prefix=".tmp-", dir=cache_dir)
+        try:
+            sess_options = self._session_options(model_key, 1)
+            sess_options.optimized_model_filepath = os.path.join(tmp_dir, name)
+            sess_options.add_session_config_entry(
+                "session.optimized_model_external_initializers_file_name", data_name
+            )
+            sess_options.add_session_config_entry(
+                "session.optimized_model_external_initializers_min_size_in_bytes", "1024"
+            )
+            # Created only for its side effect of writing the files
+            ort.InferenceSession(model_path, sess_options=sess_options, providers=['CPUExecutionProvider'])
+            # Graphs whose initializers are all tiny stay inline and have no .data file
+            if os.path.exists(os.path.join(tmp_dir, data_name)):
+                os.replace(os.path.join(tmp_dir, data_name), os.path.join(cache_dir, data_name))
+            os.replace(os.path.join(tmp_dir, name), optimized_path)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        logger.info(f"Wrote mmap-able graph {optimized_path}")
+
+    def prepare_model_files(self) -> List[str]:
+        """
+        Produce the external-data graphs for ORT_MMAP_WEIGHTS and pull them
+        into the page cache
+        
+        Meant to run once before worker processes start (see gunicorn.conf.py),
+        so every worker maps the same files instead of each converting its own.
+        
+        Returns:
+            Paths of the prepared graphs
+        """
+        prepared = []
+        if not settings.ORT_MMAP_WEIGHTS or not ONNX_AVAILABLE:
+            return prepared
+        for model_key, model_path in self._model_files().items():
+            if not os.path.exists(model_path):
+                continue
+            if self._wants_embeddings(model_key):
+                model_path = self._embedding_model_path(model_path)
+            optimized_path = self._optimized_model_path(model_key, model_path)
+            if not self._is_fresh(optimized_path, model_path):
+                self._write_external_model(model_key, model_path, optimized_path)
+            data_path = f"{optimized_path}.data"
+            if os.path.exists(data_path):
+                with open(data_path, "rb") as f:
+                    while f.read(1 << 24):
+                        pass
+            prepared.append(optimized_path)
+        return prepared
+
+    @staticmethod
+    def _is_fresh(optimized_path: str, model_path: str) -> bool:
+        """Whether a cached graph exists and is at least as new as its source model"""
+        return os.path.exists(optimized_path) and os.path.getmtime(optimized_path) >= os.path.getmtime(model_path)
+
+    def _create_session(self, model_key: str, model_path: str, num_sessions: int):
+        """
+        Create an InferenceSession for one ensemble member
+        
+        With ORT_OPTIMIZED_MODEL_DIR set, the first start saves the optimized
+        graph there and later starts load it directly with optimizations
+        disabled, skipping the optimization pass. A cached graph older than
+        its source model is ignored and rewritten.
+        
+        With ORT_MMAP_WEIGHTS the cached graph is always loaded, written first
+        if needed, so its weights are mapped from the shared .data file.
+        """
+        providers = ['CPUExecutionProvider'] # Add 'CUDAExecutionProvider' if GPU available
+        sess_options = self._session_options(model_key, num_sessions)
+        
+        optimized_path = self._optimized_model_path(model_key, model_path)
+        if optimized_path:
+            if settings.ORT_MMAP_WEIGHTS and not self._is_fresh(optimized_path, model_path):
+                self._write_external_model(model_key, model_path, optimized_path)
+            if self._is_fresh(optimized_path, model_path):
+                sess_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+                logger.info(f"Using pre-optimized graph {optimized_path}")
+                return ort.InferenceSession(optimized_path, sess_options=sess_options, providers=providers)
+            os.makedirs(os.path.dirname(optimized_path), exist_ok=True)
+            sess_options.optimized_model_filepath = optimized_path
+        
+        return ort.InferenceSession(model_path, sess_options=sess_options, providers=providers)
+
+    def _start_member_executor(self):
+        """Create the pool that runs ensemble members side by side"""
+        if self._parallel_members() and self.member_executor is None:
+            self.member_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=3,
+                thread_name_prefix="ensemble-member"
+            )
+
+    def _start_batch_scheduler(self):
+        """Start the micro-batching scheduler if enabled"""
+        if not settings.INFERENCE_BATCHING_ENABLED or self.batch_scheduler is not None:
+            return
+        self.batch_scheduler = MicroBatchScheduler(
+            self._run_batch,
+            max_batch_size=settings.INFERENCE_MAX_BATCH_SIZE,
+            max_wait_ms=settings.INFERENCE_MAX_WAIT_MS,
+            num_workers=settings.INFERENCE_BATCH_WORKERS
+        )
+        self.batch_scheduler.start()
+
+    def warmup(
+        self,
+        batch_sizes: Optional[List[int]] = None,
+        bundle: Optional[ModelBundle] = None
+    ) -> Dict[int, float]:
+        """
+        Run every loaded session over synthetic batches
+        
+        ORT allocates its arenas and picks kernels on the first run for each
+        input shape, so doing this before taking traffic keeps those costs
+        off real requests.
+        
+        Args:
+            bundle: Bundle to warm (default: the one being served)
+        
+        Returns:
+            Warmup time in ms per batch size
+        """
+        timings = {}
+        bundle = bundle or self.bundle
+        if not bundle.sessions:
+            return timings
+        
+        for batch_size in batch_sizes or settings.ML_WARMUP_BATCH_SIZES:
+            batch = np.zeros((batch_size, 3, 224, 224), dtype=np.float32)
+            start = time.perf_counter()
+            try:
+                self._infer_batch(batch, bundle)
+            except Exception as e:
+                # Models exported with a fixed batch dimension only run at size 1
+                logger.warning(f"Warmup at batch size {batch_size} failed: {e}")
+                continue
+            timings[batch_size] = round((time.perf_counter() - start) * 1000, 2)
+        
+        logger.info(f"ML warmup finished (ms per batch size: {timings})")
+        return timings
+
+    def startup(self):
+        """Eagerly load and warm the models, then mark the service ready"""
+        if not self.models_loaded:
+            self.load_models()
+        if not self.ready:
+            self.warmup()
+            self.ready = True
+
+    def shutdown(self):
+        """Stop background inference workers"""
+        if self.model_watcher is not None:
+            self.model_watcher.stop()
+            self.model_watcher = None
+        if self.batch_scheduler is not None:
+            self.batch_scheduler.shutdown()
+            self.batch_scheduler = None
+        if self.member_executor is not None:
+            self.member_executor.shutdown(wait=True)
+            self.member_executor = None
+        if self.inference_backend is not None:
+            self.inference_backend.shutdown()
+            self.inference_backend = None
     
     def preprocess_image(self, image_bytes: bytes, target_size: Tuple[int, int] = (224, 224)) -> np.ndarray:
         """
         Preprocess image for model inference
+        
+        Returns a [1, 3, H, W] float32 tensor scaled to [-1, 1] (standard
+        MobileNet/ViT preprocessing: x / 127.5 - 1.0).
         """
+        return self.load_image(image_bytes, target_size).view("symmetric")
+
+    def load_image(
+        self,
+        image_bytes: bytes,
+        target_size: Tuple[int, int] = (224, 224),
+        store: bool = True,
+        digest: Optional[str] = None
+    ) -> PreprocessedImage:
+        """Decode an upload through the shared preprocessing cache"""
         try:
-            # Open image
-            image = Image.open(io.BytesIO(image_bytes))
-            
-            # Convert to RGB
-            if image.mode != 'RGB':
-                image = image.convert('RGB')
-            
-            # Resize
-            image = image.resize(target_size)
-            
-            # Convert to numpy array
-            img_array = np.array(image, dtype=np.float32)
-            
-            # Normalize (0-1 range to -1 to 1 range usually for MobileNet, or specific mean/std)
-            # Assuming standard MobileNet/ViT preprocessing: (x / 127.5) - 1.0
-            img_array = (img_array / 127.5) - 1.0
-            
-            # HWC to CHW format (required by PyTorch/ONNX converted models)
-            img_array = np.transpose(img_array, (2, 0, 1))
-            
-            # Add batch dimension
-            img_array = np.expand_dims(img_array, axis=0)
-            
-            return img_array
-            
+            return self.preprocess_cache.get(image_bytes, target_size, digest=digest, store=store)
         except Exception as e:
             raise ValueError(f"Error preprocessing image: {e}")
     
@@ -163,123 +636,384 @@ class MLService:
             "confidence": confidence,
             "top_predictions": top_predictions,
             "model_version": "demo-v1.0",
-            "ensemble_used": False
+            "ensemble_used": False,
+            "stages_run": []
         }
 
-    def _run_inference(self, image_bytes: bytes) -> Dict:
-        """Run actual inference (executed in thread pool)"""
-        if self.use_mock:
-            if settings.STRICT_ML_MODE:
-                raise RuntimeError("ML Service is in DEMO mode but STRICT_ML_MODE is enabled. Rejecting prediction.")
-            return self._predict_mock()
+    def _run_session(
+        self,
+        session,
+        input_data: np.ndarray,
+        temperature: float = 1.0,
+        outputs: Optional[Tuple[str, str]] = None
+    ):
+        """
+        Run one ensemble member and return its (temperature-scaled) class probabilities
+        
+        With `outputs` (logits name, embedding name) both are fetched from
+        the same run and (probabilities, [N, D] embeddings) is returned.
+        """
+        input_name = session.get_inputs()[0].name
+        if outputs is not None:
+            logits, embeddings = session.run(list(outputs), {input_name: input_data})
+            return softmax(logits, temperature), embeddings.reshape(len(embeddings), -1)
+        logits = session.run(None, {input_name: input_data})[0]
+        return softmax(logits, temperature)
 
-        try:
-            input_data = self.preprocess_image(image_bytes)
-            
-            mobilenet_probs = None
-            vit_probs = None
-            
-            # Run MobileNetV2
-            if self.mobilenet_session:
-                input_name = self.mobilenet_session.get_inputs()[0].name
-                mobilenet_output = self.mobilenet_session.run(None, {input_name: input_data})
-                mobilenet_logits = mobilenet_output[0]
-                # Softmax
-                mobilenet_probs = np.exp(mobilenet_logits) / np.sum(np.exp(mobilenet_logits), axis=1, keepdims=True)
-            
-            # Run ViT
-            if self.vit_session:
-                input_name = self.vit_session.get_inputs()[0].name
-                # ViT might expect different preprocessing, but assuming consistent pipeline here
-                vit_output = self.vit_session.run(None, {input_name: input_data})
-                vit_logits = vit_output[0]
-                vit_probs = np.exp(vit_logits) / np.sum(np.exp(vit_logits), axis=1, keepdims=True)
-            
-            # Run EfficientNetV2 (Primary for Enhanced Intelligence)
-            efficientnet_probs = None
-            if self.efficientnet_session:
-                input_name = self.efficientnet_session.get_inputs()[0].name
-                # EfficientNetV2 internally handles rescaling, so we pass raw uint8-like float [0, 255]
-                # Re-preprocess for EfficientNetV2 if needed or assuming internal scaling
-                eff_input = (input_data + 1.0) * 127.5 # Back to [0, 255]
-                eff_output = self.efficientnet_session.run(None, {input_name: eff_input})
-                eff_logits = eff_output[0]
-                efficientnet_probs = np.exp(eff_logits) / np.sum(np.exp(eff_logits), axis=1, keepdims=True)
-
-            # Ensemble Logic (Weighted towards EfficientNetV2)
-            if efficientnet_probs is not None:
-                if mobilenet_probs is not None:
-                    final_probs = (efficientnet_probs * 0.7) + (mobilenet_probs * 0.3)
-                    ensemble_used = True
-                    model_version = "efficientnet-mobilenet-ensemble"
-                else:
-                    final_probs = efficientnet_probs
-                    ensemble_used = False
-                    model_version = "efficientnet-v2-s"
-            elif mobilenet_probs is not None and vit_probs is not None:
-                final_probs = (mobilenet_probs + vit_probs) / 2.0
+    def _loaded_members(self, bundle: ModelBundle) -> List[Tuple[str, Any]]:
+        """(name, session) for every loaded ensemble member"""
+        return [
+            (name, bundle.sessions[name])
+            for name in ("mobilenet", "vit", "efficientnet")
+            if bundle.sessions.get(name)
+        ]
+
+    def _required_scalings(self, bundle: ModelBundle) -> List[str]:
+        """Input scalings needed by the loaded members"""
+        return sorted({MEMBER_INPUT_SCALING[name] for name, _ in self._loaded_members(bundle)})
+
+    def _run_members(
+        self,
+        inputs: Dict[str, np.ndarray],
+        bundle: ModelBundle,
+        names: Optional[List[str]] = None,
+        embeddings: Optional[Dict[str, np.ndarray]] = None
+    ) -> Dict[str, np.ndarray]:
+        """
+        Run the loaded ensemble members over the batch
+        
+        Args:
+            inputs: NCHW batch per input scaling ("symmetric", "raw"). A
+                missing "raw" batch is derived from the "symmetric" one.
+            names: Members to run (default: every loaded member)
+            embeddings: When given, filled with the penultimate features of
+                members that expose them (bundle.embedding_outputs)
+        
+        Members run one after another by default; with
+        ENSEMBLE_EXECUTION_MODE="parallel" they are dispatched together and
+        latency tracks the slowest member instead of the sum.
+        """
+        temperatures = bundle.ensemble.temperatures if bundle.ensemble is not None else {}
+        members = []
+        for name, session in self._loaded_members(bundle):
+            if names is not None and name not in names:
+                continue
+            scaling = MEMBER_INPUT_SCALING[name]
+            if scaling not in inputs and scaling == "raw":
+                inputs[scaling] = (inputs["symmetric"] + 1.0) * 127.5
+            outputs = bundle.embedding_outputs.get(name) if embeddings is not None else None
+            members.append((name, session, inputs[scaling], temperatures.get(name, 1.0), outputs))
+        
+        if self.member_executor is not None and len(members) > 1:
+            futures = {
+                name: self.member_executor.submit(self._run_session, session, data, temperature, outputs)
+                for name, session, data, temperature, outputs in members
+            }
+            results = {name: future.result() for name, future in futures.items()}
+        else:
+            results = {
+                name: self._run_session(session, data, temperature, outputs)
+                for name, session, data, temperature, outputs in members
+            }
+        
+        for name, *_, outputs in members:
+            if outputs is not None:
+                results[name], embeddings[name] = results[name]
+        return results
+
+    def _ensemble(
+        self,
+        probs: Dict[str, np.ndarray],
+        bundle: ModelBundle
+    ) -> Optional[Tuple[np.ndarray, str, bool]]:
+        """Combine member probabilities into (final_probs, model_version, ensemble_used)"""
+        ensemble = bundle.ensemble if bundle.ensemble is not None else EnsembleWeights(self.ensemble_weights)
+        mobilenet_probs = probs.get("mobilenet")
+        vit_probs = probs.get("vit")
+        efficientnet_probs = probs.get("efficientnet")
+
+        # Ensemble Logic (Weighted towards EfficientNetV2)
+        if efficientnet_probs is not None:
+            if mobilenet_probs is not None:
+                final_probs = ensemble.combine("efficientnet_mobilenet", efficientnet_probs, mobilenet_probs)
                 ensemble_used = True
-                model_version = "ensemble-v1.0"
-            elif mobilenet_probs is not None:
-                final_probs = mobilenet_probs
-                ensemble_used = False
-                model_version = "mobilenet-v2"
-            elif vit_probs is not None:
-                final_probs = vit_probs
-                ensemble_used = False
-                model_version = "vit-b16"
+                model_version = "efficientnet-mobilenet-ensemble"
             else:
-                return self._predict_mock()
+                final_probs = efficientnet_probs
+                ensemble_used = False
+                model_version = "efficientnet-v2-s"
+        elif mobilenet_probs is not None and vit_probs is not None:
+            final_probs = ensemble.combine("mobilenet_vit", mobilenet_probs, vit_probs)
+            ensemble_used = True
+            model_version = "ensemble-v1.0"
+        elif mobilenet_probs is not None:
+            final_probs = mobilenet_probs
+            ensemble_used = False
+            model_version = "mobilenet-v2"
+        elif vit_probs is not None:
+            final_probs = vit_probs
+            ensemble_used = False
+            model_version = "vit-b16"
+        else:
+            return None
 
-            # Get results
-            pred_idx = np.argmax(final_probs[0])
-            confidence = float(final_probs[0][pred_idx])
-            
-            # --- SUPERIOR REJECTION LOGIC (OOD) ---
-            # If not confident enough, admit ignorance rather than guessing wrong.
-            if confidence < self.CONFIDENCE_THRESHOLD:
-                logger.warning(f"OOD Detected: Low confidence ({confidence:.2f}) < Threshold ({self.CONFIDENCE_THRESHOLD})")
-                return {
-                    "predicted_class": "Unknown Object",
-                    "predicted_class_index": -1,
-                    "confidence": confidence,
-                    "top_predictions": [],
-                    "model_version": model_version,
-                    "ensemble_used": ensemble_used,
-                    "is_ambiguous": True,
-                    "message": "Object not recognized as a known medicinal plant."
-                }
-            
-            # Top 5
-            top_k_indices = np.argsort(final_probs[0])[::-1][:5]
-            top_predictions = []
-            for idx in top_k_indices:
-                if idx < len(self.class_names):
-                    top_predictions.append({
-                        "class_name": self.class_names[idx],
-                        "confidence": float(final_probs[0][idx])
-                    })
-            
-            predicted_class = self.class_names[pred_idx] if pred_idx < len(self.class_names) else f"Class_{pred_idx}"
+        return final_probs, model_version, ensemble_used
+
+    def _infer_batch(
+        self,
+        input_data,
+        bundle: Optional[ModelBundle] = None,
+        embeddings: Optional[Dict[str, np.ndarray]] = None
+    ) -> Optional[Tuple[np.ndarray, List[str], List[bool], ModelBundle, List[List[str]]]]:
+        """
+        Run the ensemble once over an NCHW batch
+        
+        Args:
+            input_data: [-1, 1] scaled NCHW batch, or a dict of batches per
+                input scaling as built by preprocessing.stack_views
+            bundle: Models to run (default: the one being served)
+            embeddings: When given, filled with [N, D] penultimate features
+                per embedding member, taken from the same session runs
+        
+        Returns:
+            (ensembled probabilities [N, C], model_version per row,
+            ensemble_used per row, bundle that produced them, members run
+            per row), or None when no session is loaded
+        """
+        bundle = bundle or self.bundle
+        inputs = dict(input_data) if isinstance(input_data, dict) else {"symmetric": input_data}
+        if self._cascade(bundle):
+            return self._infer_cascade(inputs, bundle, embeddings)
+        
+        probs = self._run_members(inputs, bundle, embeddings=embeddings)
+        ensembled = self._ensemble(probs, bundle)
+        if ensembled is None:
+            return None
+        final_probs, model_version, ensemble_used = ensembled
+        num_images = len(final_probs)
+        return (
+            final_probs,
+            [model_version] * num_images,
+            [ensemble_used] * num_images,
+            bundle,
+            [list(probs)] * num_images
+        )
+
+    def _cascade(self, bundle: ModelBundle) -> bool:
+        """Cascade mode applies when MobileNetV2 and at least one other member are loaded"""
+        names = [name for name, _ in self._loaded_members(bundle)]
+        return settings.ENSEMBLE_EXECUTION_MODE == "cascade" and "mobilenet" in names and len(names) > 1
+
+    def _infer_cascade(
+        self,
+        inputs: Dict[str, np.ndarray],
+        bundle: ModelBundle,
+        embeddings: Optional[Dict[str, np.ndarray]] = None
+    ):
+        """
+        Early-exit ensemble: MobileNetV2 first, the full ensemble only for
+        the rows it is unsure about
+        
+        A row exits after MobileNetV2 when its top-1 probability reaches
+        CASCADE_CONFIDENCE_THRESHOLD and leads the runner-up by at least
+        CASCADE_MARGIN_THRESHOLD. The remaining rows run only the member the
+        ensemble combines with MobileNetV2 (EfficientNetV2, else ViT), reusing
+        the MobileNetV2 probabilities already computed. Embeddings are taken
+        from whichever stage ran each row.
+        """
+        first_probs = self._run_members(inputs, bundle, ["mobilenet"], embeddings)["mobilenet"]
+        num_images = len(first_probs)
+        top1 = first_probs.max(axis=1)
+        runner_up = np.partition(first_probs, -2, axis=1)[:, -2] if first_probs.shape[1] > 1 else 0.0
+        confident = (
+            (top1 >= settings.CASCADE_CONFIDENCE_THRESHOLD)
+            & (top1 - runner_up >= settings.CASCADE_MARGIN_THRESHOLD)
+        )
+        
+        final_probs = first_probs
+        model_versions = ["mobilenet-v2"] * num_images
+        ensemble_used = [False] * num_images
+        stages_run = [["mobilenet"]] * num_images
+        
+        escalate = np.flatnonzero(~confident)
+        if escalate.size:
+            second = ["efficientnet"] if bundle.sessions.get("efficientnet") else ["vit"]
+            subset = {scaling: batch[escalate] for scaling, batch in inputs.items()}
+            second_embeddings = {} if embeddings is not None else None
+            probs = self._run_members(subset, bundle, second, second_embeddings)
+            if second_embeddings:
+                embeddings.update(self._fill_embeddings(inputs, bundle, escalate, second_embeddings))
+            probs["mobilenet"] = first_probs[escalate]
+            escalated_probs, model_version, used = self._ensemble(probs, bundle)
             
-            # Hybrid Intelligence Flag: If confident but not CERTAIN, suggest extended AI check
-            is_ambiguous = confidence < self.AMBIGUOUS_THRESHOLD
-
-            return {
-                "predicted_class": predicted_class,
-                "predicted_class_index": int(pred_idx),
-                "confidence": confidence,
-                "top_predictions": top_predictions,
-                "model_version": model_version,
-                "ensemble_used": ensemble_used,
-                "is_ambiguous": is_ambiguous
-            }
+            final_probs = first_probs.astype(escalated_probs.dtype, copy=True)
+            final_probs[escalate] = escalated_probs
+            for i in escalate.tolist():
+                model_versions[i] = model_version
+                ensemble_used[i] = used
+                stages_run[i] = ["mobilenet", *second]
+        
+        if embeddings is not None:
+            # Embedding members the cascade never ran (e.g. ViT behind EfficientNetV2)
+            missing = [name for name in bundle.embedding_outputs if name not in embeddings]
+            if missing:
+                self._run_members(inputs, bundle, missing, embeddings)
+        return final_probs, model_versions, ensemble_used, bundle, stages_run
+
+    def _fill_embeddings(
+        self,
+        inputs: Dict[str, np.ndarray],
+        bundle: ModelBundle,
+        rows: np.ndarray,
+        partial: Dict[str, np.ndarray]
+    ) -> Dict[str, np.ndarray]:
+        """
+        Complete embeddings a cascade stage produced for `rows` only
+
+        The member is run again just on the other rows (the ones that exited
+        before reaching it), so no row goes through it twice.
+        """
+        num_images = len(next(iter(inputs.values())))
+        others = np.setdiff1d(np.arange(num_images), rows)
+        rest: Dict[str, np.ndarray] = {}
+        if others.size:
+            subset = {scaling: batch[others] for scaling, batch in inputs.items()}
+            self._run_members(subset, bundle, list(partial), rest)
+        filled = {}
+        for name, features in partial.items():
+            full = np.empty((num_images, features.shape[1]), dtype=features.dtype)
+            full[rows] = features
+            if others.size:
+                full[others] = rest[name]
+            filled[name] = full
+        return filled
+
+    def infer_tensors(self, inputs: Dict[str, np.ndarray]) -> Optional[Tuple[np.ndarray, List[str], List[bool], List[List[str]]]]:
+        """
+        Ensemble inference on stacked tensors, wherever INFERENCE_BACKEND runs it
+        
+        Returns:
+            (ensembled probabilities [N, C], model_version, ensemble_used,
+            stages_run), the last three per row, or None when no session is
+            loaded
+        """
+        if self.inference_backend is not None:
+            return self.inference_backend.infer(inputs)
+        inference = self._infer_batch(inputs)
+        if inference is None:
+            return None
+        final_probs, model_versions, ensemble_used, _, stages_run = inference
+        return final_probs, model_versions, ensemble_used, stages_run
+
+    def _infer_images(self, images: List[PreprocessedImage]):
+        """Stack decoded images into one batch per needed scaling and infer"""
+        # One snapshot, so a concurrent hot reload can't mix model versions
+        bundle = self.bundle
+        if self.inference_backend is not None:
+            # Workers derive the other scalings they need from the [-1, 1] batch
+            inference = self.inference_backend.infer(stack_views(images, ["symmetric"]))
+            if inference is None:
+                return None
+            final_probs, model_versions, ensemble_used, stages_run = inference
+            return final_probs, model_versions, ensemble_used, bundle, stages_run
+        return self._infer_batch(stack_views(images, self._required_scalings(bundle)), bundle)
 
+    def _run_batch(self, images: List[PreprocessedImage]) -> List[Any]:
+        """Scheduler callback: run a micro-batch and split it back per request"""
+        try:
+            inference = self._infer_images(images)
+        except InferenceUnavailable:
+            raise  # Retrying item by item would only wait out the same timeout again
         except Exception as e:
-            logger.error(f"Inference error: {e}")
+            if len(images) == 1:
+                raise
+            # A model exported with a fixed batch dimension cannot take the stack
+            logger.warning(f"Batched inference failed ({e}); retrying {len(images)} items individually")
+            results = []
+            for image in images:
+                try:
+                    results.append(self._infer_images([image]))
+                except Exception as item_error:
+                    results.append(item_error)
+            return results
+
+        if inference is None:
+            return [None] * len(images)
+        final_probs, model_versions, ensemble_used, bundle, stages_run = inference
+        return [
+            (final_probs[i:i + 1], model_versions[i:i + 1], ensemble_used[i:i + 1], bundle, stages_run[i:i + 1])
+            for i in range(len(images))
+        ]
+
+    def _format_results(
+        self,
+        final_probs: np.ndarray,
+        model_version,
+        ensemble_used,
+        bundle: Optional[ModelBundle] = None,
+        stages_run: Optional[List[List[str]]] = None,
+        top_k: int = 5
+    ) -> List[Dict]:
+        """
+        Turn a [N, C] probability batch into per-image result dicts
+        
+        Argmax, OOD thresholding and top-k run over the whole batch (see
+        postprocessing.summarize); only the final dict construction is per
+        row. Class names come from `bundle` (the models that produced the
+        batch) when given. `model_version`, `ensemble_used` and `stages_run`
+        are per-row lists as returned by _infer_batch, or one value for the
+        whole batch.
+        """
+        # --- SUPERIOR REJECTION LOGIC (OOD) ---
+        # If not confident enough, admit ignorance rather than guessing wrong.
+        # Hybrid Intelligence Flag: If confident but not CERTAIN, suggest extended AI check
+        predictions = summarize(
+            final_probs,
+            confidence_threshold=self.CONFIDENCE_THRESHOLD,
+            ambiguous_threshold=self.AMBIGUOUS_THRESHOLD,
+            model_version=model_version,
+            ensemble_used=ensemble_used,
+            stages_run=stages_run,
+            k=top_k
+        )
+        for confidence in predictions.confidence[predictions.is_ood].tolist():
+            logger.warning(f"OOD Detected: Low confidence ({confidence:.2f}) < Threshold ({self.CONFIDENCE_THRESHOLD})")
+        return predictions.to_dicts((bundle or self.bundle).class_names)
+
+    def _run_inference(self, image_bytes: bytes, digest: Optional[str] = None) -> Dict:
+        """
+        Run actual inference (executed in thread pool)
+        
+        Mock results stand in only when no models are loaded (DEMO mode);
+        decode errors (ValueError), an unreachable INFERENCE_BACKEND
+        (InferenceUnavailable) and inference failures are raised.
+        """
+        if self.use_mock:
+            if settings.STRICT_ML_MODE:
+                raise RuntimeError("ML Service is in DEMO mode but STRICT_ML_MODE is enabled. Rejecting prediction.")
+            return self._predict_mock()
+
+        # Retries and predict -> explain chains for the same upload skip inference
+        digest = digest or image_digest(image_bytes)
+        cached = self.result_cache.get(digest)
+        if cached is not None:
+            return cached
+        
+        image = self.load_image(image_bytes, digest=digest)
+        
+        # Concurrent requests share one session run when batching is on
+        if self.batch_scheduler is not None:
+            inference = self.batch_scheduler.submit(image).result()
+        else:
+            inference = self._infer_images([image])
+        
+        if inference is None:
             return self._predict_mock()
+        result = self._format_results(*inference)[0]
+        self.result_cache.put(digest, result, fingerprint=inference[3].fingerprint)
+        return result
 
-    def predict(self, image_bytes: bytes) -> Dict:
+    def predict(self, image_bytes: bytes, digest: Optional[str] = None) -> Dict:
         """
         Predict plant species from image
         """
@@ -289,28 +1023,190 @@ class MLService:
         # Run in thread pool to avoid blocking async event loop
         # Image processing and inference are CPU bound
         try:
-            future = self.executor.submit(self._run_inference, image_bytes)
+            future = self.executor.submit(self._run_inference, image_bytes, digest)
             return future.result()
+        except (ValueError, InferenceUnavailable):
+            raise
+        except Exception as e:
+            logger.error(f"Prediction failed: {e}")
+            raise RuntimeError(f"Prediction service failure: {e}")
+
+    async def predict_async(self, image_bytes: bytes, digest: Optional[str] = None) -> Dict:
+        """
+        Predict plant species from image without blocking the event loop
+        
+        Decode and inference run on the service executor; the coroutine only
+        awaits the result, so health checks and DB reads keep being served.
+        `digest` is the SHA-256 of the bytes when the caller already has it.
+        """
+        loop = asyncio.get_running_loop()
+        if not self.models_loaded:
+            await loop.run_in_executor(self.executor, self.load_models)
+        
+        try:
+            return await loop.run_in_executor(self.executor, self._run_inference, image_bytes, digest)
+        except (ValueError, InferenceUnavailable):
+            raise
+        except Exception as e:
+            logger.error(f"Prediction failed: {e}")
+            raise RuntimeError(f"Prediction service failure: {e}")
+
+    def predict_with_embeddings(
+        self,
+        images: List[bytes],
+        digests: Optional[List[Optional[str]]] = None
+    ) -> Tuple[List[Dict], Optional[np.ndarray]]:
+        """
+        Predictions plus image embeddings [N, D] from the same forward pass
+        
+        The embeddings are the penultimate-layer features of the
+        VISUAL_EMBEDDING_MODEL member. They are None in DEMO mode, with an
+        out-of-process INFERENCE_BACKEND, or when VISUAL_INDEX_DIR is unset.
+        Runs outside the micro-batcher and result cache, neither of which
+        keeps embeddings; raises ValueError if an image fails to decode.
+        """
+        if not self.models_loaded:
+            self.load_models()
+        
+        if self.use_mock:
+            if settings.STRICT_ML_MODE:
+                raise RuntimeError("ML Service is in DEMO mode but STRICT_ML_MODE is enabled. Rejecting prediction.")
+            return [self._predict_mock() for _ in images], None
+        
+        digests = [
+            digest or image_digest(image_bytes)
+            for image_bytes, digest in zip(images, digests or [None] * len(images))
+        ]
+        # A single interactive upload stays cached for a follow-up explain request
+        decoded = [
+            self.load_image(image_bytes, store=len(images) == 1, digest=digest)
+            for image_bytes, digest in zip(images, digests)
+        ]
+        
+        bundle = self.bundle
+        embeddings: Dict[str, np.ndarray] = {}
+        if self.inference_backend is not None:
+            inference = self._infer_images(decoded)
+        else:
+            inference = self._infer_batch(stack_views(decoded, self._required_scalings(bundle)), bundle, embeddings)
+        if inference is None:
+            return [self._predict_mock() for _ in images], None
+        
+        results = self._format_results(*inference)
+        for digest, result in zip(digests, results):
+            self.result_cache.put(digest, result, fingerprint=inference[3].fingerprint)
+        return results, next(iter(embeddings.values()), None)
+
+    async def predict_with_embedding_async(
+        self,
+        image_bytes: bytes,
+        digest: Optional[str] = None
+    ) -> Tuple[Dict, Optional[np.ndarray]]:
+        """Awaitable single-image predict_with_embeddings: (result, [D] embedding or None)"""
+        loop = asyncio.get_running_loop()
+        if not self.models_loaded:
+            await loop.run_in_executor(self.executor, self.load_models)
+        
+        try:
+            results, embeddings = await loop.run_in_executor(
+                self.executor, self.predict_with_embeddings, [image_bytes], [digest]
+            )
+        except (ValueError, InferenceUnavailable):
+            raise
         except Exception as e:
             logger.error(f"Prediction failed: {e}")
             raise RuntimeError(f"Prediction service failure: {e}")
+        return results[0], embeddings[0] if embeddings is not None else None
+
+    async def predict_batch_async(self, images: List[bytes], digests: Optional[List[str]] = None) -> List[Dict]:
+        """Awaitable variant of predict_batch"""
+        loop = asyncio.get_running_loop()
+        # Default pool: predict_batch fans decode work out onto self.executor itself
+        return await loop.run_in_executor(None, self.predict_batch, images, digests)
 
-    def predict_batch(self, images: List[bytes]) -> List[Dict]:
-        """Batch prediction"""
-        results = []
-        # Could be optimized with batch inference in ONNX, but loop is safer for mixed inputs
-        for img_bytes in images:
+    def predict_batch(self, images: List[bytes], digests: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Batch prediction
+        
+        Decoded images are stacked into NCHW chunks (one per input scaling)
+        and each ensemble member runs once per chunk. Images that fail to decode or infer get
+        an error entry at their own position.
+        """
+        if not self.models_loaded:
+            self.load_models()
+        
+        if self.use_mock:
+            if settings.STRICT_ML_MODE:
+                raise RuntimeError("ML Service is in DEMO mode but STRICT_ML_MODE is enabled. Rejecting prediction.")
+            return [self._predict_mock() for _ in images]
+        
+        results: List[Dict] = [None] * len(images)
+        if digests is None:
+            digests = [image_digest(image_bytes) for image_bytes in images]
+        
+        # Cached predictions and repeats of an earlier image in this batch skip inference
+        first_seen: Dict[str, int] = {}
+        duplicates: List[Tuple[int, int]] = []
+        pending = []
+        for i, digest in enumerate(digests):
+            if digest in first_seen:
+                duplicates.append((i, first_seen[digest]))
+                continue
+            first_seen[digest] = i
+            cached = self.result_cache.get(digest)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending.append(i)
+        
+        def decode(i: int):
+            try:
+                # Bulk uploads bypass the cache so they don't evict interactive entries
+                return self.load_image(images[i], store=False, digest=digests[i])
+            except Exception as e:
+                return e
+        
+        # Decode in parallel; PIL/OpenCV release the GIL while decoding
+        decoded = dict(zip(pending, self.executor.map(decode, pending)))
+        valid = []
+        for i, image in decoded.items():
+            if isinstance(image, Exception):
+                results[i] = self._batch_error(image)
+            else:
+                valid.append(i)
+        
+        chunk_size = max(1, settings.BATCH_INFERENCE_CHUNK_SIZE)
+        for start in range(0, len(valid), chunk_size):
+            chunk = valid[start:start + chunk_size]
             try:
-                result = self.predict(img_bytes)
-                results.append(result)
+                inference = self._infer_images([decoded[i] for i in chunk])
+                if inference is None:
+                    chunk_results = [self._predict_mock() for _ in chunk]
+                else:
+                    chunk_results = self._format_results(*inference)
             except Exception as e:
-                results.append({
-                    "error": str(e),
-                    "predicted_class": None,
-                    "confidence": 0.0
-                })
+                logger.error(f"Batch inference error: {e}")
+                chunk_results = [self._batch_error(e) for _ in chunk]
+                inference = None
+            for i, result in zip(chunk, chunk_results):
+                results[i] = result
+                if inference is not None:
+                    self.result_cache.put(digests[i], result, fingerprint=inference[3].fingerprint)
+        
+        for i, original in duplicates:
+            results[i] = copy.deepcopy(results[original])
+        
         return results
 
+    @staticmethod
+    def _batch_error(error: Exception) -> Dict:
+        """Per-image error entry for batch results"""
+        return {
+            "error": str(error),
+            "predicted_class": None,
+            "confidence": 0.0
+        }
+
 # Global ML service instance
 ml_service = MLService()
 
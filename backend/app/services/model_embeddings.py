@@ -0,0 +1,86 @@
+"""
+Model Embeddings
+Expose a classifier's penultimate-layer features as a second ONNX output.
+
+The exported graphs only output logits. The feature vector the final dense
+layer consumes is a good image embedding, and it is already computed on
+every forward pass, so rather than running a separate feature extractor we
+add it as an extra graph output named "embedding" and fetch both outputs
+from the same session run.
+
+Requires the `onnx` package (in requirements.txt). Without it the model is
+served without embeddings and /ready reports visual search "unavailable".
+"""
+
+import os
+import tempfile
+from typing import Optional
+
+try:
+    import onnx
+    from onnx import helper
+    ONNX_GRAPH_AVAILABLE = True
+except ImportError:
+    ONNX_GRAPH_AVAILABLE = False
+
+EMBEDDING_OUTPUT = "embedding"
+
+# Ops between the final dense layer and the logits output (bias, softmax, casts of quantized graphs)
+PASSTHROUGH_OPS = {"Identity", "Softmax", "Add", "Mul", "Cast", "Reshape", "Flatten", "Squeeze"}
+DENSE_OPS = {"Gemm", "MatMul", "MatMulInteger"}
+
+
+def find_embedding_tensor(graph) -> Optional[str]:
+    """
+    Name of the tensor the final dense layer consumes, or None
+
+    Walks back from the first graph output through PASSTHROUGH_OPS to the
+    Gemm/MatMul producing the logits. Dynamically quantized graphs feed
+    MatMulInteger from a DynamicQuantizeLinear, whose float input is used.
+    """
+    producers = {output: node for node in graph.node for output in node.output}
+    node = producers.get(graph.output[0].name)
+    while node is not None and node.op_type in PASSTHROUGH_OPS:
+        node = producers.get(node.input[0])
+    if node is None or node.op_type not in DENSE_OPS:
+        return None
+    features = node.input[0]
+    quantizer = producers.get(features)
+    if node.op_type == "MatMulInteger" and quantizer is not None and quantizer.op_type == "DynamicQuantizeLinear":
+        features = quantizer.input[0]
+    return features
+
+
+def expose_embedding_output(model_path: str, output_path: str) -> str:
+    """
+    Write a copy of `model_path` with the penultimate features as an extra output
+
+    The copy is written to a temp file and renamed into place, so concurrent
+    workers never load a partial graph.
+
+    Raises:
+        RuntimeError: onnx is not installed
+        ValueError: no dense layer producing the logits was found
+    """
+    if not ONNX_GRAPH_AVAILABLE:
+        raise RuntimeError("onnx is not installed")
+    model = onnx.load(model_path)
+    graph = model.graph
+    if not any(output.name == EMBEDDING_OUTPUT for output in graph.output):
+        features = find_embedding_tensor(graph)
+        if features is None:
+            raise ValueError(f"No dense layer producing the logits of {os.path.basename(model_path)}")
+        graph.node.append(helper.make_node("Identity", [features], [EMBEDDING_OUTPUT]))
+        graph.output.append(helper.make_tensor_value_info(EMBEDDING_OUTPUT, onnx.TensorProto.FLOAT, None))
+
+    directory = os.path.dirname(output_path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp-", suffix=".onnx", dir=directory)
+    os.close(fd)
+    try:
+        onnx.save(model, tmp_path)
+        os.replace(tmp_path, output_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return output_path
@@ -0,0 +1,210 @@
+"""
+Model Registry
+Versioned bundles of ONNX sessions and ensemble weights for hot reloads.
+
+MLService serves from one ModelBundle at a time. A reload builds and warms a
+new bundle next to the live one and swaps the reference; requests already
+running keep the bundle they started with, so nothing is torn down under
+them. ModelDirWatcher triggers reloads when the model files change on disk.
+"""
+
+import os
+import json
+import time
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.services.postprocessing import weighted_sum
+
+logger = logging.getLogger(__name__)
+
+
+class EnsembleWeights:
+    """
+    How member probabilities are combined: a weight pair per member
+    combination, a softmax temperature per member and, optionally, per-class
+    weights (see ml_pipeline/fit_ensemble_weights.py)
+
+    ENSEMBLE_WEIGHTS_PATH format:
+        {
+          "weights": {"efficientnet_mobilenet": {"efficientnet": 0.7, "mobilenet": 0.3}, ...},
+          "temperatures": {"mobilenet": 1.4, ...},
+          "class_weights": {"efficientnet_mobilenet": {"efficientnet": [...], "mobilenet": [...]}}
+        }
+    The older {"mobilenet_weight": 0.6, "vit_weight": 0.4} form sets the
+    mobilenet_vit pair.
+    """
+
+    def __init__(
+        self,
+        pairs: Dict[str, Tuple[float, float]],
+        temperatures: Optional[Dict[str, float]] = None,
+        class_weights: Optional[Dict[str, Tuple[np.ndarray, np.ndarray]]] = None
+    ):
+        self.pairs = dict(pairs)  # combination -> (weight of first member, weight of second)
+        self.temperatures = dict(temperatures or {})
+        self.class_weights = dict(class_weights or {})  # combination -> ([C], [C])
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        defaults: Dict[str, Tuple[float, float]],
+        num_classes: Optional[int] = None
+    ) -> "EnsembleWeights":
+        """
+        Read ENSEMBLE_WEIGHTS_PATH on top of `defaults`
+
+        A missing file gives the defaults. Per-class weights whose length
+        doesn't match `num_classes` are dropped with a warning; a malformed
+        file raises ValueError.
+        """
+        if not path or not os.path.exists(path):
+            return cls(defaults)
+        try:
+            with open(path, "r") as f:
+                config = json.load(f)
+
+            pairs = dict(defaults)
+            if "mobilenet_weight" in config or "vit_weight" in config:
+                pairs["mobilenet_vit"] = (float(config.get("mobilenet_weight", 0.5)), float(config.get("vit_weight", 0.5)))
+            for combination, weights in config.get("weights", {}).items():
+                first, second = combination.split("_")
+                pairs[combination] = (float(weights[first]), float(weights[second]))
+
+            temperatures = {name: float(t) for name, t in config.get("temperatures", {}).items()}
+            if any(t <= 0 for t in temperatures.values()):
+                raise ValueError("temperatures must be positive")
+
+            class_weights = {}
+            for combination, weights in config.get("class_weights", {}).items():
+                first, second = combination.split("_")
+                pair = (np.asarray(weights[first], dtype=np.float32), np.asarray(weights[second], dtype=np.float32))
+                if num_classes is not None and any(len(w) != num_classes for w in pair):
+                    logger.warning(f"Ignoring {combination} class weights: expected {num_classes} classes")
+                    continue
+                class_weights[combination] = pair
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Invalid ensemble weights file {path}: {e}")
+
+        logger.info(f"Loaded ensemble weights from {path}")
+        return cls(pairs, temperatures, class_weights)
+
+    def combine(self, combination: str, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """Weighted mix of two members' [N, C] probabilities"""
+        if combination in self.class_weights:
+            first_weights, second_weights = self.class_weights[combination]
+            return weighted_sum([(first, first_weights), (second, second_weights)], normalize=True)
+        first_weight, second_weight = self.pairs[combination]
+        return weighted_sum([(first, first_weight), (second, second_weight)])
+
+    def info(self) -> Dict:
+        return {
+            "pairs": self.pairs,
+            "temperatures": self.temperatures,
+            "per_class": sorted(self.class_weights)
+        }
+
+
+class ModelBundle:
+    """One loaded model version: sessions, class names and their fingerprint"""
+
+    def __init__(
+        self,
+        sessions: Optional[Dict[str, Any]] = None,
+        class_names: Optional[List[str]] = None,
+        fingerprint: str = "",
+        paths: Optional[Dict[str, str]] = None,
+        version: int = 0,
+        ensemble: Optional[EnsembleWeights] = None
+    ):
+        self.sessions = dict(sessions or {})  # member name -> InferenceSession
+        self.class_names = list(class_names or [])
+        self.fingerprint = fingerprint
+        self.paths = dict(paths or {})
+        self.version = version
+        self.ensemble = ensemble  # None: MLService defaults
+        self.embedding_outputs: Dict[str, Tuple[str, str]] = {}  # member name -> (logits output, embedding output)
+        self.loaded_at = time.time()
+
+    def info(self) -> Dict:
+        """JSON-serializable description for the admin API"""
+        return {
+            "version": self.version,
+            "fingerprint": self.fingerprint,
+            "members": sorted(self.sessions),
+            "paths": {name: self.paths.get(name) for name in sorted(self.sessions)},
+            "num_classes": len(self.class_names),
+            "ensemble": self.ensemble.info() if self.ensemble is not None else None,
+            "embedding_members": sorted(self.embedding_outputs),
+            "loaded_at": self.loaded_at
+        }
+
+
+class ModelDirWatcher:
+    """
+    Polls the model files and calls `on_change` when they differ from what
+    is being served
+
+    A change is only acted on once the files have looked the same for two
+    consecutive polls, so a model that is still being copied into place is
+    never loaded half-written. A fingerprint whose reload failed is not
+    retried until the files change again.
+    """
+
+    def __init__(
+        self,
+        disk_fingerprint: Callable[[], str],
+        served_fingerprint: Callable[[], str],
+        on_change: Callable[[], Any],
+        interval_seconds: float = 30.0
+    ):
+        self.disk_fingerprint = disk_fingerprint
+        self.served_fingerprint = served_fingerprint
+        self.on_change = on_change
+        self.interval_seconds = interval_seconds
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_seen: Optional[str] = None
+        self._failed: Optional[str] = None
+
+    def start(self):
+        """Start polling in a daemon thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="model-dir-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop polling and wait for the thread to exit"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=self.interval_seconds + 5)
+            self._thread = None
+
+    def poll(self) -> bool:
+        """Check once; returns True if a reload was triggered"""
+        fingerprint = self.disk_fingerprint()
+        settled = fingerprint == self._last_seen
+        self._last_seen = fingerprint
+        if not settled or fingerprint == self.served_fingerprint() or fingerprint == self._failed:
+            return False
+
+        logger.info("Model files changed on disk; reloading")
+        try:
+            self.on_change()
+            self._failed = None
+        except Exception as e:
+            logger.error(f"Hot reload failed, keeping current models: {e}")
+            self._failed = fingerprint
+        return True
+
+    def _run(self):
+        while not self._stop.wait(self.interval_seconds):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Model watcher error: {e}")
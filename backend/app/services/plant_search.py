@@ -0,0 +1,347 @@
+"""
+Plant Search
+Ranked, typo-tolerant name search over the plants table.
+
+Candidates come from a trigram index, chosen by database:
+
+- SQLite: an FTS5 table (tokenize='trigram') over species_name, the five
+  common_name_* columns and description, kept in sync with plants by
+  triggers. The query's trigrams are OR-ed, so a misspelt transliteration
+  ("tulasi" for "tulsi") still shares most of them with the right name.
+- PostgreSQL: pg_trgm GIN indexes on the combined names and on description,
+  queried with word similarity.
+- Anything else (or SQLite without FTS5 trigram support): ILIKE over the
+  same columns, without typo tolerance.
+
+The index is created with the plants table (DDL events) or, for an existing
+database, by ensure_search_index at startup. Candidates are then re-ranked
+the same way on every backend: exact name, then prefix (autocomplete), then
+substring matches, then fuzzy matches by trigram similarity, as pg_trgm
+computes it. Description matches rank below any name match.
+"""
+
+import re
+import sqlite3
+import logging
+import threading
+import unicodedata
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+from sqlalchemy import column, event, or_, table, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.plant import Plant
+
+logger = logging.getLogger(__name__)
+
+NAME_COLUMNS = [
+    "species_name", "common_name_en", "common_name_hi",
+    "common_name_ta", "common_name_te", "common_name_bn"
+]
+SEARCH_TABLE = "plants_search"
+
+# Scores per kind of match; fuzzy matches get FUZZY_SCORE * trigram similarity
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.9
+SUBSTRING_SCORE = 0.8
+FUZZY_SCORE = 0.7
+DESCRIPTION_SCORE = 0.5
+
+# Lower-cased names with underscores as spaces, as one indexable PostgreSQL expression
+_PG_NAMES = "lower(replace({}, '_', ' '))".format(
+    " || ' ' || ".join(f"coalesce({name}, '')" for name in NAME_COLUMNS)
+)
+
+# Word characters, plus the Indic vowel signs and viramas that \w leaves out
+_WORD = re.compile(r"[\w\u0900-\u0d7f]+")
+
+_backends: Dict[str, str] = {}
+_backends_lock = threading.Lock()
+
+
+def normalize_name(value: Optional[str]) -> str:
+    """Case-folded, accent-free (for Latin script) name with "_"/"-" as spaces"""
+    value = value or ""
+    if value.isascii():
+        folded = value.lower()
+    else:
+        chars = []
+        for ch in unicodedata.normalize("NFKD", value):
+            # Strip accents from transliterations but keep Indic vowel signs
+            if unicodedata.combining(ch) and chars and chars[-1] < "\u0250":
+                continue
+            chars.append(ch)
+        folded = unicodedata.normalize("NFKC", "".join(chars)).casefold()
+    return " ".join(re.sub(r"[_\-]+", " ", folded).split())
+
+
+@lru_cache(maxsize=4096)
+def trigrams(value: str) -> FrozenSet[str]:
+    """pg_trgm-style trigrams: each word padded with two spaces before and one after"""
+    grams = set()
+    for word in _WORD.findall(value):
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return frozenset(grams)
+
+
+def similarity(a: str, b: str) -> float:
+    """Share of trigrams two strings have in common (pg_trgm similarity)"""
+    grams_a, grams_b = trigrams(a), trigrams(b)
+    if not grams_a or not grams_b:
+        return 0.0
+    return len(grams_a & grams_b) / len(grams_a | grams_b)
+
+
+def match_score(query: str, name: str) -> float:
+    """How well a normalized query matches one normalized name (0 = no match)"""
+    if not query or not name:
+        return 0.0
+    if name == query:
+        return EXACT_SCORE
+    if f" {query}" in f" {name}":
+        # Starts the name or one of its words: what autocomplete wants first
+        return PREFIX_SCORE
+    if query in name:
+        return SUBSTRING_SCORE
+    best = max([similarity(query, name), *(similarity(query, word) for word in name.split())])
+    return FUZZY_SCORE * best if best >= settings.SEARCH_MIN_SIMILARITY else 0.0
+
+
+def score_plant(plant: Plant, query: str, include_description: bool = False) -> float:
+    """Best match of a normalized query over a plant's names (and description)"""
+    score = max(match_score(query, normalize_name(getattr(plant, name))) for name in NAME_COLUMNS)
+    if not score and include_description and query in normalize_name(plant.description):
+        score = DESCRIPTION_SCORE
+    return score
+
+
+# ----- Index DDL -----
+
+def _fts5_trigram_supported(connection: Connection) -> bool:
+    if sqlite3.sqlite_version_info < (3, 34, 0):
+        return False
+    options = {row[0] for row in connection.execute(text("PRAGMA compile_options"))}
+    return "ENABLE_FTS5" in options
+
+
+def create_search_index(connection: Connection):
+    """Create (and fill) the trigram index for this database if it is missing"""
+    dialect = connection.dialect.name
+    if dialect == "sqlite":
+        if not _fts5_trigram_supported(connection):
+            logger.warning("SQLite lacks FTS5 trigram support; plant search falls back to ILIKE")
+            return
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": SEARCH_TABLE}
+        ).first()
+        columns = ", ".join([*NAME_COLUMNS, "description"])
+        new_values = ", ".join(f"new.{name}" for name in [*NAME_COLUMNS, "description"])
+        old_values = ", ".join(f"old.{name}" for name in [*NAME_COLUMNS, "description"])
+        connection.execute(text(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} USING fts5("
+            f"{columns}, content='plants', content_rowid='id', tokenize='trigram')"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ai AFTER INSERT ON plants BEGIN "
+            f"INSERT INTO {SEARCH_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_ad AFTER DELETE ON plants BEGIN "
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); END"
+        ))
+        connection.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_au AFTER UPDATE ON plants BEGIN "
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values}); "
+            f"INSERT INTO {SEARCH_TABLE}(rowid, {columns}) VALUES (new.id, {new_values}); END"
+        ))
+        if not exists:
+            connection.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+            logger.info("Created FTS5 trigram index for plant search")
+    elif dialect == "postgresql":
+        try:
+            # A failure (e.g. no permission for the extension) must not abort the caller's transaction
+            with connection.begin_nested():
+                connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+                connection.execute(text(
+                    f"CREATE INDEX IF NOT EXISTS ix_plants_names_trgm ON plants USING gin (({_PG_NAMES}) gin_trgm_ops)"
+                ))
+                connection.execute(text(
+                    "CREATE INDEX IF NOT EXISTS ix_plants_description_trgm ON plants USING gin (description gin_trgm_ops)"
+                ))
+        except Exception as e:
+            logger.warning(f"pg_trgm unavailable ({e}); plant search falls back to ILIKE")
+    _reset_backend(connection.engine)
+
+
+def drop_search_index(connection: Connection):
+    """Drop the SQLite FTS table (its triggers go with plants; PostgreSQL indexes too)"""
+    if connection.dialect.name == "sqlite":
+        connection.execute(text(f"DROP TABLE IF EXISTS {SEARCH_TABLE}"))
+    _reset_backend(connection.engine)
+
+
+def ensure_search_index(engine: Engine):
+    """Startup hook for databases whose plants table predates the search index"""
+    with engine.begin() as connection:
+        create_search_index(connection)
+
+
+event.listen(Plant.__table__, "after_create", lambda target, connection, **kw: create_search_index(connection))
+event.listen(Plant.__table__, "before_drop", lambda target, connection, **kw: drop_search_index(connection))
+
+
+def _reset_backend(engine: Engine):
+    with _backends_lock:
+        _backends.pop(str(engine.url), None)
+
+
+def search_backend(db: Session) -> str:
+    """"fts5", "pg_trgm" or "ilike" for the session's database (looked up once)"""
+    bind = db.get_bind()
+    key = str(bind.url)
+    with _backends_lock:
+        if key in _backends:
+            return _backends[key]
+    if bind.dialect.name == "sqlite":
+        found = db.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": SEARCH_TABLE}
+        ).first()
+        backend = "fts5" if found else "ilike"
+    elif bind.dialect.name == "postgresql":
+        found = db.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")).first()
+        backend = "pg_trgm" if found else "ilike"
+    else:
+        backend = "ilike"
+    with _backends_lock:
+        _backends[key] = backend
+    return backend
+
+
+# ----- Queries -----
+
+def _quote(term: str) -> str:
+    return '"{}"'.format(term.replace('"', '""'))
+
+
+def _fts5_expression(query: str, include_description: bool, fuzzy: bool = False) -> Optional[str]:
+    """
+    FTS5 MATCH over the name columns (or the whole query in the description)
+
+    Strict: every query word (of 3+ characters; the trigram tokenizer cannot
+    match shorter ones) as a substring. Fuzzy: any chunk of any word, so one
+    wrong letter leaves most chunks matching; chunks are trigrams for short
+    words and 4 characters for long ones, which are much rarer in the index.
+    None if the query has nothing indexable.
+    """
+    words = [word for word in _WORD.findall(query) if len(word) >= 3]
+    if not words:
+        return None
+    if fuzzy:
+        chunks = set()
+        for word in words:
+            size = 3 if len(word) < 8 else 4
+            chunks.update(word[i:i + size] for i in range(len(word) - size + 1))
+        names = " OR ".join(_quote(chunk) for chunk in sorted(chunks))
+    else:
+        names = " AND ".join(_quote(word) for word in words)
+    expression = f"{{{' '.join(NAME_COLUMNS)}}} : ({names})"
+    if include_description:
+        expression += f" OR description : {_quote(query)}"
+    return expression
+
+
+def _fts5_candidates(
+    db: Session, query: str, include_description: bool, limit: int, fuzzy: bool = False
+) -> List[Plant]:
+    expression = _fts5_expression(query, include_description, fuzzy)
+    if expression is None:
+        return _ilike_candidates(db, query, include_description, limit)
+    search = table(SEARCH_TABLE, column("rowid"))
+    weights = ", ".join(["10.0"] * len(NAME_COLUMNS) + ["1.0"])
+    return (
+        db.query(Plant)
+        .join(search, search.c.rowid == Plant.id)
+        .filter(text(f"{SEARCH_TABLE} MATCH :expression"))
+        .params(expression=expression)
+        .order_by(text(f"bm25({SEARCH_TABLE}, {weights})"), Plant.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def _pg_trgm_candidates(db: Session, query: str, include_description: bool, limit: int) -> List[Plant]:
+    db.execute(
+        text("SELECT set_config('pg_trgm.word_similarity_threshold', :threshold, true)"),
+        {"threshold": str(settings.SEARCH_MIN_SIMILARITY)}
+    )
+    condition = f"(:query <% {_PG_NAMES} OR {_PG_NAMES} LIKE :pattern"
+    if include_description:
+        condition += " OR plants.description ILIKE :pattern"
+    return (
+        db.query(Plant)
+        .filter(text(condition + ")"))
+        .params(query=query, pattern=f"%{query}%")
+        .order_by(text(f"word_similarity(:query, {_PG_NAMES}) DESC"), Plant.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def _ilike_candidates(db: Session, query: str, include_description: bool, limit: int) -> List[Plant]:
+    pattern = f"%{query}%"
+    columns = [getattr(Plant, name) for name in NAME_COLUMNS]
+    if include_description:
+        columns.append(Plant.description)
+    # Stored species names use underscores where queries have spaces
+    conditions = [col.ilike(pattern) for col in columns]
+    conditions.append(Plant.species_name.ilike(pattern.replace(" ", "_")))
+    return db.query(Plant).filter(or_(*conditions)).order_by(Plant.id).limit(limit).all()
+
+
+def search_plants(
+    db: Session,
+    query: str,
+    limit: int = 20,
+    offset: int = 0,
+    include_description: bool = False
+) -> Tuple[List[Tuple[Plant, float]], int]:
+    """
+    Plants matching `query`, best first
+
+    The same SEARCH_MAX_CANDIDATES best index rows (ties broken by id) are
+    read and re-ranked whatever the offset, and pages are slices of that one
+    ordering, so walking them never repeats or skips a plant. Results, and
+    the total, stop at that cap. Queries shorter than three characters have
+    no trigrams and use the ILIKE path.
+
+    With FTS5, misspellings are looked for when exact, prefix and substring
+    matches do not fill the cap.
+
+    Returns:
+        ([(plant, score)] for the requested page, number of matches)
+    """
+    query = normalize_name(query)
+    if not query:
+        return [], 0
+    backend = search_backend(db) if len(query) >= 3 else "ilike"
+    fetch = {"fts5": _fts5_candidates, "pg_trgm": _pg_trgm_candidates}.get(backend, _ilike_candidates)
+    cap = settings.SEARCH_MAX_CANDIDATES
+    candidates = fetch(db, query, include_description, cap)
+    if backend == "fts5" and len(candidates) < cap:
+        seen = {plant.id for plant in candidates}
+        fuzzy = _fts5_candidates(db, query, include_description, cap, fuzzy=True)
+        candidates += [plant for plant in fuzzy if plant.id not in seen]
+    # Not the offset: every page must be cut from the same ranking
+    scored = _rank(candidates, query, include_description)[:cap]
+    return scored[offset:offset + limit], len(scored)
+
+
+def _rank(candidates: List[Plant], query: str, include_description: bool) -> List[Tuple[Plant, float]]:
+    scored = [(plant, score_plant(plant, query, include_description)) for plant in candidates]
+    scored = [(plant, score) for plant, score in scored if score > 0]
+    scored.sort(key=lambda item: (-item[1], item[0].species_name, item[0].id))
+    return scored
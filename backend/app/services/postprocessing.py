@@ -0,0 +1,169 @@
+"""
+Post-processing Kernels
+Batch operations that turn member logits into predictions: stable
+softmax, weighted ensembling, argpartition top-k and the OOD /
+ambiguity flags.
+
+Everything works on [N, C] arrays with as few temporaries as possible.
+PredictionBatch keeps the results as compact arrays; per-image dicts are
+only built by PredictionBatch.to_dicts, at the point where results leave the
+service.
+"""
+
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Weight = Union[float, np.ndarray]  # scalar, or per-class [C]
+
+
+def softmax(logits: np.ndarray, temperature: float = 1.0) -> np.ndarray:
+    """Row-wise softmax of logits / temperature in a single output buffer"""
+    out = np.array(logits, dtype=np.float32, copy=True)
+    if temperature != 1.0:
+        out /= temperature
+    out -= out.max(axis=1, keepdims=True)
+    np.exp(out, out=out)
+    out /= out.sum(axis=1, keepdims=True)
+    return out
+
+
+def weighted_sum(members: Sequence[Tuple[np.ndarray, Weight]], normalize: bool = False) -> np.ndarray:
+    """
+    sum(probs * weight) over the members, accumulated into one buffer
+
+    Args:
+        members: (probs [N, C], scalar or per-class [C] weight) pairs
+        normalize: Rescale rows to sum to 1 (needed with per-class weights)
+    """
+    (first, first_weight), *rest = members
+    out = np.multiply(first, first_weight, dtype=np.float32)
+    scratch = np.empty_like(out) if rest else None
+    for probs, weight in rest:
+        np.multiply(probs, weight, out=scratch)
+        out += scratch
+    if normalize:
+        out /= out.sum(axis=1, keepdims=True)
+    return out
+
+
+def top_k(probs: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Indices and values of the k largest entries per row, descending"""
+    num_rows, num_classes = probs.shape
+    k = min(k, num_classes)
+    rows = np.arange(num_rows)[:, np.newaxis]
+    if k < num_classes:
+        # Partition first so only k survivors per row get sorted
+        idx = np.argpartition(-probs, k - 1, axis=1)[:, :k]
+        values = probs[rows, idx]
+    else:
+        idx = np.broadcast_to(np.arange(k), (num_rows, k))
+        values = probs
+    # Plain fancy indexing: np.take_along_axis costs more than the sort at these sizes
+    order = np.argsort(-values, axis=1, kind="stable")
+    return idx[rows, order], values[rows, order]
+
+
+class PredictionBatch:
+    """Final predictions for N images as arrays, plus per-row model metadata"""
+
+    def __init__(
+        self,
+        pred_idx: np.ndarray,
+        confidence: np.ndarray,
+        top_idx: np.ndarray,
+        top_probs: np.ndarray,
+        is_ood: np.ndarray,
+        is_ambiguous: np.ndarray,
+        model_version: List[str],
+        ensemble_used: List[bool],
+        stages_run: List[List[str]]
+    ):
+        self.pred_idx = pred_idx  # [N] int
+        self.confidence = confidence  # [N] top-1 probability
+        self.top_idx = top_idx  # [N, k] class indices, best first
+        self.top_probs = top_probs  # [N, k]
+        self.is_ood = is_ood  # [N] bool: below the confidence threshold
+        self.is_ambiguous = is_ambiguous  # [N] bool: below the ambiguity threshold
+        self.model_version = model_version
+        self.ensemble_used = ensemble_used
+        self.stages_run = stages_run
+
+    def __len__(self) -> int:
+        return len(self.pred_idx)
+
+    def to_dicts(self, class_names: List[str]) -> List[Dict]:
+        """JSON-ready result dict per image"""
+        num_names = len(class_names)
+        pred_idx = self.pred_idx.tolist()
+        confidence = self.confidence.tolist()
+        top_idx = self.top_idx.tolist()
+        top_probs = self.top_probs.tolist()
+        is_ood = self.is_ood.tolist()
+        is_ambiguous = self.is_ambiguous.tolist()
+
+        results = []
+        for i in range(len(pred_idx)):
+            if is_ood[i]:
+                results.append({
+                    "predicted_class": "Unknown Object",
+                    "predicted_class_index": -1,
+                    "confidence": confidence[i],
+                    "top_predictions": [],
+                    "model_version": self.model_version[i],
+                    "ensemble_used": self.ensemble_used[i],
+                    "stages_run": list(self.stages_run[i]),
+                    "is_ambiguous": True,
+                    "message": "Object not recognized as a known medicinal plant."
+                })
+                continue
+
+            idx = pred_idx[i]
+            results.append({
+                "predicted_class": class_names[idx] if idx < num_names else f"Class_{idx}",
+                "predicted_class_index": idx,
+                "confidence": confidence[i],
+                "top_predictions": [
+                    {"class_name": class_names[c], "confidence": p}
+                    for c, p in zip(top_idx[i], top_probs[i])
+                    if c < num_names
+                ],
+                "model_version": self.model_version[i],
+                "ensemble_used": self.ensemble_used[i],
+                "stages_run": list(self.stages_run[i]),
+                "is_ambiguous": is_ambiguous[i]
+            })
+        return results
+
+
+def summarize(
+    final_probs: np.ndarray,
+    confidence_threshold: float,
+    ambiguous_threshold: float,
+    model_version: Union[str, List[str]],
+    ensemble_used: Union[bool, List[bool]],
+    stages_run: Optional[List[List[str]]] = None,
+    k: int = 5
+) -> PredictionBatch:
+    """
+    Argmax, top-k and threshold flags over a whole [N, C] probability batch
+
+    `model_version`, `ensemble_used` and `stages_run` are per-row lists, or
+    one value for the whole batch.
+    """
+    num_images = final_probs.shape[0]
+    # argmax rather than top_idx[:, 0]: it breaks ties towards the lower class index
+    pred_idx = final_probs.argmax(axis=1)
+    confidence = final_probs[np.arange(num_images), pred_idx]
+    top_idx, top_probs = top_k(final_probs, k)
+    return PredictionBatch(
+        pred_idx=pred_idx,
+        confidence=confidence,
+        top_idx=top_idx,
+        top_probs=top_probs,
+        is_ood=confidence < confidence_threshold,
+        is_ambiguous=confidence < ambiguous_threshold,
+        model_version=model_version if isinstance(model_version, list) else [model_version] * num_images,
+        ensemble_used=ensemble_used if isinstance(ensemble_used, list) else [ensemble_used] * num_images,
+        stages_run=stages_run if stages_run is not None else [[]] * num_images
+    )
@@ -0,0 +1,166 @@
+"""
+Prediction History
+Keyset-paginated reads of the predictions table.
+
+Pages are ordered newest first on (created_at, id) and continue from an
+opaque cursor holding the last row's key, so every page is one index range
+scan on ix_predictions_created_at_id joined to plants, however deep the
+client pages. The total is an estimate cached for HISTORY_COUNT_CACHE_SECONDS
+instead of a COUNT(*) over the whole table on every call.
+
+SQLite keeps created_at as text in two shapes: "YYYY-MM-DD HH:MM:SS" from the
+server default and "YYYY-MM-DD HH:MM:SS.ffffff" from Python-side values, and
+orders and compares it as text. Cursors there carry the stored text as is, so
+the keyset filter compares exactly what ORDER BY sorted.
+"""
+
+import time
+import base64
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Union
+
+from sqlalchemy import String, func, text, tuple_, type_coerce
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.plant import Plant
+from app.models.prediction import Prediction
+
+MAX_PAGE_SIZE = 100
+
+
+def created_key(db: Session):
+    """created_at as pages order and compare it: the stored text on SQLite, the timestamp elsewhere"""
+    if db.get_bind().dialect.name == "sqlite":
+        return type_coerce(Prediction.created_at, String)
+    return Prediction.created_at
+
+
+def encode_cursor(created_at: Union[str, datetime], prediction_id: int) -> str:
+    """Cursor after a row, from its created_key value and id"""
+    if isinstance(created_at, datetime):
+        created_at = created_at.isoformat()
+    raw = f"{created_at}|{prediction_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, int]:
+    """Raises ValueError for anything encode_cursor did not produce"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, prediction_id = raw.rsplit("|", 1)
+        datetime.fromisoformat(created_at)
+        return created_at, int(prediction_id)
+    except Exception:
+        raise ValueError("Invalid history cursor")
+
+
+def history_page(
+    db: Session,
+    cursor: Optional[str] = None,
+    limit: int = 20,
+    skip: int = 0
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    One page of predictions, newest first, with their plant names
+
+    `skip` (offset paging, kept for older clients) only applies without a
+    cursor; the returned cursor continues from wherever that page ended.
+
+    Returns:
+        (rows, next_cursor); next_cursor is None on the last page
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    key = created_key(db)
+    query = db.query(
+        Prediction.id,
+        Prediction.public_id,
+        Prediction.image_url,
+        Prediction.confidence_score,
+        Prediction.created_at,
+        Prediction.feedback_correct,
+        Plant.species_name,
+        Plant.common_name_en,
+        key.label("created_key")
+    ).outerjoin(Plant, Plant.id == Prediction.predicted_plant_id)
+
+    if cursor:
+        created_at, prediction_id = decode_cursor(cursor)
+        if not isinstance(key.type, String):
+            created_at = datetime.fromisoformat(created_at)
+        query = query.filter(tuple_(key, Prediction.id) < tuple_(created_at, prediction_id))
+
+    query = query.order_by(Prediction.created_at.desc(), Prediction.id.desc())
+    if not cursor and skip > 0:
+        query = query.offset(skip)
+    # One extra row tells whether there is a next page
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_key, rows[-1].id)
+
+    results = [{
+        "id": row.public_id or row.id,
+        "image_url": row.image_url,
+        "predicted_plant": row.species_name or "Unknown",
+        "common_name": row.common_name_en,
+        "confidence": row.confidence_score,
+        "created_at": row.created_at.isoformat() if row.created_at else None,
+        "feedback_correct": row.feedback_correct
+    } for row in rows]
+    return results, next_cursor
+
+
+class PredictionCountCache:
+    """
+    Approximate predictions count, refreshed at most every `ttl` seconds
+
+    PostgreSQL answers from the planner's row estimate (pg_class.reltuples,
+    kept fresh by autovacuum/ANALYZE); other databases run a real COUNT(*),
+    just not on every request.
+    """
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = settings.HISTORY_COUNT_CACHE_SECONDS if ttl is None else ttl
+        self._values: Dict[str, Tuple[int, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, db: Session) -> int:
+        key = str(db.get_bind().url)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._values.get(key)
+        if cached is not None and now - cached[1] < self.ttl:
+            return cached[0]
+
+        count = self._estimate(db)
+        with self._lock:
+            self._values[key] = (count, now)
+        return count
+
+    @staticmethod
+    def _estimate(db: Session) -> int:
+        if db.get_bind().dialect.name == "postgresql":
+            estimate = db.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE relname = :table"),
+                {"table": Prediction.__tablename__}
+            ).scalar()
+            # -1 / NULL until the table has been analyzed
+            if estimate is not None and estimate >= 0:
+                return int(estimate)
+        return db.query(func.count(Prediction.id)).scalar() or 0
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+# Global instance
+prediction_count_cache = PredictionCountCache()
+
+
+def get_prediction_count_cache() -> PredictionCountCache:
+    """Get the prediction count cache instance"""
+    return prediction_count_cache
@@ -0,0 +1,211 @@
+"""
+Prediction Writer
+Write-behind queue for Prediction rows.
+
+`/predict/` hands its row to the writer and answers right away; a background
+task inserts queued rows in one transaction per flush (PREDICTION_FLUSH_SIZE
+rows or PREDICTION_FLUSH_INTERVAL_MS, whichever comes first), so concurrent
+predictions no longer queue behind SQLite's writer lock one commit at a time.
+
+Rows get their public UUID when they are queued, which is the id clients
+see; a feedback call for a row that is still queued flushes it first.
+
+Clients already hold those ids, so a failed flush puts its rows back at the
+front of the queue for the next one. Rows that fail PREDICTION_WRITE_RETRIES
+times are appended to PREDICTION_SPILL_PATH (JSON lines, one insertable row
+each) instead of being lost.
+"""
+
+import os
+import json
+import uuid
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy import insert
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.prediction import Prediction
+
+logger = logging.getLogger(__name__)
+
+
+def new_public_id() -> str:
+    """Client-facing prediction id, allocated without a database round trip"""
+    return str(uuid.uuid4())
+
+
+class PredictionWriter:
+    """Batches Prediction inserts on a background task"""
+
+    def __init__(
+        self,
+        session_factory: Callable = SessionLocal,
+        flush_size: Optional[int] = None,
+        flush_interval_ms: Optional[float] = None,
+        max_pending: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        spill_path: Optional[str] = None
+    ):
+        self.session_factory = session_factory
+        flush_size = settings.PREDICTION_FLUSH_SIZE if flush_size is None else flush_size
+        flush_interval_ms = settings.PREDICTION_FLUSH_INTERVAL_MS if flush_interval_ms is None else flush_interval_ms
+        max_pending = settings.PREDICTION_MAX_PENDING if max_pending is None else max_pending
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval_ms / 1000  # 0 = flush as soon as a row is queued
+        self.max_pending = max(self.flush_size, max_pending)
+        self.max_retries = settings.PREDICTION_WRITE_RETRIES if max_retries is None else max_retries
+        self.spill_path = settings.PREDICTION_SPILL_PATH if spill_path is None else spill_path
+        self.buffer: List[Dict] = []
+        self.pending_ids = set()  # Queued or mid-flush, not yet committed
+        self.attempts: Dict[str, int] = {}  # Failed flushes per re-queued row
+        self.rows_written = 0
+        self.rows_spilled = 0
+        self.flushes = 0
+        self._wakeup: Optional[asyncio.Event] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self):
+        """Start the flush loop on the running event loop"""
+        if self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flush loop and write (or spill) everything still queued"""
+        if self._task is not None:
+            # No cancel: a flush in progress finishes, then the loop drains the queue and exits
+            self._stopping = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        # Each failed flush counts against the retries, so this ends with the rows written or spilled
+        while self.buffer:
+            await self.flush()
+
+    async def submit(self, **values) -> str:
+        """
+        Queue one Prediction row and return its public id
+
+        Without a running flush loop the row is written immediately.
+        """
+        row = dict(values)
+        row.setdefault("public_id", new_public_id())
+        row.setdefault("created_at", datetime.now(timezone.utc))
+        public_id = row["public_id"]
+
+        self.buffer.append(row)
+        self.pending_ids.add(public_id)
+        if not self.running or len(self.buffer) >= self.max_pending:
+            # No background task, or it is falling behind: this request pays for the flush
+            await self.flush()
+        elif len(self.buffer) >= self.flush_size or not self.flush_interval:
+            self._wakeup.set()
+        return public_id
+
+    def is_pending(self, public_id: str) -> bool:
+        return public_id in self.pending_ids
+
+    async def flush(self):
+        """Write all queued rows in one transaction"""
+        if self._flush_lock is None:
+            self._flush_lock = asyncio.Lock()
+        # The lock keeps flushes in order, so a caller that waited sees its rows committed
+        async with self._flush_lock:
+            batch, self.buffer = self.buffer, []
+            if not batch:
+                return
+            try:
+                await asyncio.to_thread(self._write, batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} prediction records: {e}")
+                await self._requeue(batch)
+                return
+            self.rows_written += len(batch)
+            self.flushes += 1
+            self._settle(batch)
+
+    async def _requeue(self, batch: List[Dict]):
+        """Put failed rows back ahead of newer ones; spill those out of retries"""
+        retry, spill = [], []
+        for row in batch:
+            attempts = self.attempts.get(row["public_id"], 0) + 1
+            self.attempts[row["public_id"]] = attempts
+            (retry if attempts <= self.max_retries else spill).append(row)
+        self.buffer[:0] = retry
+        if spill:
+            try:
+                await asyncio.to_thread(self._spill, spill)
+                self.rows_spilled += len(spill)
+                logger.error(f"Spilled {len(spill)} prediction records to {self.spill_path}")
+            except Exception as e:
+                logger.error(f"Dropped {len(spill)} prediction records that could not be written or spilled: {e}")
+            self._settle(spill)
+
+    def _settle(self, rows: List[Dict]):
+        for row in rows:
+            self.pending_ids.discard(row["public_id"])
+            self.attempts.pop(row["public_id"], None)
+
+    def _spill(self, rows: List[Dict]):
+        if not self.spill_path:
+            raise RuntimeError("PREDICTION_SPILL_PATH is not set")
+        directory = os.path.dirname(self.spill_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.spill_path, "a") as f:
+            for row in rows:
+                f.write(json.dumps(row, default=str) + "\n")
+
+    def _write(self, batch: List[Dict]):
+        db = self.session_factory()
+        try:
+            db.execute(insert(Prediction), batch)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval or None)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def stats(self) -> Dict:
+        return {
+            "queued": len(self.buffer),
+            "retrying": len(self.attempts),
+            "rows_written": self.rows_written,
+            "rows_spilled": self.rows_spilled,
+            "flushes": self.flushes
+        }
+
+
+# Global instance
+prediction_writer: Optional[PredictionWriter] = None
+
+
+def get_prediction_writer() -> PredictionWriter:
+    """Get the prediction writer instance"""
+    global prediction_writer
+    if prediction_writer is None:
+        prediction_writer = PredictionWriter()
+    return prediction_writer
@@ -0,0 +1,253 @@
+"""
+Image Preprocessing
+Fast decode paths that turn upload bytes into model-ready NCHW tensors.
+
+JPEGs are decoded at a reduced DCT scale when the target is much smaller than
+the photo (Pillow draft mode or OpenCV IMREAD_REDUCED_*), and pixels are
+written straight into a caller-provided float32 NCHW buffer.
+
+Decoded images are kept in a content-hashed LRU cache shared by the ML and
+explainability services, so one upload is decoded once per request chain.
+"""
+
+import io
+import hashlib
+import logging
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from PIL import Image
+
+from app.config import settings
+
+try:
+    import cv2
+    OPENCV_AVAILABLE = True
+except ImportError:
+    OPENCV_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# (scale factor, imdecode flag) from most to least reduced
+_OPENCV_REDUCED_FLAGS = (
+    [
+        (8, cv2.IMREAD_REDUCED_COLOR_8),
+        (4, cv2.IMREAD_REDUCED_COLOR_4),
+        (2, cv2.IMREAD_REDUCED_COLOR_2),
+    ]
+    if OPENCV_AVAILABLE else []
+)
+
+
+def decode_pillow(image_bytes: bytes, target_size: Tuple[int, int], draft: bool = True) -> np.ndarray:
+    """
+    Decode to an RGB uint8 array of `target_size` (width, height) with Pillow
+
+    With `draft`, JPEG decoding happens at the smallest 1/2, 1/4 or 1/8 scale
+    that is still at least `target_size`, so a 12MP photo never gets fully
+    decoded just to be shrunk to 224x224.
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    if draft and image.format == "JPEG":
+        image.draft("RGB", target_size)
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    if image.size != tuple(target_size):
+        image = image.resize(target_size)
+    return np.asarray(image)
+
+
+def decode_opencv(image_bytes: bytes, target_size: Tuple[int, int]) -> np.ndarray:
+    """
+    Decode to an RGB uint8 array of `target_size` (width, height) with OpenCV
+
+    The header is read first (no pixel decode) to pick the strongest
+    IMREAD_REDUCED_COLOR_* factor that keeps the image at least target-sized.
+    """
+    width, height = Image.open(io.BytesIO(image_bytes)).size
+    flag = cv2.IMREAD_COLOR
+    for factor, reduced_flag in _OPENCV_REDUCED_FLAGS:
+        if width // factor >= target_size[0] and height // factor >= target_size[1]:
+            flag = reduced_flag
+            break
+
+    bgr = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), flag)
+    if bgr is None:
+        raise ValueError("OpenCV could not decode image")
+    if (bgr.shape[1], bgr.shape[0]) != tuple(target_size):
+        bgr = cv2.resize(bgr, target_size, interpolation=cv2.INTER_AREA)
+    return bgr[:, :, ::-1]
+
+
+def decode_image(
+    image_bytes: bytes,
+    target_size: Tuple[int, int] = (224, 224),
+    backend: str = "pillow",
+    draft: bool = True
+) -> np.ndarray:
+    """Decode upload bytes to an HWC RGB uint8 array of `target_size`"""
+    if backend == "opencv" and OPENCV_AVAILABLE:
+        return decode_opencv(image_bytes, target_size)
+    return decode_pillow(image_bytes, target_size, draft=draft)
+
+
+def normalize_into(rgb: np.ndarray, out: np.ndarray, scaling: str = "symmetric") -> np.ndarray:
+    """
+    Write an HWC uint8 image into a CHW float32 slot
+
+    Args:
+        scaling: "symmetric" for [-1, 1] (MobileNetV2/ViT) or "raw" for
+            [0, 255] (EfficientNetV2, which rescales internally)
+
+    The transpose is a view, so the only copy is the cast into `out`;
+    scaling then happens in place.
+    """
+    np.copyto(out, rgb.transpose(2, 0, 1), casting="unsafe")
+    if scaling == "symmetric":
+        out *= 1.0 / 127.5
+        out -= 1.0
+    elif scaling != "raw":
+        raise ValueError(f"Unknown input scaling: {scaling}")
+    return out
+
+
+def preprocess_into(
+    image_bytes: bytes,
+    out: np.ndarray,
+    backend: str = "pillow",
+    draft: bool = True
+) -> np.ndarray:
+    """Decode and normalize one image directly into a CHW float32 buffer row"""
+    target_size = (out.shape[2], out.shape[1])
+    return normalize_into(decode_image(image_bytes, target_size, backend, draft), out)
+
+
+def allocate_batch(batch_size: int, target_size: Tuple[int, int] = (224, 224)) -> np.ndarray:
+    """Preallocated NCHW float32 batch buffer for `target_size` (width, height)"""
+    return np.empty((batch_size, 3, target_size[1], target_size[0]), dtype=np.float32)
+
+
+class PreprocessedImage:
+    """A decoded, resized upload from which per-model tensors are derived"""
+
+    __slots__ = ("digest", "rgb")
+
+    def __init__(self, digest: str, rgb: np.ndarray):
+        self.digest = digest
+        # Shared between requests and services: never mutate in place
+        rgb.setflags(write=False)
+        self.rgb = rgb
+
+    @property
+    def size(self) -> Tuple[int, int]:
+        """(width, height)"""
+        return self.rgb.shape[1], self.rgb.shape[0]
+
+    def write_view(self, out: np.ndarray, scaling: str = "symmetric") -> np.ndarray:
+        """Write this image into a CHW float32 batch row with the given scaling"""
+        return normalize_into(self.rgb, out, scaling)
+
+    def view(self, scaling: str = "symmetric") -> np.ndarray:
+        """Fresh [1, 3, H, W] float32 tensor with the given scaling"""
+        out = allocate_batch(1, self.size)
+        self.write_view(out[0], scaling)
+        return out
+
+
+def stack_views(images, scalings) -> Dict[str, np.ndarray]:
+    """Build one NCHW batch per requested scaling from preprocessed images"""
+    batches = {}
+    for scaling in scalings:
+        batch = allocate_batch(len(images), images[0].size)
+        for row, image in enumerate(images):
+            image.write_view(batch[row], scaling)
+        batches[scaling] = batch
+    return batches
+
+
+def image_digest(image_bytes: bytes) -> str:
+    """SHA-256 hex digest identifying an upload by content"""
+    return hashlib.sha256(image_bytes).hexdigest()
+
+
+class PreprocessCache:
+    """
+    Bounded LRU of decoded images keyed by content hash and decode parameters
+
+    Stores the uint8 RGB pixels (~150 KB per 224x224 image); float tensors
+    for each model are derived on demand, which costs far less than a decode.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[tuple, PreprocessedImage]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        image_bytes: bytes,
+        target_size: Tuple[int, int] = (224, 224),
+        digest: Optional[str] = None,
+        store: bool = True
+    ) -> PreprocessedImage:
+        """
+        Return the decoded image for `image_bytes`, decoding on a miss
+
+        Args:
+            digest: Precomputed SHA-256 of the bytes, if the caller has one
+            store: Insert on a miss; bulk jobs pass False to avoid evicting
+                the interactive working set
+        """
+        digest = digest or image_digest(image_bytes)
+        key = (digest, tuple(target_size), settings.IMAGE_DECODE_BACKEND, settings.IMAGE_DECODE_DRAFT)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        rgb = decode_image(
+            image_bytes,
+            target_size,
+            backend=settings.IMAGE_DECODE_BACKEND,
+            draft=settings.IMAGE_DECODE_DRAFT
+        )
+        entry = PreprocessedImage(digest, np.ascontiguousarray(rgb))
+
+        if store and self.max_entries > 0:
+            with self._lock:
+                self._entries[key] = entry
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        """Drop every cached image"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Occupancy and hit/miss counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+# Global cache shared by the ML and explainability services
+preprocess_cache = PreprocessCache(settings.PREPROCESS_CACHE_SIZE)
+
+
+def get_preprocess_cache() -> PreprocessCache:
+    """Get shared preprocessing cache instance"""
+    return preprocess_cache
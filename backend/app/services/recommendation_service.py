@@ -3,14 +3,18 @@ Recommendation Service
 Content-based filtering for plant recommendations
 """
 
+import os
 import logging
+import threading
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-import numpy as np
 
+from app.config import settings
 from app.models.plant import Plant, MedicinalProperty
+from app.services.ailment_index import AilmentIndex
+from app.services.similarity_index import SimilarityIndex, plant_summary, track_catalogue_changes
+from app.services.vector_index import IVFIndex
+from app.services.visual_index import VisualIndex
 
 logger = logging.getLogger(__name__)
 
@@ -19,9 +23,116 @@ class RecommendationService:
     """Service for generating plant recommendations"""
     
     def __init__(self):
-        self.vectorizer = None
-        self.plant_vectors = None
-        self.plant_ids = []
+        # TF-IDF vectors and top-K neighbours, kept current by catalogue change events
+        self.similarity_index = SimilarityIndex(top_k=settings.RECOMMENDATION_TOP_K)
+        # Normalized, stemmed ailment terms -> medicinal properties, kept current the same way
+        self.ailment_index = AilmentIndex()
+        # Optional dense plant embeddings with ANN search, for catalogues too large for exact scoring
+        self.embedding_index: Optional[IVFIndex] = None
+        self._embedding_index_dir: Optional[str] = None
+        self._embedding_lock = threading.Lock()
+        # Reference leaf images by model embedding, for /recommend/visual
+        self.visual_index: Optional[VisualIndex] = None
+        self._visual_index_key = None
+    
+    def build_index(self, db: Session):
+        """Build the similarity index up front (startup) instead of on the first request"""
+        self.similarity_index.build(db)
+        self.ailment_index.build(db)
+        self.get_embedding_index()
+        self.get_visual_index()
+    
+    def get_embedding_index(self) -> Optional[IVFIndex]:
+        """The PLANT_EMBEDDING_INDEX_DIR index (memory-mapped), or None when unset/missing"""
+        directory = settings.PLANT_EMBEDDING_INDEX_DIR
+        if not directory:
+            return None
+        with self._embedding_lock:
+            if self._embedding_index_dir != directory:
+                self.embedding_index = None
+                self._embedding_index_dir = directory
+                if os.path.exists(os.path.join(directory, "index.json")):
+                    try:
+                        self.embedding_index = IVFIndex.load(directory, nprobe=settings.ANN_NPROBE)
+                        logger.info(f"Loaded {len(self.embedding_index)} plant embeddings from {directory}")
+                    except Exception as e:
+                        logger.error(f"Failed to load plant embedding index: {e}")
+                else:
+                    logger.warning(f"Plant embedding index not found at {directory}")
+            return self.embedding_index
+    
+    def get_visual_index(self) -> Optional[VisualIndex]:
+        """
+        The VISUAL_INDEX_DIR index (memory-mapped), or None when unset/missing
+        
+        Reopened when the build job rewrites it, so a rebuilt or first-time
+        index is served without a restart.
+        """
+        directory = settings.VISUAL_INDEX_DIR
+        if not directory:
+            return None
+        manifest = os.path.join(directory, "index.json")
+        key = (directory, os.path.getmtime(manifest) if os.path.exists(manifest) else None)
+        with self._embedding_lock:
+            if self._visual_index_key != key:
+                self.visual_index = None
+                self._visual_index_key = key
+                if key[1] is not None:
+                    try:
+                        self.visual_index = VisualIndex.load(directory, nprobe=settings.ANN_NPROBE)
+                        logger.info(f"Loaded {len(self.visual_index)} reference image embeddings from {directory}")
+                        if self.visual_index.model != settings.VISUAL_EMBEDDING_MODEL:
+                            logger.warning(
+                                f"Visual index was built with {self.visual_index.model} embeddings, "
+                                f"VISUAL_EMBEDDING_MODEL is {settings.VISUAL_EMBEDDING_MODEL}"
+                            )
+                    except Exception as e:
+                        logger.error(f"Failed to load visual index: {e}")
+                else:
+                    logger.warning(f"Visual index not found at {directory}")
+            return self.visual_index
+    
+    def get_similar_images(self, embedding, db: Session, limit: int = 10) -> List[Dict]:
+        """
+        Reference images that look most like an image embedding
+        
+        Each match carries its label and, when the label is a catalogue
+        species, that plant's summary (one query for all matches).
+        
+        Raises:
+            RuntimeError: no visual index is loaded
+            ValueError: the embedding doesn't match the index dimension
+        """
+        index = self.get_visual_index()
+        if index is None:
+            raise RuntimeError("Visual index not available")
+        matches = index.search(embedding, limit=limit, nprobe=settings.ANN_NPROBE)
+        labels = {match["label"] for match in matches}
+        plants = {
+            plant.species_name: plant_summary(plant)
+            for plant in db.query(Plant).filter(Plant.species_name.in_(labels))
+        } if labels else {}
+        return [{**match, "plant": plants.get(match["label"])} for match in matches]
+    
+    def _similar_by_embedding(self, plant_id: int, db: Session, limit: int) -> Optional[List[Dict]]:
+        """ANN neighbours of a plant's embedding; None if the plant has no embedding"""
+        index = self.get_embedding_index()
+        query = index.vector(plant_id) if index is not None else None
+        if query is None:
+            return None
+        ids, scores = index.search(query, k=limit + 1, nprobe=settings.ANN_NPROBE)
+        neighbors = [
+            (int(i), float(score)) for i, score in zip(ids[0], scores[0])
+            if i >= 0 and i != plant_id
+        ][:limit]
+        plants = {
+            plant.id: plant
+            for plant in db.query(Plant).filter(Plant.id.in_([i for i, _ in neighbors]))
+        }
+        return [
+            {**plant_summary(plants[i]), "similarity_score": score}
+            for i, score in neighbors if i in plants
+        ]
     
     def get_similar_plants(
         self,
@@ -41,75 +152,17 @@ class RecommendationService:
             List of similar plants with similarity scores
         """
         try:
-            # Get the reference plant
-            reference_plant = db.query(Plant).filter(Plant.id == plant_id).first()
-            if not reference_plant:
+            similar = self._similar_by_embedding(plant_id, db, limit)
+            if similar is None:
+                self.similarity_index.ensure_current(db)
+                similar = self.similarity_index.similar(plant_id, limit)
+            if not similar:
                 return []
             
-            # Get all plants with their medicinal properties
-            plants = db.query(Plant).all()
-            
-            if len(plants) < 2:
-                return []
-            
-            # Build feature vectors
-            plant_features = []
-            plant_data = []
-            
-            for plant in plants:
-                # Combine medicinal properties into a text feature
-                properties = db.query(MedicinalProperty).filter(
-                    MedicinalProperty.plant_id == plant.id
-                ).all()
-                
-                feature_text = " ".join([
-                    f"{prop.ailment} {prop.usage_description or ''}"
-                    for prop in properties
-                ])
-                
-                if not feature_text.strip():
-                    feature_text = plant.description or plant.species_name
-                
-                plant_features.append(feature_text)
-                plant_data.append({
-                    "id": plant.id,
-                    "species_name": plant.species_name,
-                    "common_name": plant.common_name_en,
-                    "description": plant.description
-                })
-            
-            # Calculate TF-IDF vectors
-            vectorizer = TfidfVectorizer(stop_words='english', max_features=100)
-            tfidf_matrix = vectorizer.fit_transform(plant_features)
-            
-            # Find the reference plant index
-            ref_idx = next(
-                (i for i, p in enumerate(plant_data) if p["id"] == plant_id),
-                None
-            )
-            
-            if ref_idx is None:
-                return []
-            
-            # Calculate cosine similarity
-            similarities = cosine_similarity(
-                tfidf_matrix[ref_idx:ref_idx+1],
-                tfidf_matrix
-            )[0]
-            
-            # Get top similar plants (excluding the reference plant itself)
-            similar_indices = np.argsort(similarities)[::-1]
-            similar_indices = [i for i in similar_indices if i != ref_idx][:limit]
-            
-            recommendations = []
-            for idx in similar_indices:
-                recommendations.append({
-                    **plant_data[idx],
-                    "similarity_score": float(similarities[idx]),
-                    "reason": "Similar medicinal properties"
-                })
-            
-            return recommendations
+            return [
+                {**plant, "reason": "Similar medicinal properties"}
+                for plant in similar
+            ]
             
         except Exception as e:
             logger.error(f"Error getting similar plants: {e}")
@@ -124,47 +177,48 @@ class RecommendationService:
         """
         Get plants that can treat a specific ailment
         
+        Matches go through the ailment index (stemming, synonyms, prefixes),
+        which ranks one property per plant by text relevance and efficacy
+        rating; the winning rows are then read in one joined query.
+        
         Args:
             ailment: The ailment/condition to search for
             db: Database session
-            limit: Maximum number of results
+            limit: Maximum number of plants
             
         Returns:
-            List of plants that can treat the ailment
+            List of plants that can treat the ailment, best match first
         """
         try:
-            # Search for medicinal properties matching the ailment
-            properties = db.query(MedicinalProperty).filter(
-                MedicinalProperty.ailment.ilike(f"%{ailment}%")
-            ).limit(limit).all()
+            self.ailment_index.ensure_current(db)
+            matches = self.ailment_index.search(ailment, limit=limit)
+            if not matches:
+                return []
             
-            results = []
-            seen_plant_ids = set()
+            rows = {
+                prop.id: (prop, plant)
+                for prop, plant in db.query(MedicinalProperty, Plant)
+                .join(Plant, MedicinalProperty.plant_id == Plant.id)
+                .filter(MedicinalProperty.id.in_([property_id for _, property_id, _ in matches]))
+            }
             
-            for prop in properties:
-                if prop.plant_id in seen_plant_ids:
+            results = []
+            for _, property_id, relevance in matches:
+                if property_id not in rows:
                     continue
-                
-                plant = db.query(Plant).filter(Plant.id == prop.plant_id).first()
-                if plant:
-                    results.append({
-                        "id": plant.id,
-                        "species_name": plant.species_name,
-                        "common_name": plant.common_name_en,
-                        "ailment": prop.ailment,
-                        "usage": prop.usage_description,
-                        "preparation": prop.preparation_method,
-                        "dosage": prop.dosage,
-                        "precautions": prop.precautions,
-                        "efficacy_rating": prop.efficacy_rating
-                    })
-                    seen_plant_ids.add(prop.plant_id)
-            
-            # Sort by efficacy rating if available
-            results.sort(
-                key=lambda x: x.get("efficacy_rating", 0) or 0,
-                reverse=True
-            )
+                prop, plant = rows[property_id]
+                results.append({
+                    "id": plant.id,
+                    "species_name": plant.species_name,
+                    "common_name": plant.common_name_en,
+                    "ailment": prop.ailment,
+                    "usage": prop.usage_description,
+                    "preparation": prop.preparation_method,
+                    "dosage": prop.dosage,
+                    "precautions": prop.precautions,
+                    "efficacy_rating": prop.efficacy_rating,
+                    "relevance": round(relevance, 3)
+                })
             
             return results
             
@@ -216,6 +270,8 @@ class RecommendationService:
 
 # Global instance
 recommendation_service = RecommendationService()
+track_catalogue_changes(recommendation_service.similarity_index)
+track_catalogue_changes(recommendation_service.ailment_index)
 
 
 def get_recommendation_service() -> RecommendationService:
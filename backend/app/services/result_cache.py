@@ -0,0 +1,166 @@
+"""
+Prediction Result Cache
+Content-addressed LRU + TTL cache of formatted predictions.
+
+Entries are keyed by the upload's SHA-256 and the model fingerprint (model
+files, class names and ensemble weights in use), so a reload with different
+models can never serve stale results. An optional on-disk tier keeps results
+across restarts and between workers.
+"""
+
+import os
+import json
+import time
+import copy
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def model_fingerprint(model_paths: Iterable[str], **extra) -> str:
+    """
+    Short hash identifying the models (path, size, mtime) and any extra
+    inference parameters that change results (class names, weights, ...)
+    """
+    parts = []
+    for path in model_paths:
+        if path and os.path.exists(path):
+            stat = os.stat(path)
+            parts.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    parts.append(extra)
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:16]
+
+
+class ResultCache:
+    """Thread-safe LRU of prediction dicts with per-entry expiry"""
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 3600, disk_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self.fingerprint = ""
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+
+    @property
+    def enabled(self) -> bool:
+        """Whether any tier can hold entries"""
+        return self.max_entries > 0 or bool(self.disk_dir)
+
+    def set_fingerprint(self, fingerprint: str):
+        """Switch to a new model fingerprint, dropping in-memory results of the old one"""
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                if self._entries:
+                    logger.info("Model fingerprint changed; prediction result cache invalidated")
+                self._entries.clear()
+                self.fingerprint = fingerprint
+
+    def get(self, digest: str) -> Optional[Dict]:
+        """Cached prediction for an image digest, or None"""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at > now:
+                    self._entries.move_to_end(digest)
+                    self.hits += 1
+                    return copy.deepcopy(result)
+                del self._entries[digest]
+
+        result = self._disk_get(digest, now)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+        self._memory_put(digest, result, now)
+        return copy.deepcopy(result)
+
+    def put(self, digest: str, result: Dict, fingerprint: Optional[str] = None):
+        """
+        Store a prediction for an image digest
+
+        Args:
+            fingerprint: Fingerprint of the models that produced `result`;
+                dropped if those are no longer the ones being served
+        """
+        if not self.enabled or (fingerprint is not None and fingerprint != self.fingerprint):
+            return
+        now = time.time()
+        result = copy.deepcopy(result)
+        self._memory_put(digest, result, now)
+        self._disk_put(digest, result)
+
+    def clear(self):
+        """Drop in-memory entries (the disk tier is left to expire)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Occupancy and hit/miss counters"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "fingerprint": self.fingerprint
+            }
+
+    def _memory_put(self, digest: str, result: Dict, now: float):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[digest] = (now + self.ttl_seconds, result)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _disk_path(self, digest: str) -> str:
+        # Sharded by fingerprint and digest prefix to keep directories small
+        return os.path.join(self.disk_dir, self.fingerprint, digest[:2], f"{digest}.json")
+
+    def _disk_get(self, digest: str, now: float) -> Optional[Dict]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(digest)
+        try:
+            if os.path.getmtime(path) + self.ttl_seconds <= now:
+                os.remove(path)
+                return None
+            with open(path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _disk_put(self, digest: str, result: Dict):
+        if not self.disk_dir:
+            return
+        path = self._disk_path(digest)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write-then-rename so concurrent workers never read a partial file
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Could not persist cached prediction: {e}")
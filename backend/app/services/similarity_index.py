@@ -0,0 +1,307 @@
+"""
+Similarity Index
+Precomputed content-based neighbours for RecommendationService.
+
+The index keeps the TF-IDF matrix of every plant's medicinal-property text
+(sparse, L2-normalized rows) and a table of each plant's top-K most similar
+plants, so a lookup is a slice of that table. It is built once from two
+queries (plants, properties) and then maintained incrementally: committed
+changes to Plant / MedicinalProperty rows mark their plants dirty, and the
+next lookup re-vectorizes just those plants with the fitted vocabulary and
+recomputes only the neighbour rows they can affect. A full refit (new IDF
+weights and vocabulary) happens when a large share of the catalogue has
+changed since the last one.
+
+Session events only see writes made in this process. Writes by other
+gunicorn workers or scripts are noticed by CatalogueWatch, which compares
+a cheap catalogue version (row counts, max ids, latest plant updated_at) at
+most every CATALOGUE_CHECK_SECONDS and triggers a rebuild when it moved.
+An in-place edit of a medicinal property row made elsewhere does not change
+that version, so it is only picked up with the next change that does.
+"""
+
+import time
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from sqlalchemy import event, func
+from sqlalchemy.orm import Session
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.config import settings
+from app.models.plant import Plant, MedicinalProperty
+
+logger = logging.getLogger(__name__)
+
+# Rows of the similarity matrix materialized at once while building neighbour tables
+SCORE_BLOCK_ROWS = 512
+
+
+def plant_feature_text(plant: Plant, properties: Iterable[MedicinalProperty]) -> str:
+    """Text a plant is compared on: its properties, else its description or name"""
+    feature_text = " ".join(f"{prop.ailment} {prop.usage_description or ''}" for prop in properties)
+    if not feature_text.strip():
+        feature_text = plant.description or plant.species_name
+    return feature_text
+
+
+def plant_summary(plant: Plant) -> Dict:
+    return {
+        "id": plant.id,
+        "species_name": plant.species_name,
+        "common_name": plant.common_name_en,
+        "description": plant.description
+    }
+
+
+def catalogue_version(db: Session) -> Tuple:
+    """Changes whenever plants or properties are added or removed, or a plant is edited through the ORM"""
+    plants = db.query(func.count(Plant.id), func.max(Plant.id), func.max(Plant.updated_at)).one()
+    properties = db.query(func.count(MedicinalProperty.id), func.max(MedicinalProperty.id)).one()
+    return (*plants, *properties)
+
+
+class CatalogueWatch:
+    """Notices catalogue writes made outside this process (other workers, scripts)"""
+
+    def __init__(self):
+        self.version: Optional[Tuple] = None
+        self.checked_at = 0.0
+
+    def stamp(self, db: Session):
+        """Record the catalogue as the index now reflects it"""
+        self.version = catalogue_version(db)
+        self.checked_at = time.monotonic()
+
+    def changed(self, db: Session) -> bool:
+        """Whether the catalogue moved since the last stamp (checked at most every CATALOGUE_CHECK_SECONDS)"""
+        now = time.monotonic()
+        if now - self.checked_at < settings.CATALOGUE_CHECK_SECONDS:
+            return False
+        self.checked_at = now
+        return catalogue_version(db) != self.version
+
+
+class SimilarityIndex:
+    """Sparse TF-IDF matrix plus a top-K neighbour table over all plants"""
+
+    def __init__(self, top_k: int = 20, refit_fraction: float = 0.2):
+        self.top_k = top_k
+        self.refit_fraction = refit_fraction  # Changed share of plants that triggers a full refit
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.vectorizer: Optional[TfidfVectorizer] = None
+        self.plant_vectors: Optional[sp.csr_matrix] = None  # [N, vocab], one row per plant_ids entry
+        self.plant_ids = np.zeros(0, dtype=np.int64)
+        self.plants: Dict[int, Dict] = {}
+        self.neighbor_ids: Dict[int, np.ndarray] = {}  # plant id -> up to top_k plant ids, best first
+        self.neighbor_scores: Dict[int, np.ndarray] = {}
+        self.bind_key: Optional[str] = None
+        self.changed_since_fit = 0
+        self._row_of: Dict[int, int] = {}
+        self._dirty: Set[int] = set()
+        self._watch = CatalogueWatch()
+
+    @property
+    def built(self) -> bool:
+        return self.vectorizer is not None
+
+    def clear(self):
+        with self._lock:
+            self._reset()
+
+    def mark_dirty(self, plant_ids: Iterable[int]):
+        with self._lock:
+            self._dirty.update(plant_ids)
+
+    def ensure_current(self, db: Session):
+        """Build on first use (or for a different database), then apply pending changes"""
+        with self._lock:
+            if not self.built or self.bind_key != str(db.get_bind().url):
+                self.build(db)
+            elif self._dirty:
+                dirty, self._dirty = self._dirty, set()
+                self.update(db, dirty)
+                self._watch.stamp(db)
+            elif self._watch.changed(db):
+                logger.info("Catalogue changed outside this process; rebuilding similarity index")
+                self.build(db)
+
+    def build(self, db: Session):
+        """Fit the vectorizer on the whole catalogue and compute every neighbour list"""
+        with self._lock:
+            self._watch.stamp(db)
+            plants = db.query(Plant).order_by(Plant.id).all()
+            texts = self._feature_texts(db, plants)
+            self.bind_key = str(db.get_bind().url)
+            self._dirty.clear()
+            self.changed_since_fit = 0
+            self.plants = {plant.id: plant_summary(plant) for plant in plants}
+            self.plant_ids = np.array([plant.id for plant in plants], dtype=np.int64)
+            self._row_of = {plant_id: row for row, plant_id in enumerate(self.plant_ids.tolist())}
+            self.neighbor_ids, self.neighbor_scores = {}, {}
+
+            self.vectorizer = TfidfVectorizer(stop_words='english', max_features=100)
+            if not plants:
+                self.plant_vectors = sp.csr_matrix((0, 0), dtype=np.float32)
+                return
+            try:
+                self.plant_vectors = self.vectorizer.fit_transform(
+                    [texts[plant.id] for plant in plants]
+                ).astype(np.float32).tocsr()
+            except ValueError:
+                # Only stop words: every plant gets an empty vector
+                self.vectorizer.fit(["placeholder"])
+                self.plant_vectors = sp.csr_matrix((len(plants), 1), dtype=np.float32)
+            self._recompute_rows(np.arange(len(plants)))
+            logger.info(f"Similarity index built for {len(plants)} plants")
+
+    def update(self, db: Session, plant_ids: Iterable[int]):
+        """Re-vectorize the given plants (added, edited or deleted) and repair affected neighbour lists"""
+        with self._lock:
+            plant_ids = set(plant_ids)
+            self.changed_since_fit += len(plant_ids)
+            if self.changed_since_fit > self.refit_fraction * max(len(self.plant_ids), 1):
+                self.build(db)
+                return
+
+            plants = db.query(Plant).filter(Plant.id.in_(plant_ids)).all()
+            texts = self._feature_texts(db, plants)
+            present = {plant.id for plant in plants}
+            removed = plant_ids - present
+
+            # Rewrite the matrix: unchanged rows, then the changed plants' fresh vectors
+            keep = [row for row, plant_id in enumerate(self.plant_ids.tolist()) if plant_id not in plant_ids]
+            new_vectors = self.vectorizer.transform([texts[plant.id] for plant in plants]).astype(np.float32)
+            self.plant_vectors = sp.vstack([self.plant_vectors[keep], new_vectors], format="csr")
+            self.plant_ids = np.concatenate([self.plant_ids[keep], np.array([p.id for p in plants], dtype=np.int64)])
+            self._row_of = {plant_id: row for row, plant_id in enumerate(self.plant_ids.tolist())}
+            for plant in plants:
+                self.plants[plant.id] = plant_summary(plant)
+            for plant_id in removed:
+                self.plants.pop(plant_id, None)
+                self.neighbor_ids.pop(plant_id, None)
+                self.neighbor_scores.pop(plant_id, None)
+
+            # Lists that contained a changed plant may need a plant ranked below their old cut-off
+            stale = set(present)
+            for plant_id, neighbors in self.neighbor_ids.items():
+                if plant_id not in stale and not plant_ids.isdisjoint(neighbors.tolist()):
+                    stale.add(plant_id)
+            # A changed plant can also push its way into lists that never held it
+            if plants:
+                changed_rows = [self._row_of[plant.id] for plant in plants]
+                scores = (self.plant_vectors @ self.plant_vectors[changed_rows].T).toarray().max(axis=1)
+                for row, plant_id in enumerate(self.plant_ids.tolist()):
+                    if plant_id in stale:
+                        continue
+                    floor = self.neighbor_scores.get(plant_id)
+                    if floor is None or len(floor) < self.top_k or scores[row] > floor[-1]:
+                        stale.add(plant_id)
+
+            self._recompute_rows(np.array(sorted(self._row_of[plant_id] for plant_id in stale), dtype=np.int64))
+
+    def similar(self, plant_id: int, limit: int) -> Optional[List[Dict]]:
+        """
+        Up to `limit` most similar plants, best first; None if the plant is not indexed
+
+        O(limit) from the neighbour table while limit <= top_k; larger limits
+        score this one plant against the whole matrix.
+        """
+        with self._lock:
+            if plant_id not in self._row_of:
+                return None
+            if limit <= self.top_k:
+                ids = self.neighbor_ids[plant_id][:limit].tolist()
+                scores = self.neighbor_scores[plant_id][:limit].tolist()
+            else:
+                ids, scores = self._rank_row(self._row_of[plant_id], limit)
+            return [
+                {**self.plants[neighbor_id], "similarity_score": score}
+                for neighbor_id, score in zip(ids, scores)
+            ]
+
+    def stats(self) -> Dict:
+        return {
+            "plants": len(self.plant_ids),
+            "vocabulary": self.plant_vectors.shape[1] if self.plant_vectors is not None else 0,
+            "top_k": self.top_k,
+            "pending_updates": len(self._dirty),
+            "changed_since_fit": self.changed_since_fit
+        }
+
+    @staticmethod
+    def _feature_texts(db: Session, plants: List[Plant]) -> Dict[int, str]:
+        """Feature text per plant from a single properties query"""
+        properties: Dict[int, List[MedicinalProperty]] = {plant.id: [] for plant in plants}
+        if plants:
+            query = db.query(MedicinalProperty).filter(MedicinalProperty.plant_id.in_(list(properties)))
+            for prop in query.order_by(MedicinalProperty.id):
+                properties[prop.plant_id].append(prop)
+        return {plant.id: plant_feature_text(plant, properties[plant.id]) for plant in plants}
+
+    def _rank_row(self, row: int, limit: int):
+        scores = (self.plant_vectors[row] @ self.plant_vectors.T).toarray()[0]
+        scores[row] = -np.inf
+        order = np.argsort(-scores, kind="stable")[:min(limit, len(scores) - 1)]
+        return self.plant_ids[order].tolist(), scores[order].astype(float).tolist()
+
+    def _recompute_rows(self, rows: np.ndarray):
+        """Neighbour lists of the given matrix rows, a block of rows at a time"""
+        num_plants = len(self.plant_ids)
+        k = min(self.top_k, num_plants - 1)
+        transposed = self.plant_vectors.T.tocsc()
+        for start in range(0, len(rows), SCORE_BLOCK_ROWS):
+            block = rows[start:start + SCORE_BLOCK_ROWS]
+            scores = (self.plant_vectors[block] @ transposed).toarray()
+            scores[np.arange(len(block)), block] = -np.inf  # Never your own neighbour
+            if k <= 0:
+                top = np.zeros((len(block), 0), dtype=np.int64)
+            elif k < num_plants - 1:
+                top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+            else:
+                top = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+            top_scores = np.take_along_axis(scores, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            top = np.take_along_axis(top, order, axis=1)
+            top_scores = np.take_along_axis(top_scores, order, axis=1)
+            for i, row in enumerate(block.tolist()):
+                plant_id = int(self.plant_ids[row])
+                self.neighbor_ids[plant_id] = self.plant_ids[top[i]]
+                self.neighbor_scores[plant_id] = top_scores[i].astype(np.float32)
+
+
+def track_catalogue_changes(index):
+    """
+    Mark plants dirty in `index` when Plant / MedicinalProperty rows change
+
+    `index` is anything with a mark_dirty(plant_ids) method (SimilarityIndex,
+    AilmentIndex). Changes are collected per session on flush and handed
+    over on commit, so rolled back changes never reach the index.
+    """
+    key = f"catalogue_dirty_{id(index)}"
+
+    def after_flush(session, flush_context):
+        changed = session.info.setdefault(key, set())
+        for obj in (*session.new, *session.dirty, *session.deleted):
+            if isinstance(obj, Plant) and obj.id is not None:
+                changed.add(obj.id)
+            elif isinstance(obj, MedicinalProperty) and obj.plant_id is not None:
+                changed.add(obj.plant_id)
+
+    def after_commit(session):
+        changed = session.info.pop(key, None)
+        if changed:
+            index.mark_dirty(changed)
+
+    def after_rollback(session):
+        session.info.pop(key, None)
+
+    event.listen(Session, "after_flush", after_flush)
+    event.listen(Session, "after_commit", after_commit)
+    event.listen(Session, "after_rollback", after_rollback)
@@ -0,0 +1,97 @@
+"""
+Upload Reader
+Bounded, validating reads of image uploads.
+
+By the time a route runs, Starlette has spooled the multipart part (to disk
+past 1MB) and UploadLimitMiddleware has capped how much of the request body
+got that far. The reader then pulls the part in UPLOAD_CHUNK_SIZE chunks,
+hashing each one as it comes, checks the first bytes against the known image
+signatures and stops as soon as MAX_UPLOAD_SIZE is crossed, so an oversized
+or non-image upload is never buffered whole. The accepted bytes end up in one
+buffer that is shared by the decoder, the result cache key and the upload
+store.
+"""
+
+import hashlib
+from typing import Optional
+
+from fastapi import UploadFile
+
+from app.config import settings
+from app.services.upload_store import sniff_image_extension
+
+
+class UploadRejected(ValueError):
+    """Upload refused before it reached the model; `status_code` is the HTTP status to answer with"""
+
+    status_code = 400
+
+
+class UploadTooLarge(UploadRejected):
+    status_code = 413
+
+
+class UnsupportedImageType(UploadRejected):
+    status_code = 400
+
+
+class ImageUpload:
+    """Validated upload bytes with their SHA-256 and sniffed extension"""
+
+    __slots__ = ("data", "digest", "extension", "filename")
+
+    def __init__(self, data: bytes, digest: str, extension: str, filename: Optional[str]):
+        self.data = data
+        self.digest = digest
+        self.extension = extension
+        self.filename = filename
+
+    @property
+    def size(self) -> int:
+        return len(self.data)
+
+
+async def read_image_upload(
+    file: UploadFile,
+    max_size: Optional[int] = None,
+    chunk_size: Optional[int] = None
+) -> ImageUpload:
+    """
+    Read an uploaded image in chunks, hashing and validating as it goes
+
+    Raises:
+        UploadTooLarge: More than `max_size` bytes (default MAX_UPLOAD_SIZE)
+        UnsupportedImageType: The first bytes are not a JPEG/PNG/GIF/BMP/WebP signature
+    """
+    max_size = max_size or settings.MAX_UPLOAD_SIZE
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    too_large = UploadTooLarge(f"File size exceeds maximum of {max_size} bytes")
+
+    # The spooled part's size is known up front; don't read a byte of an oversized one
+    if file.size is not None and file.size > max_size:
+        raise too_large
+
+    hasher = hashlib.sha256()
+    chunks = []
+    extension = None
+    total = 0
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            break
+        total += len(chunk)
+        if total > max_size:
+            raise too_large
+        if extension is None:
+            # Signatures are at most 12 bytes; a first chunk shorter than that is a broken image anyway
+            extension = sniff_image_extension(chunk)
+            if extension is None:
+                raise UnsupportedImageType("File must be an image")
+        hasher.update(chunk)
+        chunks.append(chunk)
+
+    if extension is None:
+        raise UnsupportedImageType("File must be an image")
+    # One contiguous buffer; a single-chunk upload is used as read
+    data = chunks[0] if len(chunks) == 1 else b"".join(chunks)
+    return ImageUpload(data, hasher.hexdigest(), extension, file.filename)
@@ -0,0 +1,165 @@
+"""
+Upload Store
+Content-addressed persistence for uploaded images.
+
+Files are named by the SHA-256 of their bytes and sharded into two levels of
+subdirectories (ab/cd/abcd....jpg), so identical uploads share one object and
+no two uploads ever collide. The local store writes through aiofiles off the
+event loop; with USE_S3 the same keys go to an S3-compatible bucket
+(S3_ENDPOINT_URL points it at MinIO or another local stand-in).
+"""
+
+import os
+import uuid
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from app.config import settings
+from app.services.preprocessing import image_digest
+
+try:
+    import aiofiles
+    import aiofiles.os
+    AIOFILES_AVAILABLE = True
+except ImportError:
+    AIOFILES_AVAILABLE = False
+
+try:
+    import boto3
+    from botocore.exceptions import ClientError
+    BOTO3_AVAILABLE = True
+except ImportError:
+    BOTO3_AVAILABLE = False
+
+    class ClientError(Exception):
+        """Stand-in so S3UploadStore also works with an injected client"""
+
+        def __init__(self, response: dict, operation_name: str = ""):
+            super().__init__(operation_name)
+            self.response = response
+
+# Leading bytes of the image formats we accept -> stored extension
+IMAGE_SIGNATURES = (
+    (b"\xff\xd8\xff", ".jpg"),
+    (b"\x89PNG\r\n\x1a\n", ".png"),
+    (b"GIF87a", ".gif"),
+    (b"GIF89a", ".gif"),
+    (b"BM", ".bmp"),
+)
+
+
+def sniff_image_extension(data: bytes) -> Optional[str]:
+    """File extension for the image format the bytes start with, or None"""
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return ".webp"
+    for signature, extension in IMAGE_SIGNATURES:
+        if data.startswith(signature):
+            return extension
+    return None
+
+
+def content_key(data: bytes, digest: Optional[str] = None) -> str:
+    """Sharded, content-addressed key: ab/cd/<sha256><ext>"""
+    digest = digest or image_digest(data)
+    extension = sniff_image_extension(data) or ".bin"
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{extension}"
+
+
+class UploadStore(ABC):
+    """Where uploaded images are kept; `save` returns the URL stored with the prediction"""
+
+    @abstractmethod
+    async def save(self, data: bytes, digest: Optional[str] = None) -> str:
+        """Persist the bytes (idempotently, by content) and return their URL"""
+
+
+class LocalUploadStore(UploadStore):
+    """Sharded files under UPLOAD_DIR"""
+
+    def __init__(self, root: str):
+        self.root = root
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    async def save(self, data: bytes, digest: Optional[str] = None) -> str:
+        path = self.path_for(content_key(data, digest))
+        if os.path.exists(path):
+            return path  # Same bytes already stored
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Unique temp name + rename: concurrent saves of the same image can't interleave
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            if AIOFILES_AVAILABLE:
+                async with aiofiles.open(tmp_path, "wb") as f:
+                    await f.write(data)
+                await aiofiles.os.replace(tmp_path, path)
+            else:
+                await asyncio.to_thread(self._write, tmp_path, path, data)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        return path
+
+    @staticmethod
+    def _write(tmp_path: str, path: str, data: bytes):
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+class S3UploadStore(UploadStore):
+    """Objects in an S3-compatible bucket; boto3 calls run on the default executor"""
+
+    def __init__(self, bucket: str, prefix: str = "", client=None):
+        if client is None:
+            if not BOTO3_AVAILABLE:
+                raise RuntimeError("USE_S3 requires boto3. Install with: pip install boto3")
+            client = boto3.client(
+                "s3",
+                endpoint_url=settings.S3_ENDPOINT_URL,
+                region_name=settings.AWS_REGION,
+                aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
+                aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY
+            )
+        self.client = client
+        self.bucket = bucket
+        self.prefix = prefix
+
+    async def save(self, data: bytes, digest: Optional[str] = None) -> str:
+        key = self.prefix + content_key(data, digest)
+        await asyncio.to_thread(self._put_if_missing, key, data)
+        return f"s3://{self.bucket}/{key}"
+
+    def _put_if_missing(self, key: str, data: bytes):
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return  # Same bytes already stored
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+                raise
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=data)
+
+
+def create_upload_store() -> UploadStore:
+    """Store selected by USE_S3"""
+    if settings.USE_S3:
+        if not settings.S3_BUCKET_NAME:
+            raise RuntimeError("USE_S3 is set but S3_BUCKET_NAME is not")
+        return S3UploadStore(settings.S3_BUCKET_NAME, settings.S3_UPLOAD_PREFIX)
+    return LocalUploadStore(settings.UPLOAD_DIR)
+
+
+# Global instance
+upload_store: Optional[UploadStore] = None
+
+
+def get_upload_store() -> UploadStore:
+    """Get the upload store instance"""
+    global upload_store
+    if upload_store is None:
+        upload_store = create_upload_store()
+    return upload_store
@@ -0,0 +1,202 @@
+"""
+Vector Index
+Pure-NumPy approximate nearest-neighbour search over dense embeddings.
+
+IVFIndex clusters the (L2-normalized) vectors with k-means into `nlist`
+inverted lists and stores them contiguously, list by list, in one float16 or
+float32 array. A query scores the centroids, then only the `nprobe` closest
+lists, so cost grows with nprobe * N / nlist instead of N. `nprobe` is the
+recall/latency knob: nprobe == nlist is exact search.
+
+An index is saved as a directory of .npy files; the vector array is opened
+memory-mapped, so worker processes share one copy through the page cache
+and only the probed lists are ever paged in.
+
+Scores are cosine similarities (inner products of normalized vectors).
+"""
+
+import os
+import json
+from typing import Optional, Tuple
+
+import numpy as np
+
+STORAGE_DTYPES = {"float16": np.float16, "float32": np.float32}
+# Vectors scored at once while assigning to centroids (bounds the [block, nlist] temporary)
+ASSIGN_BLOCK_ROWS = 65536
+
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """float32 copy of `vectors` with unit-length rows (zero rows stay zero)"""
+    vectors = np.array(vectors, dtype=np.float32, copy=True)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    np.divide(vectors, norms, out=vectors, where=norms > 0)
+    return vectors
+
+
+def _assign(vectors: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    """Index of the most similar centroid for every vector"""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), ASSIGN_BLOCK_ROWS):
+        block = np.asarray(vectors[start:start + ASSIGN_BLOCK_ROWS], dtype=np.float32)
+        labels[start:start + len(block)] = (block @ centroids.T).argmax(axis=1)
+    return labels
+
+
+def spherical_kmeans(
+    vectors: np.ndarray,
+    k: int,
+    iterations: int = 10,
+    sample_size: int = 262144,
+    seed: int = 0
+) -> np.ndarray:
+    """
+    k unit-length centroids of unit-length vectors (cosine k-means)
+
+    Trained on a random sample of at most `sample_size` vectors; empty
+    clusters are re-seeded from random sample points.
+    """
+    rng = np.random.default_rng(seed)
+    if len(vectors) > sample_size:
+        sample = np.asarray(vectors[np.sort(rng.choice(len(vectors), sample_size, replace=False))], dtype=np.float32)
+    else:
+        sample = np.asarray(vectors, dtype=np.float32)
+    k = min(k, len(sample))
+    centroids = sample[rng.choice(len(sample), k, replace=False)].copy()
+    for _ in range(iterations):
+        labels = _assign(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, sample)
+        counts = np.bincount(labels, minlength=k)
+        empty = counts == 0
+        if empty.any():
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()), replace=False)]
+        centroids = normalize_rows(sums)
+    return centroids
+
+
+class IVFIndex:
+    """Inverted-file index: k-means lists of contiguously stored vectors"""
+
+    def __init__(
+        self,
+        centroids: np.ndarray,
+        offsets: np.ndarray,
+        vectors: np.ndarray,
+        ids: np.ndarray,
+        nprobe: int = 8
+    ):
+        self.centroids = centroids  # [nlist, d] float32, unit length
+        self.offsets = offsets  # [nlist + 1]: list i is rows offsets[i]:offsets[i+1]
+        self.vectors = vectors  # [N, d] float16/float32 (possibly memmapped), grouped by list
+        self.ids = ids  # [N] int64 external id of each row
+        self.nprobe = nprobe
+        self._row_of = None
+
+    @property
+    def nlist(self) -> int:
+        return len(self.centroids)
+
+    @property
+    def dim(self) -> int:
+        return self.centroids.shape[1]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @classmethod
+    def build(
+        cls,
+        vectors: np.ndarray,
+        ids: Optional[np.ndarray] = None,
+        nlist: Optional[int] = None,
+        nprobe: int = 8,
+        dtype: str = "float16",
+        iterations: int = 10,
+        seed: int = 0
+    ) -> "IVFIndex":
+        """
+        Cluster and lay out `vectors` ([N, d]); `ids` default to row numbers
+
+        nlist defaults to ~sqrt(N), which balances centroid scoring against
+        list scanning.
+        """
+        vectors = normalize_rows(vectors)
+        ids = np.arange(len(vectors), dtype=np.int64) if ids is None else np.asarray(ids, dtype=np.int64)
+        nlist = nlist or max(1, int(np.sqrt(len(vectors))))
+        centroids = spherical_kmeans(vectors, nlist, iterations=iterations, seed=seed)
+        labels = _assign(vectors, centroids)
+        order = np.argsort(labels, kind="stable")
+        offsets = np.zeros(len(centroids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(labels, minlength=len(centroids)), out=offsets[1:])
+        return cls(centroids, offsets, vectors[order].astype(STORAGE_DTYPES[dtype]), ids[order], nprobe=nprobe)
+
+    def search(self, queries: np.ndarray, k: int = 10, nprobe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        k most similar vectors per query
+
+        Returns:
+            (ids [Q, k], scores [Q, k]), best first; rows with fewer than k
+            candidates in the probed lists are padded with id -1 / score -inf
+        """
+        queries = normalize_rows(np.atleast_2d(queries))
+        nprobe = min(nprobe or self.nprobe, self.nlist)
+        coarse = queries @ self.centroids.T
+        if nprobe < self.nlist:
+            probes = np.argpartition(-coarse, nprobe - 1, axis=1)[:, :nprobe]
+        else:
+            probes = np.broadcast_to(np.arange(self.nlist), coarse.shape)
+
+        out_ids = np.full((len(queries), k), -1, dtype=np.int64)
+        out_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        for q, lists in enumerate(probes):
+            # Lists are contiguous: each probe is one slice of the (mmapped) array
+            spans = [(self.offsets[i], self.offsets[i + 1]) for i in np.sort(lists) if self.offsets[i + 1] > self.offsets[i]]
+            if not spans:
+                continue
+            candidates = np.concatenate([self.vectors[start:end] for start, end in spans], dtype=np.float32)
+            candidate_ids = np.concatenate([self.ids[start:end] for start, end in spans])
+            scores = candidates @ queries[q]
+            n = min(k, len(scores))
+            top = np.argpartition(-scores, n - 1)[:n] if n < len(scores) else np.arange(n)
+            top = top[np.argsort(-scores[top], kind="stable")]
+            out_ids[q, :n] = candidate_ids[top]
+            out_scores[q, :n] = scores[top]
+        return out_ids, out_scores
+
+    def search_exact(self, queries: np.ndarray, k: int = 10) -> Tuple[np.ndarray, np.ndarray]:
+        """Brute-force search over every vector (recall reference)"""
+        return self.search(queries, k, nprobe=self.nlist)
+
+    def vector(self, item_id: int) -> Optional[np.ndarray]:
+        """Stored (normalized) vector of an id, or None"""
+        if self._row_of is None:
+            self._row_of = {int(item_id): row for row, item_id in enumerate(self.ids.tolist())}
+        row = self._row_of.get(int(item_id))
+        return None if row is None else np.asarray(self.vectors[row], dtype=np.float32)
+
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        np.save(os.path.join(directory, "centroids.npy"), self.centroids)
+        np.save(os.path.join(directory, "offsets.npy"), self.offsets)
+        np.save(os.path.join(directory, "vectors.npy"), self.vectors)
+        np.save(os.path.join(directory, "ids.npy"), self.ids)
+        with open(os.path.join(directory, "index.json"), "w") as f:
+            json.dump({
+                "type": "ivf",
+                "count": len(self),
+                "dim": self.dim,
+                "nlist": self.nlist,
+                "dtype": str(self.vectors.dtype)
+            }, f, indent=2)
+
+    @classmethod
+    def load(cls, directory: str, nprobe: int = 8, mmap: bool = True) -> "IVFIndex":
+        """Open a saved index; with `mmap` the vectors stay on disk until probed"""
+        return cls(
+            np.load(os.path.join(directory, "centroids.npy")),
+            np.load(os.path.join(directory, "offsets.npy")),
+            np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r" if mmap else None),
+            np.load(os.path.join(directory, "ids.npy")),
+            nprobe=nprobe
+        )
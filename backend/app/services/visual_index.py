@@ -0,0 +1,73 @@
+"""
+Visual Index
+Reference leaf images searchable by image embedding.
+
+An IVFIndex (app/services/vector_index.py) over the penultimate-layer
+embeddings of a labelled reference image set, plus the image each row
+came from. Built offline by scripts/build_visual_index.py with the same
+model the API serves, and queried with the embedding MLService returns for
+an upload.
+"""
+
+import os
+import json
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from app.services.vector_index import IVFIndex
+
+IMAGES_FILE = "images.json"
+
+
+class VisualIndex:
+    """IVF index over reference image embeddings; ids are rows of `images`"""
+
+    def __init__(self, index: IVFIndex, images: List[Dict], model: Optional[str] = None):
+        self.index = index
+        self.images = images  # {"path": relative image path, "label": class name}
+        self.model = model  # Ensemble member that produced the embeddings
+
+    def __len__(self) -> int:
+        return len(self.images)
+
+    @property
+    def dim(self) -> int:
+        return self.index.dim
+
+    @classmethod
+    def build(
+        cls,
+        embeddings: np.ndarray,
+        images: List[Dict],
+        model: Optional[str] = None,
+        nlist: Optional[int] = None,
+        dtype: str = "float16"
+    ) -> "VisualIndex":
+        if len(embeddings) != len(images):
+            raise ValueError(f"{len(embeddings)} embeddings for {len(images)} images")
+        return cls(IVFIndex.build(embeddings, nlist=nlist, dtype=dtype), list(images), model=model)
+
+    def search(self, embedding: np.ndarray, limit: int = 10, nprobe: Optional[int] = None) -> List[Dict]:
+        """Most similar reference images to one embedding, best first"""
+        embedding = np.asarray(embedding, dtype=np.float32).reshape(-1)
+        if len(embedding) != self.dim:
+            raise ValueError(f"Embedding has {len(embedding)} dimensions, the visual index {self.dim}")
+        ids, scores = self.index.search(embedding, k=limit, nprobe=nprobe)
+        return [
+            {**self.images[int(i)], "similarity_score": float(score)}
+            for i, score in zip(ids[0], scores[0]) if i >= 0
+        ]
+
+    def save(self, directory: str):
+        """Write the image list first: index.json, written last, marks a complete index"""
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, IMAGES_FILE), "w") as f:
+            json.dump({"model": self.model, "images": self.images}, f)
+        self.index.save(directory)
+
+    @classmethod
+    def load(cls, directory: str, nprobe: int = 8) -> "VisualIndex":
+        with open(os.path.join(directory, IMAGES_FILE)) as f:
+            metadata = json.load(f)
+        return cls(IVFIndex.load(directory, nprobe=nprobe), metadata["images"], model=metadata.get("model"))
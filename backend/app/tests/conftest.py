@@ -2,15 +2,20 @@ import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
+import threading
+import numpy as np
 import pytest
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
+from app import main as main_module
 from app.main import app
 from app.database import Base, get_db
 from app.config import settings
+from app.services.ml_service import MLService
+from app.services.prediction_writer import get_prediction_writer
 
 # Use an in-memory SQLite database for testing
 SQLALCHEMY_DATABASE_URL = "sqlite://"
@@ -33,7 +38,23 @@ def db_session():
         Base.metadata.drop_all(bind=engine)
 
 @pytest.fixture(scope="function")
-def client(db_session):
+def startup_database(tmp_path_factory, monkeypatch):
+    """
+    Run app startup (create_all, index builds) against a scratch database, not
+    ./medicinal_plants.db; not the test engine either, whose single connection
+    the request handlers are using
+    """
+    startup_engine = create_engine(
+        f"sqlite:///{tmp_path_factory.mktemp('startup') / 'startup.db'}",
+        connect_args={"check_same_thread": False}
+    )
+    monkeypatch.setattr(main_module, "engine", startup_engine)
+    monkeypatch.setattr(main_module, "SessionLocal", sessionmaker(bind=startup_engine))
+    yield startup_engine
+    startup_engine.dispose()
+
+@pytest.fixture(scope="function")
+def client(db_session, startup_database, monkeypatch):
     def override_get_db():
         try:
             yield db_session
@@ -41,6 +62,82 @@ def client(db_session):
             db_session.close()
     
     app.dependency_overrides[get_db] = override_get_db
+    monkeypatch.setattr(get_prediction_writer(), "session_factory", TestingSessionLocal)
     with TestClient(app) as test_client:
         yield test_client
     app.dependency_overrides.clear()
+
+
+class FakeSession:
+    """Minimal stand-in for an ONNX InferenceSession with a dynamic batch dim"""
+
+    class _Input:
+        name = "input"
+
+    def __init__(self, num_classes=5):
+        self.num_classes = num_classes
+        self.batch_sizes = []
+        self._lock = threading.Lock()
+
+    def get_inputs(self):
+        return [self._Input()]
+
+    def run(self, output_names, feeds):
+        batch = feeds["input"]
+        with self._lock:
+            self.batch_sizes.append(batch.shape[0])
+        # Bright images vote class 1, dark images class 0
+        logits = np.zeros((batch.shape[0], self.num_classes), dtype=np.float32)
+        winners = (batch.mean(axis=(1, 2, 3)) > 0).astype(int)
+        logits[np.arange(batch.shape[0]), winners] = 10.0
+        return [logits]
+
+
+@pytest.fixture
+def fake_ml_service():
+    service = MLService()
+    service.class_names = ["a", "b", "c", "d", "e"]
+    service.mobilenet_session = FakeSession()
+    service.models_loaded = True
+    yield service
+    service.shutdown()
+
+
+def write_tiny_onnx_model(path, num_classes=5, seed=0):
+    """Write a GlobalAveragePool + Gemm classifier with a dynamic batch dim"""
+    onnx = pytest.importorskip("onnx")
+    from onnx import helper, numpy_helper, TensorProto
+
+    rng = np.random.default_rng(seed)
+    weight = rng.normal(size=(3, num_classes)).astype(np.float32)
+    bias = np.zeros(num_classes, dtype=np.float32)
+    graph = helper.make_graph(
+        [
+            helper.make_node("GlobalAveragePool", ["input"], ["pooled"]),
+            helper.make_node("Flatten", ["pooled"], ["features"], axis=1),
+            helper.make_node("Gemm", ["features", "fc_w", "fc_b"], ["logits"]),
+        ],
+        "tiny_classifier",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", 3, 224, 224])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch", num_classes])],
+        [numpy_helper.from_array(weight, "fc_w"), numpy_helper.from_array(bias, "fc_b")]
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.save(model, str(path))
+    return str(path)
+
+
+@pytest.fixture
+def onnx_model_dir(tmp_path, monkeypatch):
+    """Point the model settings at a directory holding a tiny MobileNet stand-in"""
+    pytest.importorskip("onnxruntime")
+    model_dir = tmp_path / "ml_models"
+    model_dir.mkdir()
+    monkeypatch.setattr(settings, "MODEL_DIR", str(model_dir))
+    monkeypatch.setattr(settings, "MOBILENET_MODEL_PATH", write_tiny_onnx_model(model_dir / "mobilenetv2_best.onnx"))
+    monkeypatch.setattr(settings, "VIT_MODEL_PATH", str(model_dir / "vit_best.onnx"))
+    monkeypatch.setattr(settings, "ENHANCED_MODEL_PATH", str(model_dir / "efficientnetv2_best.onnx"))
+    monkeypatch.setattr(settings, "CLASS_NAMES_PATH", str(model_dir / "class_names.json"))
+    monkeypatch.setattr(settings, "ENSEMBLE_WEIGHTS_PATH", str(model_dir / "ensemble_weights.json"))
+    return model_dir
@@ -0,0 +1,84 @@
+from sqlalchemy import event
+
+from app.config import settings
+from app.models.plant import Plant, MedicinalProperty
+from app.services.ailment_index import AilmentIndex, ailment_terms
+from app.services.recommendation_service import get_recommendation_service
+
+
+def _add_plant(db, name, *ailments):
+    plant = Plant(species_name=name, common_name_en=name.title())
+    db.add(plant)
+    db.flush()
+    for ailment, efficacy in ailments:
+        db.add(MedicinalProperty(plant_id=plant.id, ailment=ailment, efficacy_rating=efficacy))
+    return plant
+
+
+def test_ailment_terms_normalize_stem_and_fold_synonyms():
+    assert ailment_terms("Common Cold & Cough") == ["cold", "cough"]
+    assert ailment_terms("Diabetes") == ailment_terms("diabetic") == ailment_terms("blood sugar")
+    assert ailment_terms("High Blood Pressure") == ailment_terms("hypertension")
+    assert ailment_terms("Skin infections") == ailment_terms("skin infection")
+    assert ailment_terms("Digestive problems") == ailment_terms("indigestion") == ailment_terms("stomach")
+    assert ailment_terms("the and of") == []
+
+
+def test_search_ranks_by_relevance_then_efficacy(db_session):
+    _add_plant(db_session, "tulsi", ("Common Cold & Cough", 4), ("Fever", 5))
+    _add_plant(db_session, "vasaka", ("Cough", 5))
+    _add_plant(db_session, "ginger", ("Cold", 5), ("Indigestion", 3))
+    _add_plant(db_session, "neem", ("Skin infections", 5))
+    db_session.commit()
+    index = AilmentIndex()
+    index.build(db_session)
+
+    ranked = [plant_id for plant_id, _, _ in index.search("coughing")]
+    assert ranked == [2, 1]
+    # Both terms beat one term, whatever the efficacy
+    assert [plant_id for plant_id, _, _ in index.search("cold and cough")][0] == 1
+    assert [plant_id for plant_id, _, _ in index.search("diab")] == []
+    assert [plant_id for plant_id, _, _ in index.search("stomach ache")] == [3]
+    assert [plant_id for plant_id, _, _ in index.search("infec")] == [4]
+
+    # Edits to one plant re-index just its properties
+    db_session.query(MedicinalProperty).filter(MedicinalProperty.ailment == "Cough").delete()
+    db_session.add(MedicinalProperty(plant_id=2, ailment="Diabetes", efficacy_rating=2))
+    db_session.commit()
+    index.update(db_session, {2})
+    assert [plant_id for plant_id, _, _ in index.search("cough")] == [1]
+    assert [plant_id for plant_id, _, _ in index.search("diabetic")] == [2]
+
+
+def test_plants_for_ailment_dedupes_before_limit(client, db_session):
+    # One plant with many matching rows used to fill the whole limit
+    _add_plant(db_session, "tulsi", *[(f"Cough remedy {i}", 3) for i in range(12)])
+    for i in range(12):
+        _add_plant(db_session, f"plant-{i}", ("Common Cold & Cough", i % 5 + 1))
+    db_session.commit()
+    service = get_recommendation_service()
+    service.ailment_index.clear()
+    service.ailment_index.ensure_current(db_session)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", record)
+    response = client.post(f"{settings.API_V1_PREFIX}/recommend/ailment", params={"ailment": "cough"})
+    event.remove(db_session.get_bind(), "before_cursor_execute", record)
+
+    assert response.status_code == 200
+    plants = response.json()["plants"]
+    assert len(plants) == 10 and len({p["id"] for p in plants}) == 10
+    ratings = [p["efficacy_rating"] for p in plants]
+    assert ratings == sorted(ratings, reverse=True)
+    assert len([s for s in statements if "medicinal_properties" in s]) == 1
+
+    # Committed changes reach the index through the catalogue change events
+    _add_plant(db_session, "karela", ("Diabetes", 4))
+    db_session.commit()
+    response = client.post(f"{settings.API_V1_PREFIX}/recommend/ailment", params={"ailment": "blood sugar"})
+    assert [p["species_name"] for p in response.json()["plants"]] == ["karela"]
+    service.ailment_index.clear()
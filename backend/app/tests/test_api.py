@@ -1,5 +1,9 @@
+import time
 from fastapi.testclient import TestClient
 
+from app.main import app
+from app.services.ml_service import get_ml_service
+
 def test_read_root(client: TestClient):
     response = client.get("/")
     assert response.status_code == 200
@@ -10,6 +14,27 @@ def test_health_check(client: TestClient):
     assert response.status_code == 200
     assert response.json()["status"] == "healthy"
 
+def test_ready_after_warmup(client: TestClient):
+    deadline = time.time() + 30
+    response = client.get("/ready")
+    while response.status_code != 200 and time.time() < deadline:
+        time.sleep(0.05)
+        response = client.get("/ready")
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+    assert response.json()["visual_search"] == "off"
+
+def test_not_ready_until_warm(db_session, startup_database, monkeypatch):
+    service = get_ml_service()
+    monkeypatch.setattr(service, "ready", False)
+    monkeypatch.setattr(service, "startup", lambda: None)
+    with TestClient(app) as test_client:
+        response = test_client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["ready"] is False
+        # Liveness is unaffected
+        assert test_client.get("/health").status_code == 200
+
 def test_docs_accessible(client: TestClient):
     response = client.get("/docs")
     assert response.status_code == 200
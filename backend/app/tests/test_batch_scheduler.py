@@ -0,0 +1,62 @@
+import threading
+import numpy as np
+import pytest
+
+from app.services.batch_scheduler import MicroBatchScheduler
+from app.services.preprocessing import PreprocessedImage
+
+
+def test_scheduler_groups_concurrent_requests():
+    seen = []
+    release = threading.Event()
+
+    def batch_fn(items):
+        release.wait(timeout=5)
+        seen.append(len(items))
+        return [item * 2 for item in items]
+
+    scheduler = MicroBatchScheduler(batch_fn, max_batch_size=8, max_wait_ms=50)
+    scheduler.start()
+    try:
+        # First item blocks the dispatcher, the rest queue up into one batch
+        futures = [scheduler.submit(i) for i in range(5)]
+        release.set()
+        assert [f.result(timeout=5) for f in futures] == [0, 2, 4, 6, 8]
+    finally:
+        scheduler.shutdown()
+
+    assert sum(seen) == 5
+    assert max(seen) > 1
+
+
+def test_scheduler_routes_per_item_errors():
+    def batch_fn(items):
+        return [ValueError("bad") if item < 0 else item for item in items]
+
+    scheduler = MicroBatchScheduler(batch_fn, max_batch_size=4, max_wait_ms=20)
+    scheduler.start()
+    try:
+        ok = scheduler.submit(1)
+        bad = scheduler.submit(-1)
+        assert ok.result(timeout=5) == 1
+        with pytest.raises(ValueError):
+            bad.result(timeout=5)
+    finally:
+        scheduler.shutdown()
+
+
+def test_ml_service_batches_concurrent_predictions(fake_ml_service):
+    service = fake_ml_service
+    service._start_batch_scheduler()
+
+    dark = PreprocessedImage("dark", np.zeros((224, 224, 3), dtype=np.uint8))
+    bright = PreprocessedImage("bright", np.full((224, 224, 3), 255, dtype=np.uint8))
+    try:
+        futures = [service.batch_scheduler.submit(x) for x in (dark, bright, dark, bright)]
+        results = [f.result(timeout=5) for f in futures]
+    finally:
+        service.shutdown()
+
+    assert [int(np.argmax(probs[0])) for probs, *_ in results] == [0, 1, 0, 1]
+    assert all(versions == ["mobilenet-v2"] for _, versions, *_ in results)
+    assert sum(service.mobilenet_session.batch_sizes) == 4
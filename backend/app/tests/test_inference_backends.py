@@ -0,0 +1,184 @@
+import io
+import time
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.config import settings
+from app.inference_server import InferenceServer
+from app.services.inference_backends import InferenceUnavailable, ProcessPoolBackend, UnixSocketBackend
+from app.services.ml_service import MLService
+from app.tests.conftest import write_tiny_onnx_model
+
+
+def _image_bytes(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color=color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def local_service(onnx_model_dir, monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_BATCHING_ENABLED", False)
+    monkeypatch.setattr(settings, "ML_WARMUP_BATCH_SIZES", [1])
+    monkeypatch.setattr(settings, "RESULT_CACHE_SIZE", 0)
+    service = MLService()
+    service.load_models()
+    assert not service.use_mock
+    yield service
+    service.shutdown()
+
+
+def test_process_pool_matches_local_inference(local_service, monkeypatch):
+    images = [_image_bytes((200, 30, 30)), _image_bytes((10, 90, 220))]
+    expected = local_service.predict_batch(images)
+
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", "process")
+    monkeypatch.setattr(settings, "INFERENCE_WORKERS", 1)
+    # Smaller than one image, so the worker has to follow a regrown segment
+    monkeypatch.setattr(settings, "INFERENCE_SHM_MB", 0)
+    monkeypatch.setattr(settings, "INFERENCE_BATCHING_ENABLED", True)
+    service = MLService()
+    try:
+        service.load_models()
+        assert not service.use_mock
+        assert service.bundle.sessions == {}  # sessions live in the worker only
+        assert service.inference_backend.members == ["mobilenet"]
+
+        remote = service.predict_batch(images)
+        for got, want in zip(remote, expected):
+            assert got["predicted_class_index"] == want["predicted_class_index"]
+            assert got["confidence"] == pytest.approx(want["confidence"], rel=1e-4)
+        assert service.predict(images[1])["predicted_class_index"] == expected[1]["predicted_class_index"]
+
+        # Reloads are forwarded to the workers
+        write_tiny_onnx_model(settings.MOBILENET_MODEL_PATH, seed=7)
+        info = service.reload_models()
+        assert info["version"] == 2
+        changed = service.predict_batch(images)
+        assert any(
+            got["confidence"] != pytest.approx(want["confidence"], rel=1e-4)
+            for got, want in zip(changed, expected)
+        )
+    finally:
+        service.shutdown()
+
+
+def test_process_pool_reloads_every_worker_and_replaces_dead_ones(onnx_model_dir, monkeypatch):
+    monkeypatch.setattr(settings, "ML_WARMUP_BATCH_SIZES", [1])
+    backend = ProcessPoolBackend(num_workers=2, shm_bytes=0, timeout=30)
+    backend.start()
+    try:
+        batch = {"symmetric": np.zeros((1, 3, 224, 224), dtype=np.float32)}
+
+        # A worker busy with a request during the reload is reloaded once it is back
+        busy = backend._idle.get()
+        threading.Timer(0.5, backend._idle.put, args=(busy,)).start()
+        write_tiny_onnx_model(settings.MOBILENET_MODEL_PATH, seed=7)
+        backend.reload()
+        assert [worker.generation for worker in backend._workers] == [1, 1]
+
+        # Workers that cannot load the new files fail the reload
+        Path(settings.MOBILENET_MODEL_PATH).write_bytes(b"not a model")
+        with pytest.raises(RuntimeError, match="failed to reload"):
+            backend.reload()
+        write_tiny_onnx_model(settings.MOBILENET_MODEL_PATH, seed=7)
+
+        # A dead worker fails its request at once and is replaced in the background
+        dead, alive = backend._idle.get(), backend._idle.get()
+        dead.process.kill()
+        dead.process.join()
+        backend._idle.put(dead)
+        backend._idle.put(alive)
+        started = time.monotonic()
+        with pytest.raises(InferenceUnavailable):
+            backend.infer(batch)
+        assert time.monotonic() - started < 5
+        assert backend.infer(batch) is not None
+
+        deadline = time.monotonic() + 120
+        while len(backend._workers) < 2 and time.monotonic() < deadline:
+            time.sleep(0.1)
+        assert len(backend._workers) == 2 and dead not in backend._workers
+    finally:
+        backend.shutdown()
+
+
+def test_socket_backend_talks_to_daemon(local_service, tmp_path, monkeypatch):
+    socket_path = str(tmp_path / "inference.sock")
+    server = InferenceServer(socket_path, local_service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", "socket")
+    monkeypatch.setattr(settings, "INFERENCE_SOCKET_PATH", socket_path)
+    service = MLService()
+    try:
+        service.load_models()
+        assert not service.use_mock
+
+        batch = np.random.default_rng(0).uniform(-1, 1, (3, 3, 224, 224)).astype(np.float32)
+        probs, model_version, ensemble_used, stages_run = service.infer_tensors({"symmetric": batch})
+        expected = local_service._infer_batch(batch)
+        np.testing.assert_allclose(probs, expected[0], rtol=1e-5)
+        assert (model_version, ensemble_used, stages_run) == (expected[1], expected[2], expected[4])
+
+        # Unchanged files: the daemon keeps its models
+        bundle = local_service.bundle
+        service.reload_models()
+        assert local_service.bundle is bundle
+    finally:
+        service.shutdown()
+        server.shutdown()
+        server.server_close()
+
+
+def test_unreachable_daemon_falls_back_to_demo_mode(onnx_model_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", "socket")
+    monkeypatch.setattr(settings, "INFERENCE_SOCKET_PATH", str(tmp_path / "missing.sock"))
+    service = MLService()
+    service.load_models()
+    assert service.use_mock
+    assert service.inference_backend is None
+
+
+def test_lost_daemon_fails_requests_instead_of_mocking(local_service, tmp_path, monkeypatch):
+    socket_path = str(tmp_path / "inference.sock")
+    server = InferenceServer(socket_path, local_service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    monkeypatch.setattr(settings, "INFERENCE_BACKEND", "socket")
+    monkeypatch.setattr(settings, "INFERENCE_SOCKET_PATH", socket_path)
+    monkeypatch.setattr(settings, "INFERENCE_BATCHING_ENABLED", True)
+    service = MLService()
+    try:
+        service.load_models()
+        assert service.predict(_image_bytes("red"))["predicted_class"]
+        server.shutdown()
+        server.server_close()
+        service.inference_backend.shutdown()  # Drop pooled connections too
+
+        with pytest.raises(InferenceUnavailable):
+            service.predict(_image_bytes("blue"))
+    finally:
+        service.shutdown()
+
+
+def test_predict_endpoint_answers_503_when_inference_unavailable(client, monkeypatch):
+    from app.api.v1 import predict as predict_module
+
+    class UnavailableService:
+        async def predict_async(self, image_bytes, digest=None):
+            raise InferenceUnavailable("No inference worker became free within 30s")
+
+    monkeypatch.setattr(predict_module, "get_ml_service", lambda: UnavailableService())
+    response = client.post(
+        f"{settings.API_V1_PREFIX}/predict/",
+        files={"file": ("leaf.png", _image_bytes("green"), "image/png")}
+    )
+    assert response.status_code == 503
+    assert "worker" in response.json()["detail"]
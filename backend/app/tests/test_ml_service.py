@@ -1,8 +1,16 @@
+import asyncio
+import os
+import shutil
 import pytest
 import numpy as np
 from PIL import Image
 import io
 from app.services.ml_service import MLService
+from app.services.postprocessing import softmax
+from app.services.explainability_service import ExplainabilityService
+from app.config import Settings, settings
+from pydantic import ValidationError
+from app.tests.conftest import FakeSession, write_tiny_onnx_model
 
 @pytest.fixture
 def ml_service():
@@ -36,3 +44,171 @@ def test_prediction(ml_service):
     assert "predicted_class" in result
     assert "confidence" in result
     assert len(result["top_predictions"]) > 0
+
+def _jpeg_bytes(color):
+    img = Image.new('RGB', (64, 64), color=color)
+    img_byte_arr = io.BytesIO()
+    img.save(img_byte_arr, format='JPEG')
+    return img_byte_arr.getvalue()
+
+def test_predict_batch_single_pass(fake_ml_service):
+    images = [_jpeg_bytes('black'), b'not an image', _jpeg_bytes('white')]
+    results = fake_ml_service.predict_batch(images)
+
+    assert results[0]["predicted_class"] == "a"
+    assert "error" in results[1]
+    assert results[2]["predicted_class"] == "b"
+    # Both decodable images went through the session together
+    assert fake_ml_service.mobilenet_session.batch_sizes == [2]
+
+def test_format_results_matches_full_sort(fake_ml_service):
+    rng = np.random.default_rng(0)
+    logits = rng.normal(size=(8, 5)).astype(np.float32) * 5
+    probs = softmax(logits)
+    results = fake_ml_service._format_results(probs, "mobilenet-v2", False, top_k=3)
+
+    for row, result in zip(probs, results):
+        if result["predicted_class_index"] == -1:
+            assert row.max() < fake_ml_service.CONFIDENCE_THRESHOLD
+            continue
+        expected = np.argsort(row)[::-1][:3]
+        names = [fake_ml_service.class_names[i] for i in expected]
+        assert [p["class_name"] for p in result["top_predictions"]] == names
+
+def test_predict_async(fake_ml_service):
+    result = asyncio.run(fake_ml_service.predict_async(_jpeg_bytes('white')))
+    assert result["predicted_class"] == "b"
+    assert result["model_version"] == "mobilenet-v2"
+
+def test_parallel_members_match_sequential(fake_ml_service, monkeypatch):
+    fake_ml_service.efficientnet_session = type(fake_ml_service.mobilenet_session)()
+    batch = np.concatenate([
+        np.full((1, 3, 224, 224), -1.0, dtype=np.float32),
+        np.full((1, 3, 224, 224), 1.0, dtype=np.float32)
+    ])
+    sequential_probs, version, *_ = fake_ml_service._infer_batch(batch)
+
+    monkeypatch.setattr(settings, "ENSEMBLE_EXECUTION_MODE", "parallel")
+    fake_ml_service._start_member_executor()
+    parallel_probs, parallel_version, *_ = fake_ml_service._infer_batch(batch)
+
+    assert version == parallel_version == ["efficientnet-mobilenet-ensemble"] * 2
+    np.testing.assert_allclose(sequential_probs, parallel_probs)
+
+def test_cascade_escalates_only_uncertain_images(fake_ml_service, monkeypatch):
+    class UnsureOnDarkSession(FakeSession):
+        def run(self, output_names, feeds):
+            logits = super().run(output_names, feeds)[0]
+            logits[feeds["input"].mean(axis=(1, 2, 3)) <= 0] = 0.0  # uniform: not confident
+            return [logits]
+
+    monkeypatch.setattr(settings, "ENSEMBLE_EXECUTION_MODE", "cascade")
+    fake_ml_service.mobilenet_session = UnsureOnDarkSession()
+    fake_ml_service.efficientnet_session = FakeSession()
+    fake_ml_service.vit_session = FakeSession()
+
+    results = fake_ml_service.predict_batch([_jpeg_bytes('white'), _jpeg_bytes('black')])
+
+    assert fake_ml_service.efficientnet_session.batch_sizes == [1]
+    assert fake_ml_service.vit_session.batch_sizes == []
+    assert results[0]["stages_run"] == ["mobilenet"]
+    assert results[0]["model_version"] == "mobilenet-v2"
+    assert results[1]["stages_run"] == ["mobilenet", "efficientnet"]
+    assert results[1]["model_version"] == "efficientnet-mobilenet-ensemble"
+    assert results[1]["predicted_class"] == "a"
+
+def test_session_options_from_settings(monkeypatch):
+    ort = pytest.importorskip("onnxruntime")
+    monkeypatch.setattr(settings, "ORT_GRAPH_OPT_LEVEL", "basic")
+    monkeypatch.setattr(settings, "ORT_INTRA_OP_THREADS", 4)
+    monkeypatch.setattr(settings, "MOBILENET_INTRA_OP_THREADS", 2)
+    monkeypatch.setattr(settings, "ORT_ENABLE_MEM_PATTERN", False)
+    service = MLService()
+
+    mobilenet_options = service._session_options("mobilenet", 2)
+    vit_options = service._session_options("vit", 2)
+
+    assert mobilenet_options.intra_op_num_threads == 2
+    assert vit_options.intra_op_num_threads == 4
+    assert mobilenet_options.graph_optimization_level == ort.GraphOptimizationLevel.ORT_ENABLE_BASIC
+    assert mobilenet_options.enable_mem_pattern is False
+
+@pytest.mark.parametrize("name, value", [
+    ("ORT_GRAPH_OPT_LEVEL", "full"),
+    ("VIT_GRAPH_OPT_LEVEL", "Basic"),
+    ("ENSEMBLE_EXECUTION_MODE", "paralel"),
+])
+def test_invalid_execution_settings_rejected_at_startup(name, value, monkeypatch):
+    monkeypatch.setenv(name, value)
+    with pytest.raises(ValidationError):
+        Settings()
+
+def test_optimized_graph_is_cached(onnx_model_dir, monkeypatch):
+    optimized_dir = onnx_model_dir / "optimized"
+    monkeypatch.setattr(settings, "ORT_OPTIMIZED_MODEL_DIR", str(optimized_dir))
+    monkeypatch.setattr(settings, "INFERENCE_BATCHING_ENABLED", False)
+
+    service = MLService()
+    service.load_models()
+    assert not service.use_mock
+    cached = list(optimized_dir.iterdir())
+    assert [p.name for p in cached] == ["mobilenetv2_best.all.optimized.onnx"]
+
+    # Second start loads the cached graph and predicts the same thing
+    reloaded = MLService()
+    reloaded.load_models()
+    batch = np.random.default_rng(1).uniform(-1, 1, (2, 3, 224, 224)).astype(np.float32)
+    np.testing.assert_allclose(service._infer_batch(batch)[0], reloaded._infer_batch(batch)[0], rtol=1e-5)
+
+def test_quantized_variant_selected(onnx_model_dir, monkeypatch):
+    fp32_path = settings.MOBILENET_MODEL_PATH
+    int8_path = str(onnx_model_dir / "mobilenetv2_best_int8.onnx")
+    shutil.copyfile(fp32_path, int8_path)
+    service = MLService()
+
+    assert service._resolve_model_path(fp32_path) == fp32_path
+    monkeypatch.setattr(settings, "USE_QUANTIZED_MODELS", True)
+    assert service._resolve_model_path(fp32_path) == int8_path
+    # Models without a promoted INT8 variant keep using FP32
+    assert service._resolve_model_path(settings.VIT_MODEL_PATH) == settings.VIT_MODEL_PATH
+
+
+def test_explain_reuses_prediction_decode(fake_ml_service):
+    image_bytes = _jpeg_bytes('green')
+    fake_ml_service.preprocess_cache.clear()
+    misses = fake_ml_service.preprocess_cache.stats()["misses"]
+
+    result = fake_ml_service.predict(image_bytes)
+    ExplainabilityService().generate_gradcam(image_bytes, result)
+
+    assert fake_ml_service.preprocess_cache.stats()["misses"] == misses + 1
+
+
+def test_startup_warms_each_batch_size(fake_ml_service, monkeypatch):
+    monkeypatch.setattr(settings, "ML_WARMUP_BATCH_SIZES", [1, 4, 16])
+    assert not fake_ml_service.ready
+
+    fake_ml_service.startup()
+
+    assert fake_ml_service.ready
+    assert fake_ml_service.mobilenet_session.batch_sizes == [1, 4, 16]
+
+
+def test_mmap_weights_load_shared_external_graph(onnx_model_dir, monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_BATCHING_ENABLED", False)
+    # Big enough classifier that ORT moves its weights to the .data file
+    write_tiny_onnx_model(settings.MOBILENET_MODEL_PATH, num_classes=300)
+    batch = np.random.default_rng(2).uniform(-1, 1, (2, 3, 224, 224)).astype(np.float32)
+    private = MLService()
+    private.load_models()
+
+    monkeypatch.setattr(settings, "ORT_MMAP_WEIGHTS", True)
+    service = MLService()
+    prepared = service.prepare_model_files()
+    assert [os.path.basename(p) for p in prepared] == ["mobilenetv2_best.all.optimized.external.onnx"]
+    assert os.path.exists(prepared[0] + ".data")
+
+    mtime = os.path.getmtime(prepared[0])
+    service.load_models()
+    assert os.path.getmtime(prepared[0]) == mtime  # reused, not rewritten
+    np.testing.assert_allclose(service._infer_batch(batch)[0], private._infer_batch(batch)[0], rtol=1e-5)
@@ -0,0 +1,154 @@
+import os
+import json
+import threading
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.services.ml_service import MLService, get_ml_service
+from app.services.model_registry import EnsembleWeights, ModelDirWatcher
+from app.tests.conftest import write_tiny_onnx_model
+
+
+@pytest.fixture
+def loaded_service(onnx_model_dir, monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_BATCHING_ENABLED", False)
+    monkeypatch.setattr(settings, "ML_WARMUP_BATCH_SIZES", [1])
+    service = MLService()
+    service.load_models()
+    assert not service.use_mock
+    yield service
+    service.shutdown()
+
+
+def test_hot_reload_swaps_models_without_disturbing_inflight(loaded_service):
+    batch = np.random.default_rng(0).uniform(-1, 1, (2, 3, 224, 224)).astype(np.float32)
+    old_bundle = loaded_service.bundle
+    old_probs = loaded_service._infer_batch(batch)[0]
+
+    write_tiny_onnx_model(settings.MOBILENET_MODEL_PATH, seed=7)
+
+    errors = []
+    stop = threading.Event()
+
+    def keep_predicting():
+        while not stop.is_set():
+            try:
+                loaded_service._infer_batch(batch)
+            except Exception as e:
+                errors.append(e)
+
+    worker = threading.Thread(target=keep_predicting)
+    worker.start()
+    try:
+        info = loaded_service.reload_models()
+    finally:
+        stop.set()
+        worker.join()
+
+    assert errors == []
+    assert info["version"] == old_bundle.version + 1
+    assert loaded_service.bundle.fingerprint != old_bundle.fingerprint
+    assert not np.allclose(loaded_service._infer_batch(batch)[0], old_probs)
+    # A request that started on the old bundle can still finish on it
+    np.testing.assert_allclose(loaded_service._infer_batch(batch, old_bundle)[0], old_probs, rtol=1e-5)
+
+
+def test_failed_reload_keeps_current_models(loaded_service):
+    bundle = loaded_service.bundle
+    os.remove(settings.MOBILENET_MODEL_PATH)
+
+    with pytest.raises(RuntimeError):
+        loaded_service.reload_models()
+    assert loaded_service.bundle is bundle
+    assert not loaded_service.use_mock
+
+
+def test_watcher_waits_for_files_to_settle():
+    disk = {"fingerprint": "v1"}
+    served = {"fingerprint": "v1"}
+    calls = []
+
+    def reload():
+        calls.append(disk["fingerprint"])
+        if disk["fingerprint"] == "broken":
+            raise RuntimeError("bad model")
+        served["fingerprint"] = disk["fingerprint"]
+
+    watcher = ModelDirWatcher(lambda: disk["fingerprint"], lambda: served["fingerprint"], reload)
+    assert not watcher.poll()
+
+    disk["fingerprint"] = "v2"
+    assert not watcher.poll()  # first sighting: may still be copying
+    assert watcher.poll()
+    assert calls == ["v2"] and served["fingerprint"] == "v2"
+
+    disk["fingerprint"] = "broken"
+    watcher.poll()
+    assert watcher.poll()
+    assert not watcher.poll()  # failed fingerprint is not retried
+    assert calls == ["v2", "broken"]
+
+
+def test_admin_reload_endpoint(client: TestClient, monkeypatch):
+    url = f"{settings.API_V1_PREFIX}/admin/models/reload"
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", None)
+    assert client.post(url).status_code == 404
+
+    monkeypatch.setattr(settings, "ADMIN_API_KEY", "secret")
+    assert client.post(url, headers={"X-Admin-Key": "wrong"}).status_code == 401
+
+    monkeypatch.setattr(get_ml_service(), "reload_models", lambda: {"version": 2})
+    response = client.post(url, headers={"X-Admin-Key": "secret"})
+    assert response.status_code == 200
+    assert response.json()["bundle"] == {"version": 2}
+
+    def broken():
+        raise RuntimeError("no models")
+
+    monkeypatch.setattr(get_ml_service(), "reload_models", broken)
+    assert client.post(url, headers={"X-Admin-Key": "secret"}).status_code == 409
+
+
+def test_ensemble_weights_file_formats(tmp_path):
+    defaults = {"efficientnet_mobilenet": (0.7, 0.3), "mobilenet_vit": (0.5, 0.5)}
+    assert EnsembleWeights.load(str(tmp_path / "missing.json"), defaults).pairs == defaults
+
+    legacy = tmp_path / "legacy.json"
+    legacy.write_text(json.dumps({"mobilenet_weight": 0.6, "vit_weight": 0.4}))
+    assert EnsembleWeights.load(str(legacy), defaults).pairs["mobilenet_vit"] == (0.6, 0.4)
+
+    fitted = tmp_path / "fitted.json"
+    fitted.write_text(json.dumps({
+        "weights": {"efficientnet_mobilenet": {"mobilenet": 0.2, "efficientnet": 0.8}},
+        "temperatures": {"mobilenet": 2.0},
+        "class_weights": {"mobilenet_vit": {"mobilenet": [1.0, 0.0], "vit": [0.0, 1.0]}}
+    }))
+    weights = EnsembleWeights.load(str(fitted), defaults, num_classes=2)
+    assert weights.pairs["efficientnet_mobilenet"] == (0.8, 0.2)
+    assert weights.temperatures == {"mobilenet": 2.0}
+    mixed = weights.combine("mobilenet_vit", np.array([[0.9, 0.1]]), np.array([[0.5, 0.5]]))
+    np.testing.assert_allclose(mixed, [[0.9 / 1.4, 0.5 / 1.4]])
+
+    # Per-class weights for a different class list are ignored
+    assert EnsembleWeights.load(str(fitted), defaults, num_classes=3).class_weights == {}
+
+    fitted.write_text(json.dumps({"temperatures": {"mobilenet": 0}}))
+    with pytest.raises(ValueError):
+        EnsembleWeights.load(str(fitted), defaults)
+
+
+def test_weights_file_is_loaded_and_reloaded(loaded_service):
+    batch = np.random.default_rng(0).uniform(-1, 1, (2, 3, 224, 224)).astype(np.float32)
+    default_probs = loaded_service._infer_batch(batch)[0]
+    fingerprint = loaded_service.bundle.fingerprint
+
+    with open(settings.ENSEMBLE_WEIGHTS_PATH, "w") as f:
+        json.dump({"temperatures": {"mobilenet": 0.25}}, f)
+    loaded_service.reload_models()
+
+    assert loaded_service.bundle.fingerprint != fingerprint
+    sharpened = loaded_service._infer_batch(batch)[0]
+    assert (sharpened.max(axis=1) > default_probs.max(axis=1)).all()
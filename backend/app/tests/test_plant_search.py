@@ -0,0 +1,127 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import Base
+from app.models.plant import Plant
+from app.services import plant_search
+from app.services.plant_search import ensure_search_index, match_score, search_backend, search_plants
+
+
+PLANTS = [
+    ("Ocimum_tenuiflorum", "Tulsi", "तुलसी", "Holy basil, sacred in Hindu homes"),
+    ("Azadirachta_indica", "Neem", "नीम", "Bitter leaves used for skin care"),
+    ("Withania_somnifera", "Ashwagandha", "अश्वगंधा", "Adaptogenic root"),
+    ("Ocimum_basilicum", "Sweet basil", None, "Culinary herb"),
+    ("Aloe_vera", "Aloe", "घृतकुमारी", "Succulent whose gel soothes burns"),
+]
+
+
+def _seed(db):
+    for species, english, hindi, description in PLANTS:
+        db.add(Plant(species_name=species, common_name_en=english, common_name_hi=hindi, description=description))
+    db.commit()
+
+
+def _names(matches):
+    return [plant.species_name for plant, _ in matches]
+
+
+def test_match_kinds_rank_in_order():
+    assert match_score("tulsi", "tulsi") == 1.0
+    assert match_score("tul", "tulsi") > match_score("uls", "tulsi") > match_score("tulasi", "tulsi") > 0
+    assert match_score("neem", "aloe vera") == 0.0
+
+
+def test_search_uses_trigram_index(db_session):
+    _seed(db_session)
+    assert search_backend(db_session) == "fts5"
+
+    assert _names(search_plants(db_session, "tulasi")[0]) == ["Ocimum_tenuiflorum"]  # Misspelt transliteration
+    assert _names(search_plants(db_session, "ashwaganda")[0]) == ["Withania_somnifera"]
+    assert _names(search_plants(db_session, "तुलसी")[0]) == ["Ocimum_tenuiflorum"]
+    assert _names(search_plants(db_session, "तुलसि")[0]) == ["Ocimum_tenuiflorum"]  # Vowel signs stay in the word
+    assert _names(search_plants(db_session, "azadirachta indica")[0]) == ["Azadirachta_indica"]
+
+    # Prefix (autocomplete) matches on any word, ties by species name
+    matches, total = search_plants(db_session, "ocimum")
+    assert total == 2 and _names(matches) == ["Ocimum_basilicum", "Ocimum_tenuiflorum"]
+    assert _names(search_plants(db_session, "basil")[0]) == ["Ocimum_basilicum"]
+
+    # Descriptions only when asked, and below any name match
+    assert search_plants(db_session, "burns")[1] == 0
+    assert _names(search_plants(db_session, "burns", include_description=True)[0]) == ["Aloe_vera"]
+
+    # Triggers keep the index in sync with the table
+    neem = db_session.query(Plant).filter(Plant.species_name == "Azadirachta_indica").one()
+    neem.common_name_en = "Margosa"
+    db_session.commit()
+    assert _names(search_plants(db_session, "margosa")[0]) == ["Azadirachta_indica"]
+    assert search_plants(db_session, "neem")[1] == 0
+    db_session.delete(neem)
+    db_session.commit()
+    assert search_plants(db_session, "margosa")[1] == 0
+
+
+def test_ilike_fallback_ranks_the_same(db_session, monkeypatch):
+    _seed(db_session)
+    fts = {q: _names(search_plants(db_session, q)[0]) for q in ("ocimum", "aloe", "sweet basil", "al")}
+    monkeypatch.setitem(plant_search._backends, str(db_session.get_bind().url), "ilike")
+    for query, expected in fts.items():
+        assert _names(search_plants(db_session, query)[0]) == expected
+
+
+def test_pages_walk_one_ordering(db_session, monkeypatch):
+    # Exact, prefix, substring, misspelt and description-only matches, with score ties
+    for i in range(12):
+        db_session.add(Plant(species_name=f"Tulsi_{i}", common_name_en="Tulsi"))
+        db_session.add(Plant(species_name=f"Holy_tulsi_{i}", common_name_en=f"Shrub {i}"))
+        db_session.add(Plant(species_name=f"Tulasi_{i}", common_name_en=f"Herb {i}"))
+        db_session.add(Plant(species_name=f"Other_{i}", description="Grown beside tulsi"))
+    db_session.commit()
+    monkeypatch.setattr(settings, "SEARCH_MAX_CANDIDATES", 30)
+    for backend in ("fts5", "ilike"):
+        monkeypatch.setitem(plant_search._backends, str(db_session.get_bind().url), backend)
+        ordering, total = search_plants(db_session, "tulsi", limit=100, include_description=True)
+        assert total == len(ordering) == 30
+        for limit in (1, 7, 30):
+            walked, totals = [], set()
+            for skip in range(0, total + limit, limit):
+                matches, page_total = search_plants(db_session, "tulsi", limit=limit, offset=skip, include_description=True)
+                walked += [plant.id for plant, _ in matches]
+                totals.add(page_total)
+            assert walked == [plant.id for plant, _ in ordering]  # No repeats, no gaps
+            assert totals == {total}
+
+
+def test_ensure_search_index_backfills_existing_database(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'plants.db'}")
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        # As if the table predated the search index
+        conn.execute(text("DROP TABLE plants_search"))
+        for suffix in ("ai", "ad", "au"):
+            conn.execute(text(f"DROP TRIGGER plants_search_{suffix}"))
+        conn.execute(text("INSERT INTO plants (species_name, common_name_en) VALUES ('Aloe_vera', 'Aloe')"))
+    plant_search._reset_backend(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        assert search_backend(db) == "ilike"
+        ensure_search_index(engine)
+        assert search_backend(db) == "fts5"
+        assert _names(search_plants(db, "alow")[0]) == ["Aloe_vera"]
+    finally:
+        db.close()
+        engine.dispose()
+
+
+def test_plant_search_endpoints(client, db_session):
+    _seed(db_session)
+    response = client.get(f"{settings.API_V1_PREFIX}/plants/search/by-name", params={"q": "ashwag"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["results"][0]["species_name"] == "Withania_somnifera" and body["results"][0]["score"] == 0.9
+
+    response = client.get(f"{settings.API_V1_PREFIX}/plants/", params={"search": "ocimum", "limit": 1})
+    body = response.json()
+    assert body["total"] == 2 and len(body["plants"]) == 1
@@ -0,0 +1,45 @@
+import numpy as np
+
+from app.services.postprocessing import softmax, summarize, top_k, weighted_sum
+
+
+def test_softmax_is_stable_for_large_logits():
+    logits = np.array([[1000.0, 999.0, -1000.0], [-5e4, -5e4, -5e4]], dtype=np.float32)
+    probs = softmax(logits)
+    assert np.isfinite(probs).all()
+    np.testing.assert_allclose(probs.sum(axis=1), 1.0, rtol=1e-6)
+    np.testing.assert_allclose(probs[1], 1 / 3, rtol=1e-6)
+    assert np.isfinite(softmax(logits, temperature=2.0)).all()
+
+
+def test_weighted_sum_with_per_class_weights():
+    first = np.array([[0.9, 0.1]], dtype=np.float32)
+    second = np.array([[0.5, 0.5]], dtype=np.float32)
+    np.testing.assert_allclose(weighted_sum([(first, 0.7), (second, 0.3)]), [[0.78, 0.22]], rtol=1e-6)
+
+    mixed = weighted_sum([(first, np.array([1.0, 0.0])), (second, np.array([0.0, 1.0]))], normalize=True)
+    np.testing.assert_allclose(mixed, [[0.9 / 1.4, 0.5 / 1.4]], rtol=1e-6)
+
+
+def test_top_k_matches_full_sort():
+    probs = softmax(np.random.default_rng(0).normal(size=(8, 40)).astype(np.float32))
+    idx, values = top_k(probs, 5)
+    np.testing.assert_array_equal(idx, np.argsort(-probs, axis=1)[:, :5])
+    np.testing.assert_array_equal(values, np.take_along_axis(probs, idx, axis=1))
+
+    idx, _ = top_k(probs[:, :3], 5)
+    assert idx.shape == (8, 3)
+
+
+def test_summarize_flags_and_dicts():
+    probs = np.array([[0.9, 0.05, 0.05], [0.7, 0.2, 0.1], [0.4, 0.35, 0.25]], dtype=np.float32)
+    batch = summarize(probs, 0.65, 0.8, ["v1", "v1", "v2"], False, k=2)
+    assert batch.is_ood.tolist() == [False, False, True]
+    assert batch.is_ambiguous.tolist() == [False, True, True]
+
+    results = batch.to_dicts(["a", "b"])
+    assert results[0]["predicted_class"] == "a"
+    assert [p["class_name"] for p in results[0]["top_predictions"]] == ["a", "b"]
+    assert results[1]["is_ambiguous"] is True
+    assert results[2]["predicted_class"] == "Unknown Object"
+    assert results[2]["model_version"] == "v2"
@@ -0,0 +1,105 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import event, text
+
+from app.config import settings
+from app.models.plant import Plant
+from app.models.prediction import Prediction
+from app.services.prediction_history import PredictionCountCache, get_prediction_count_cache
+
+
+def _seed(db_session, count=25):
+    plants = [Plant(species_name=f"Species {i}", common_name_en=f"Plant {i}") for i in range(3)]
+    db_session.add_all(plants)
+    db_session.flush()
+    base = datetime(2026, 1, 1)
+    for i in range(count):
+        db_session.add(Prediction(
+            public_id=f"p-{i}",
+            image_url=f"uploads/{i}.jpg",
+            predicted_plant_id=plants[i % 4].id if i % 4 < 3 else None,
+            confidence_score=0.9,
+            # Pairs of rows share a timestamp, so the id tie-breaker matters
+            created_at=base + timedelta(seconds=i // 2)
+        ))
+    db_session.commit()
+
+
+def test_history_pages_with_cursor(client, db_session):
+    _seed(db_session)
+    get_prediction_count_cache().clear()
+
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(db_session.get_bind(), "before_cursor_execute", record)
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 10, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"{settings.API_V1_PREFIX}/predict/history", params=params).json()
+        seen.extend(page["predictions"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+    event.remove(db_session.get_bind(), "before_cursor_execute", record)
+
+    assert [p["id"] for p in seen] == [f"p-{i}" for i in reversed(range(25))]
+    assert seen[-1]["predicted_plant"] == "Species 0" and seen[-4]["predicted_plant"] == "Unknown"
+    assert page["total"] == 25
+    # One joined SELECT per page, plus a single COUNT for all three pages
+    selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+    assert len(selects) == 4
+
+
+def _all_pages(client, limit):
+    seen, cursor = [], None
+    for _ in range(50):
+        params = {"limit": limit, **({"cursor": cursor} if cursor else {})}
+        page = client.get(f"{settings.API_V1_PREFIX}/predict/history", params=params).json()
+        seen.extend(p["id"] for p in page["predictions"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return seen
+    raise AssertionError(f"History paging did not end: {seen[-10:]}")
+
+
+def test_history_pages_through_server_default_timestamps(client, db_session):
+    # Rows timestamped by the database ("YYYY-MM-DD HH:MM:SS", no fraction), as raw inserts
+    # and older code paths leave them, mixed with a row stamped in Python (with microseconds)
+    for i in range(5):
+        db_session.execute(text("INSERT INTO predictions (public_id, image_url) VALUES (:id, 'x.jpg')"), {"id": f"s-{i}"})
+    db_session.add(Prediction(public_id="p-0", image_url="x.jpg", created_at=datetime(2000, 1, 1, 0, 0, 0, 500)))
+    db_session.commit()
+
+    assert _all_pages(client, limit=2) == ["s-4", "s-3", "s-2", "s-1", "s-0", "p-0"]
+
+
+def test_history_keeps_skip_and_reports_applied_limit(client, db_session):
+    _seed(db_session, count=5)
+    page = client.get(f"{settings.API_V1_PREFIX}/predict/history", params={"skip": 2, "limit": 500}).json()
+    assert page["skip"] == 2 and page["limit"] == 100
+    assert [p["id"] for p in page["predictions"]] == ["p-2", "p-1", "p-0"]
+
+    page = client.get(f"{settings.API_V1_PREFIX}/predict/history", params={"skip": 3, "limit": 1}).json()
+    assert [p["id"] for p in page["predictions"]] == ["p-1"]
+    next_page = client.get(
+        f"{settings.API_V1_PREFIX}/predict/history", params={"cursor": page["next_cursor"], "skip": 3}
+    ).json()
+    assert next_page["skip"] == 0 and [p["id"] for p in next_page["predictions"]] == ["p-0"]
+
+
+def test_history_rejects_bad_cursor(client):
+    response = client.get(f"{settings.API_V1_PREFIX}/predict/history", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_count_cache_reuses_total(db_session):
+    _seed(db_session, count=3)
+    cache = PredictionCountCache(ttl=60)
+    assert cache.get(db_session) == 3
+    db_session.add(Prediction(image_url="uploads/new.jpg"))
+    db_session.commit()
+    assert cache.get(db_session) == 3
+    assert PredictionCountCache(ttl=0).get(db_session) == 4
@@ -0,0 +1,161 @@
+import io
+import json
+import asyncio
+from PIL import Image
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import sessionmaker
+
+from app.config import settings
+from app.database import ensure_schema
+from app.models.prediction import Prediction
+from app.services import upload_store as upload_store_module
+from app.services.prediction_writer import PredictionWriter, get_prediction_writer
+from app.services.upload_store import LocalUploadStore
+
+
+def _row(i):
+    return {"image_url": f"uploads/{i}.jpg", "confidence_score": 0.9, "model_version": "test", "processing_time_ms": 1.0}
+
+
+def test_writer_batches_inserts(db_session):
+    writer = PredictionWriter(sessionmaker(bind=db_session.get_bind()), flush_size=4, flush_interval_ms=10000)
+
+    async def run():
+        await writer.start()
+        ids = [await writer.submit(**_row(i)) for i in range(10)]
+        # Reaching flush_size wakes the task long before the interval; everything queued goes in one transaction
+        await asyncio.sleep(0.05)
+        flushed_early = writer.rows_written
+        await writer.submit(**_row(10))
+        await writer.stop()
+        return ids, flushed_early
+
+    ids, flushed_early = asyncio.run(run())
+    assert flushed_early == 10
+    # The straggler below flush_size is written on shutdown
+    assert writer.flushes == 2 and writer.rows_written == 11
+    stored = {p.public_id for p in db_session.query(Prediction).all()}
+    assert set(ids) < stored and len(stored) == 11
+    assert not writer.pending_ids
+
+
+def test_writer_flushes_on_interval(db_session):
+    writer = PredictionWriter(sessionmaker(bind=db_session.get_bind()), flush_size=100, flush_interval_ms=20)
+
+    async def run():
+        await writer.start()
+        public_id = await writer.submit(**_row(0))
+        assert writer.is_pending(public_id)
+        await asyncio.sleep(0.2)
+        assert not writer.is_pending(public_id)
+        await writer.stop()
+
+    asyncio.run(run())
+    assert db_session.query(Prediction).count() == 1
+
+
+def test_explicit_zero_arguments_are_kept(db_session):
+    writer = PredictionWriter(
+        sessionmaker(bind=db_session.get_bind()), flush_size=100, flush_interval_ms=0, max_retries=0, spill_path=""
+    )
+    assert (writer.flush_interval, writer.max_retries, writer.spill_path) == (0, 0, "")
+
+    async def run():
+        await writer.start()
+        public_id = await writer.submit(**_row(0))
+        await asyncio.sleep(0.05)
+        assert not writer.is_pending(public_id)
+        # Idle: the loop waits for the next row instead of spinning
+        assert writer.flushes == 1
+        await writer.stop()
+
+    asyncio.run(run())
+    assert db_session.query(Prediction).count() == 1
+
+
+def test_ensure_schema_upgrades_existing_predictions_table(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        # predictions as created before public_id and the history index existed
+        conn.execute(text(
+            "CREATE TABLE predictions (id INTEGER PRIMARY KEY, user_id INTEGER, image_url VARCHAR NOT NULL, "
+            "predicted_plant_id INTEGER, confidence_score FLOAT, model_version VARCHAR, ensemble_used BOOLEAN, "
+            "feedback_correct BOOLEAN, feedback_comment VARCHAR, processing_time_ms FLOAT, "
+            "created_at DATETIME DEFAULT (CURRENT_TIMESTAMP))"
+        ))
+        conn.execute(text("INSERT INTO predictions (image_url) VALUES ('uploads/old.jpg')"))
+    try:
+        ensure_schema(engine)
+        ensure_schema(engine)  # Idempotent
+        inspector = inspect(engine)
+        assert "public_id" in {c["name"] for c in inspector.get_columns("predictions")}
+        assert {"ix_predictions_public_id", "ix_predictions_created_at_id"} <= {
+            i["name"] for i in inspector.get_indexes("predictions")
+        }
+
+        writer = PredictionWriter(sessionmaker(bind=engine))
+        public_id = asyncio.run(writer.submit(**_row(1)))
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT public_id FROM predictions ORDER BY id")).scalars().all() == [None, public_id]
+    finally:
+        engine.dispose()
+
+
+def test_failed_flush_requeues_then_spills(db_session, tmp_path, monkeypatch):
+    spill_path = tmp_path / "spill.jsonl"
+    writer = PredictionWriter(
+        sessionmaker(bind=db_session.get_bind()), flush_size=100, flush_interval_ms=10000,
+        max_retries=2, spill_path=str(spill_path)
+    )
+    write = writer._write
+    failures = [RuntimeError("database is locked")]
+
+    def flaky_write(batch):
+        if failures:
+            raise failures.pop()
+        write(batch)
+
+    def broken_write(batch):
+        raise RuntimeError("disk I/O error")
+
+    async def run():
+        # No flush loop: submit flushes at once, fails, and keeps the row queued
+        kept = await writer.submit(**_row(0))
+        assert writer.is_pending(kept) and len(writer.buffer) == 1
+        await writer.flush()
+        assert not writer.is_pending(kept)
+
+        monkeypatch.setattr(writer, "_write", broken_write)
+        spilled = await writer.submit(**_row(1))
+        await writer.stop()
+        return kept, spilled
+
+    monkeypatch.setattr(writer, "_write", flaky_write)
+    kept, spilled = asyncio.run(run())
+    assert [p.public_id for p in db_session.query(Prediction).all()] == [kept]
+    # Out of retries, the row is kept on disk rather than dropped
+    assert [json.loads(line)["public_id"] for line in spill_path.read_text().splitlines()] == [spilled]
+    assert writer.rows_spilled == 1 and not writer.pending_ids and not writer.attempts
+
+
+def test_feedback_on_queued_prediction(client, tmp_path, monkeypatch):
+    # Long interval: the row is still queued when feedback arrives
+    monkeypatch.setattr(get_prediction_writer(), "flush_interval", 60.0)
+    monkeypatch.setattr(upload_store_module, "upload_store", LocalUploadStore(str(tmp_path / "uploads")))
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), color="green").save(buffer, format="JPEG")
+
+    response = client.post(
+        f"{settings.API_V1_PREFIX}/predict/",
+        files={"file": ("leaf.jpg", buffer.getvalue(), "image/jpeg")}
+    )
+    assert response.status_code == 200
+    prediction_id = response.json()["prediction_id"]
+
+    response = client.post(f"{settings.API_V1_PREFIX}/predict/{prediction_id}/feedback", params={"correct": True})
+    assert response.status_code == 200
+    assert response.json()["prediction_id"] == prediction_id
+
+    history = client.get(f"{settings.API_V1_PREFIX}/predict/history").json()
+    assert history["predictions"][0]["id"] == prediction_id
+    assert history["predictions"][0]["feedback_correct"] is True
@@ -0,0 +1,89 @@
+import io
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.services.preprocessing import (
+    OPENCV_AVAILABLE,
+    PreprocessCache,
+    allocate_batch,
+    decode_image,
+    preprocess_into,
+    stack_views,
+)
+
+
+def _gradient_jpeg(width, height):
+    x = np.linspace(0, 255, width, dtype=np.float32)
+    y = np.linspace(0, 255, height, dtype=np.float32)
+    rgb = np.stack([
+        np.broadcast_to(x, (height, width)),
+        np.broadcast_to(y[:, None], (height, width)),
+        np.full((height, width), 128.0)
+    ], axis=-1).astype(np.uint8)
+    buffer = io.BytesIO()
+    Image.fromarray(rgb).save(buffer, format="JPEG", quality=95)
+    return buffer.getvalue()
+
+
+def _reference(image_bytes):
+    """The original full-resolution decode path"""
+    image = Image.open(io.BytesIO(image_bytes)).convert("RGB").resize((224, 224))
+    return np.transpose(np.array(image, dtype=np.float32) / 127.5 - 1.0, (2, 0, 1))
+
+
+@pytest.mark.parametrize("backend", ["pillow", "opencv"])
+def test_reduced_decode_matches_full_decode(backend):
+    if backend == "opencv" and not OPENCV_AVAILABLE:
+        pytest.skip("OpenCV not installed")
+    image_bytes = _gradient_jpeg(2016, 1512)
+
+    batch = allocate_batch(2)
+    preprocess_into(image_bytes, batch[1], backend=backend)
+
+    assert batch.shape == (2, 3, 224, 224)
+    assert batch.dtype == np.float32
+    assert -1.0 <= batch[1].min() and batch[1].max() <= 1.0
+    # DCT-domain downscaling is a slightly different filter, not a different image
+    assert np.abs(batch[1] - _reference(image_bytes)).mean() < 0.02
+
+
+def test_decode_handles_non_jpeg_and_grayscale():
+    buffer = io.BytesIO()
+    Image.new("L", (300, 200), color=90).save(buffer, format="PNG")
+    rgb = decode_image(buffer.getvalue(), (224, 224))
+    assert rgb.shape == (224, 224, 3)
+    assert rgb.dtype == np.uint8
+
+
+def test_decode_rejects_garbage():
+    with pytest.raises(Exception):
+        decode_image(b"definitely not an image")
+
+
+def test_preprocess_cache_decodes_each_upload_once():
+    cache = PreprocessCache(max_entries=2)
+    first, second, third = (_gradient_jpeg(320 + i, 240) for i in range(3))
+
+    entry = cache.get(first)
+    assert cache.get(first) is entry
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
+
+    cache.get(second)
+    cache.get(third)  # evicts `first`, the least recently used
+    assert cache.stats()["entries"] == 2
+    assert cache.get(first) is not entry
+
+    cache.get(second, store=False)
+    assert cache.stats()["entries"] == 2
+
+
+def test_cached_image_is_read_only_and_yields_per_model_views():
+    entry = PreprocessCache().get(_gradient_jpeg(640, 480))
+    with pytest.raises(ValueError):
+        entry.rgb[0, 0, 0] = 0
+
+    batches = stack_views([entry, entry], ["symmetric", "raw"])
+    assert batches["symmetric"].shape == (2, 3, 224, 224)
+    np.testing.assert_allclose(batches["raw"], (batches["symmetric"] + 1.0) * 127.5, atol=1e-3)
+    np.testing.assert_array_equal(entry.view("symmetric"), batches["symmetric"][:1])
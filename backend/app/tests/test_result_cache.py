@@ -0,0 +1,84 @@
+import io
+import time
+from PIL import Image
+
+from app.config import settings
+from app.services.ml_service import MLService
+from app.services.result_cache import ResultCache
+from app.tests.conftest import write_tiny_onnx_model
+
+
+def _jpeg_bytes(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), color=color).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def test_result_cache_lru_and_ttl(monkeypatch):
+    cache = ResultCache(max_entries=2, ttl_seconds=60)
+    cache.put("a", {"predicted_class": "a"})
+    cache.put("b", {"predicted_class": "b"})
+    assert cache.get("a") == {"predicted_class": "a"}
+    cache.put("c", {"predicted_class": "c"})  # evicts "b"
+    assert cache.get("b") is None
+
+    # Callers get copies, never the cached dict itself
+    cache.get("a")["predicted_class"] = "mutated"
+    assert cache.get("a")["predicted_class"] == "a"
+
+    now = time.time()
+    monkeypatch.setattr("app.services.result_cache.time.time", lambda: now + 61)
+    assert cache.get("a") is None
+    assert cache.stats()["entries"] == 1
+
+
+def test_result_cache_disk_tier_is_per_fingerprint(tmp_path):
+    writer = ResultCache(max_entries=4, disk_dir=str(tmp_path))
+    writer.set_fingerprint("v1")
+    writer.put("digest", {"predicted_class": "a"})
+
+    reader = ResultCache(max_entries=4, disk_dir=str(tmp_path))
+    reader.set_fingerprint("v1")
+    assert reader.get("digest") == {"predicted_class": "a"}
+    assert reader.stats()["disk_hits"] == 1
+
+    reader.set_fingerprint("v2")
+    assert reader.get("digest") is None
+
+
+def test_repeat_predictions_skip_inference(fake_ml_service):
+    session = fake_ml_service.mobilenet_session
+    image = _jpeg_bytes("white")
+
+    first = fake_ml_service.predict(image)
+    runs = len(session.batch_sizes)
+    assert fake_ml_service.predict(image) == first
+    assert len(session.batch_sizes) == runs
+
+    # Batches reuse cached results and infer in-batch duplicates once
+    results = fake_ml_service.predict_batch([image, _jpeg_bytes("black"), _jpeg_bytes("black")])
+    assert results[0] == first
+    assert results[1] == results[2]
+    assert session.batch_sizes[runs:] == [1]
+    assert fake_ml_service.result_cache.stats()["hits"] == 2
+
+
+def test_reload_with_new_models_invalidates_results(onnx_model_dir, monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_BATCHING_ENABLED", False)
+    image = _jpeg_bytes((200, 40, 90))
+
+    service = MLService()
+    service.load_models()
+    service.predict(image)
+    fingerprint = service.result_cache.fingerprint
+    assert service.result_cache.stats()["entries"] == 1
+
+    # Same files: cache survives the reload
+    service.load_models()
+    assert service.result_cache.stats()["entries"] == 1
+
+    write_tiny_onnx_model(settings.MOBILENET_MODEL_PATH, seed=7)
+    service.load_models()
+    assert service.result_cache.fingerprint != fingerprint
+    assert service.result_cache.stats()["entries"] == 0
+    service.shutdown()
@@ -0,0 +1,106 @@
+import numpy as np
+from sqlalchemy import text
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.metrics.pairwise import cosine_similarity
+
+from app.config import settings
+from app.models.plant import Plant, MedicinalProperty
+from app.services.recommendation_service import get_recommendation_service
+from app.services.similarity_index import SimilarityIndex
+
+AILMENTS = ["cough", "fever", "skin rash", "digestion", "headache", "joint pain", "insomnia", "acidity"]
+
+
+def _seed(db_session, count=30):
+    rng = np.random.default_rng(0)
+    for i in range(count):
+        plant = Plant(species_name=f"Species {i}", common_name_en=f"Plant {i}", description=f"Plant number {i}")
+        db_session.add(plant)
+        db_session.flush()
+        for ailment in rng.choice(AILMENTS, size=rng.integers(1, 4), replace=False):
+            db_session.add(MedicinalProperty(plant_id=plant.id, ailment=ailment, usage_description=f"Relieves {ailment}"))
+    db_session.commit()
+
+
+def _neighbor_tables(index):
+    # Scores rather than ids: plants with identical texts tie
+    return {plant_id: np.round(index.neighbor_scores[plant_id], 5).tolist() for plant_id in index.neighbor_scores}
+
+
+def test_index_matches_full_refit(db_session):
+    _seed(db_session)
+    index = SimilarityIndex(top_k=5)
+    index.build(db_session)
+
+    # The per-request computation this index replaces
+    plants = db_session.query(Plant).order_by(Plant.id).all()
+    texts = [" ".join(f"{p.ailment} {p.usage_description or ''}" for p in plant.medicinal_properties) for plant in plants]
+    matrix = TfidfVectorizer(stop_words='english', max_features=100).fit_transform(texts)
+    similarities = cosine_similarity(matrix)
+
+    for row, plant in enumerate(plants):
+        expected = np.sort(np.delete(similarities[row], row))[::-1][:5]
+        found = [r["similarity_score"] for r in index.similar(plant.id, 5)]
+        np.testing.assert_allclose(found, expected, atol=1e-5)
+    # Larger limits than the neighbour table are scored on demand
+    assert len(index.similar(plants[0].id, 12)) == 12
+
+
+def test_incremental_update_matches_recompute(db_session):
+    _seed(db_session)
+    index = SimilarityIndex(top_k=5, refit_fraction=1.0)
+    index.build(db_session)
+
+    db_session.add(MedicinalProperty(plant_id=3, ailment="insomnia", usage_description="Calms the mind"))
+    new_plant = Plant(species_name="Species new", common_name_en="New")
+    db_session.add(new_plant)
+    db_session.flush()
+    db_session.add(MedicinalProperty(plant_id=new_plant.id, ailment="cough", usage_description="Relieves cough"))
+    db_session.delete(db_session.get(Plant, 7))
+    db_session.query(MedicinalProperty).filter(MedicinalProperty.plant_id == 7).delete()
+    db_session.commit()
+
+    index.update(db_session, {3, 7, new_plant.id})
+    incremental = _neighbor_tables(index)
+    index._recompute_rows(np.arange(len(index.plant_ids)))
+    assert incremental == _neighbor_tables(index)
+    assert index.similar(7, 5) is None
+    assert all(7 not in neighbors.tolist() for neighbors in index.neighbor_ids.values())
+    assert index.similar(new_plant.id, 5)
+
+
+def test_commits_mark_plants_dirty(client, db_session):
+    _seed(db_session, count=8)
+    service = get_recommendation_service()
+    service.similarity_index.clear()
+
+    response = client.get(f"{settings.API_V1_PREFIX}/recommend/similar/1", params={"limit": 3})
+    assert response.status_code == 200
+    assert response.json()["count"] == 3
+
+    db_session.add(MedicinalProperty(plant_id=2, ailment="fever", usage_description="Reduces fever"))
+    db_session.commit()
+    assert 2 in service.similarity_index._dirty
+
+    client.get(f"{settings.API_V1_PREFIX}/recommend/similar/1")
+    assert not service.similarity_index._dirty
+    service.similarity_index.clear()
+
+
+def test_rebuilds_after_writes_from_another_process(db_session, monkeypatch):
+    _seed(db_session, count=8)
+    index = SimilarityIndex(top_k=3)
+    index.ensure_current(db_session)
+    assert index.similar(99, 3) is None
+
+    # Raw SQL stands in for another worker: no session events reach this index
+    db_session.execute(text("INSERT INTO plants (id, species_name, common_name_en) VALUES (99, 'Species 99', 'Other')"))
+    db_session.execute(text("INSERT INTO medicinal_properties (plant_id, ailment, usage_description) VALUES (99, 'cough', 'Relieves cough')"))
+    db_session.commit()
+
+    index.ensure_current(db_session)
+    assert index.similar(99, 3) is None  # Within CATALOGUE_CHECK_SECONDS of the last check
+
+    monkeypatch.setattr(settings, "CATALOGUE_CHECK_SECONDS", 0)
+    index.ensure_current(db_session)
+    assert index.similar(99, 3)
@@ -0,0 +1,115 @@
+import io
+import asyncio
+import hashlib
+import pytest
+from PIL import Image
+from fastapi import HTTPException, UploadFile
+
+from app.config import settings
+from app.middleware.upload_limit import UploadLimitMiddleware
+from app.services.upload_reader import UnsupportedImageType, UploadTooLarge, read_image_upload
+
+
+def _jpeg_bytes(size=64):
+    buffer = io.BytesIO()
+    Image.new("RGB", (size, size), color="green").save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+class CountingFile(io.BytesIO):
+    """Spooled-file stand-in that records how much was read"""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.bytes_read += len(chunk)
+        return chunk
+
+
+def test_reads_in_chunks_and_hashes():
+    data = _jpeg_bytes(256)
+    upload = asyncio.run(read_image_upload(UploadFile(io.BytesIO(data), filename="leaf"), chunk_size=100))
+    assert upload.data == data
+    assert upload.digest == hashlib.sha256(data).hexdigest()
+    assert upload.extension == ".jpg"
+
+
+def test_rejects_by_magic_bytes_after_first_chunk():
+    # The content type would say image/jpeg; the bytes say otherwise
+    source = CountingFile(b"%PDF-1.7" + b"\0" * 10000)
+    with pytest.raises(UnsupportedImageType):
+        asyncio.run(read_image_upload(UploadFile(source, filename="leaf.jpg"), chunk_size=1024))
+    assert source.bytes_read == 1024
+
+
+def test_stops_reading_once_limit_is_crossed():
+    data = _jpeg_bytes(512)
+    source = CountingFile(data)
+    # Unknown size: the limit is enforced while reading
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(read_image_upload(UploadFile(source), max_size=1000, chunk_size=400))
+    assert source.bytes_read == 1200
+
+    # Known size: rejected without reading at all
+    source = CountingFile(data)
+    with pytest.raises(UploadTooLarge):
+        asyncio.run(read_image_upload(UploadFile(source, size=len(data)), max_size=1000))
+    assert source.bytes_read == 0
+
+
+def test_predict_rejects_non_image_and_oversized(client, monkeypatch):
+    response = client.post(
+        f"{settings.API_V1_PREFIX}/predict/",
+        files={"file": ("leaf.jpg", b"not really a jpeg", "image/jpeg")}
+    )
+    assert response.status_code == 400
+
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 1000)
+    response = client.post(
+        f"{settings.API_V1_PREFIX}/predict/",
+        files={"file": ("leaf.jpg", _jpeg_bytes(512), "image/jpeg")}
+    )
+    assert response.status_code == 413
+
+
+def test_batch_reports_rejected_files(client):
+    response = client.post(
+        f"{settings.API_V1_PREFIX}/predict/batch",
+        files=[
+            ("files", ("leaf.jpg", _jpeg_bytes(), "image/jpeg")),
+            ("files", ("notes.txt", b"hello", "image/png")),
+        ]
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert [r["success"] for r in body["results"]] == [True, False]
+    assert body["results"][1]["error"] == "File must be an image"
+
+
+def test_middleware_aborts_streamed_body(monkeypatch):
+    monkeypatch.setattr(settings, "MAX_UPLOAD_SIZE", 1000)
+    limit = UploadLimitMiddleware.limit_for("/api/v1/predict/")
+    chunks = [b"x" * 16384] * (limit // 16384 + 5)
+    pulled = []
+
+    async def receive():
+        pulled.append(1)
+        return {"type": "http.request", "body": chunks[len(pulled) - 1], "more_body": True}
+
+    async def app(scope, receive, send):
+        while True:
+            await receive()
+
+    scope = {
+        "type": "http",
+        "path": "/api/v1/predict/",
+        # No Content-Length (chunked transfer), so only the running total can catch it
+        "headers": [(b"content-type", b"multipart/form-data; boundary=x")],
+    }
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(UploadLimitMiddleware(app)(scope, receive, None))
+    assert excinfo.value.status_code == 413
+    assert len(pulled) == limit // 16384 + 1
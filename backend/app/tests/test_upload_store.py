@@ -0,0 +1,80 @@
+import io
+import os
+import asyncio
+from PIL import Image
+
+from app.config import settings
+from app.services import upload_store as upload_store_module
+from app.services.upload_store import ClientError, LocalUploadStore, S3UploadStore, sniff_image_extension
+
+
+def _png_bytes(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (8, 8), color=color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_local_store_is_content_addressed(tmp_path):
+    store = LocalUploadStore(str(tmp_path))
+    red, blue = _png_bytes("red"), _png_bytes("blue")
+
+    async def save_all():
+        # Concurrent saves of the same bytes end up as one file
+        return await asyncio.gather(store.save(red), store.save(red), store.save(blue))
+
+    first, again, other = asyncio.run(save_all())
+    assert first == again != other
+    assert first.endswith(".png")
+    relative = os.path.relpath(first, tmp_path).split(os.sep)
+    assert relative[0] == relative[2][:2] and relative[1] == relative[2][2:4]
+    with open(first, "rb") as f:
+        assert f.read() == red
+    stored = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert len(stored) == 2 and not any(name.endswith(".tmp") for name in stored)
+
+
+def test_sniff_image_extension():
+    assert sniff_image_extension(b"\xff\xd8\xff\xe0rest") == ".jpg"
+    assert sniff_image_extension(b"RIFF\x00\x00\x00\x00WEBPVP8 ") == ".webp"
+    assert sniff_image_extension(b"%PDF-1.7") is None
+
+
+class FakeS3Client:
+    def __init__(self):
+        self.objects = {}
+        self.puts = 0
+
+    def head_object(self, Bucket, Key):
+        if (Bucket, Key) not in self.objects:
+            raise ClientError({"Error": {"Code": "404"}}, "HeadObject")
+        return {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[(Bucket, Key)] = Body
+        self.puts += 1
+
+
+def test_s3_store_skips_existing_objects():
+    client = FakeS3Client()
+    store = S3UploadStore("plants", "uploads/", client=client)
+    data = _png_bytes("green")
+
+    url = asyncio.run(store.save(data))
+    assert asyncio.run(store.save(data)) == url
+    assert url.startswith("s3://plants/uploads/") and url.endswith(".png")
+    assert client.puts == 1
+
+
+def test_predict_stores_upload_by_hash(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(upload_store_module, "upload_store", LocalUploadStore(str(tmp_path)))
+    data = _png_bytes("green")
+
+    for _ in range(2):
+        response = client.post(
+            f"{settings.API_V1_PREFIX}/predict/",
+            files={"file": ("leaf.png", data, "image/png")}
+        )
+        assert response.status_code == 200
+
+    stored = [name for _, _, names in os.walk(tmp_path) for name in names]
+    assert len(stored) == 1 and stored[0].endswith(".png")
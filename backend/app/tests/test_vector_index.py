@@ -0,0 +1,57 @@
+import numpy as np
+
+from app.config import settings
+from app.models.plant import Plant
+from app.services.recommendation_service import RecommendationService
+from app.services.vector_index import IVFIndex, normalize_rows
+
+
+def _clustered(count=4000, dim=32, clusters=40, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim))
+    return (centers[rng.integers(0, clusters, count)] + rng.standard_normal((count, dim)) * 0.3).astype(np.float32)
+
+
+def test_ivf_recall_and_exact_mode():
+    vectors = _clustered()
+    queries = vectors[:50] + 0.05
+    index = IVFIndex.build(vectors, nlist=32, dtype="float32")
+
+    scores = normalize_rows(queries) @ normalize_rows(vectors).T
+    truth = np.argsort(-scores, axis=1)[:, :10]
+
+    found, found_scores = index.search(queries, k=10, nprobe=8)
+    recall = np.mean([len(set(f) & set(t)) / 10 for f, t in zip(found, truth)])
+    assert recall > 0.9
+    assert np.all(np.diff(found_scores, axis=1) <= 1e-6)
+
+    exact, exact_scores = index.search_exact(queries, k=10)
+    np.testing.assert_allclose(exact_scores, np.take_along_axis(scores, truth, axis=1), atol=1e-5)
+
+
+def test_saved_index_is_memory_mapped(tmp_path):
+    vectors = _clustered(count=500)
+    ids = np.arange(1000, 1500)
+    index = IVFIndex.build(vectors, ids=ids, nlist=8)
+    index.save(str(tmp_path))
+
+    loaded = IVFIndex.load(str(tmp_path), nprobe=8)
+    assert isinstance(loaded.vectors, np.memmap) and loaded.vectors.dtype == np.float16
+    found, _ = loaded.search(vectors[:5], k=1)
+    assert found[:, 0].tolist() == list(range(1000, 1005))
+    assert loaded.vector(1003) is not None and loaded.vector(5) is None
+
+
+def test_similar_plants_from_embedding_index(db_session, tmp_path, monkeypatch):
+    for i in range(6):
+        db_session.add(Plant(species_name=f"Species {i}", common_name_en=f"Plant {i}"))
+    db_session.commit()
+    # Plants 1-3 point one way, 4-6 the other
+    embeddings = np.array([[1, 0.1], [1, 0.2], [1, 0.3], [0.1, 1], [0.2, 1], [0.3, 1]], dtype=np.float32)
+    IVFIndex.build(embeddings, ids=np.arange(1, 7), nlist=2).save(str(tmp_path))
+    monkeypatch.setattr(settings, "PLANT_EMBEDDING_INDEX_DIR", str(tmp_path))
+
+    service = RecommendationService()
+    similar = service.get_similar_plants(plant_id=1, db=db_session, limit=2)
+    assert [plant["id"] for plant in similar] == [2, 3]
+    assert similar[0]["species_name"] == "Species 1"
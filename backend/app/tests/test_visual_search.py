@@ -0,0 +1,197 @@
+import io
+import os
+
+import numpy as np
+import pytest
+from PIL import Image
+
+from app.api.v1 import recommend as recommend_module
+from app.config import settings
+from app.models.plant import Plant
+from app.services.ml_service import MLService
+from app.services import model_embeddings
+from app.services.model_embeddings import EMBEDDING_OUTPUT, expose_embedding_output, find_embedding_tensor
+from app.services.visual_index import VisualIndex
+
+
+def _png_bytes(color):
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), color=color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def embedding_service(onnx_model_dir, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_BATCHING_ENABLED", False)
+    monkeypatch.setattr(settings, "ML_WARMUP_BATCH_SIZES", [1])
+    monkeypatch.setattr(settings, "VISUAL_INDEX_DIR", str(tmp_path / "visual_index"))
+    service = MLService()
+    service.load_models()
+    assert not service.use_mock
+    yield service
+    service.shutdown()
+
+
+def test_expose_embedding_output_adds_penultimate_features(onnx_model_dir, tmp_path):
+    onnx = pytest.importorskip("onnx")
+    import onnxruntime as ort
+
+    model_path = settings.MOBILENET_MODEL_PATH
+    assert find_embedding_tensor(onnx.load(model_path).graph) == "features"
+    output_path = expose_embedding_output(model_path, str(tmp_path / "embedding" / "model.onnx"))
+
+    session = ort.InferenceSession(output_path, providers=["CPUExecutionProvider"])
+    assert [output.name for output in session.get_outputs()] == ["logits", EMBEDDING_OUTPUT]
+    batch = np.random.default_rng(0).uniform(-1, 1, (2, 3, 224, 224)).astype(np.float32)
+    logits, embedding = session.run(None, {"input": batch})
+    np.testing.assert_allclose(embedding, batch.mean(axis=(2, 3)), rtol=1e-4, atol=1e-6)
+    original = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+    np.testing.assert_allclose(logits, original.run(None, {"input": batch})[0], rtol=1e-5)
+
+
+def test_predictions_and_embeddings_share_one_run(embedding_service):
+    assert embedding_service.bundle.embedding_outputs == {"mobilenet": ("logits", EMBEDDING_OUTPUT)}
+    assert embedding_service.visual_search_status() == "on"
+    session = embedding_service.bundle.sessions["mobilenet"]
+    calls = []
+    original_run = session.run
+    embedding_service.bundle.sessions["mobilenet"] = type(
+        "CountingSession", (), {
+            "get_inputs": lambda self: session.get_inputs(),
+            "run": lambda self, names, feeds: calls.append(names) or original_run(names, feeds)
+        }
+    )()
+
+    images = [_png_bytes("red"), _png_bytes("blue")]
+    results, embeddings = embedding_service.predict_with_embeddings(images)
+    assert calls == [["logits", EMBEDDING_OUTPUT]]
+    assert embeddings.shape == (2, 3)
+    # Solid colours: the pooled features are the [-1, 1] scaled RGB values
+    np.testing.assert_allclose(embeddings[0], [1.0, -1.0, -1.0], atol=0.02)
+    np.testing.assert_allclose(embeddings[1], [-1.0, -1.0, 1.0], atol=0.02)
+    assert [r["predicted_class"] for r in results] == [r["predicted_class"] for r in embedding_service.predict_batch(images)]
+
+
+def test_no_embeddings_without_visual_index(onnx_model_dir, monkeypatch):
+    monkeypatch.setattr(settings, "INFERENCE_BATCHING_ENABLED", False)
+    monkeypatch.setattr(settings, "ML_WARMUP_BATCH_SIZES", [1])
+    monkeypatch.setattr(settings, "VISUAL_INDEX_DIR", None)
+    service = MLService()
+    service.load_models()
+    try:
+        results, embeddings = service.predict_with_embeddings([_png_bytes("red")])
+        assert embeddings is None and results[0]["predicted_class"]
+        assert not os.path.exists(os.path.join(onnx_model_dir, "embedding"))
+        assert service.visual_search_status() == "off"
+    finally:
+        service.shutdown()
+
+
+def test_visual_search_reported_unavailable_without_onnx(onnx_model_dir, tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(settings, "INFERENCE_BATCHING_ENABLED", False)
+    monkeypatch.setattr(settings, "ML_WARMUP_BATCH_SIZES", [1])
+    monkeypatch.setattr(settings, "VISUAL_INDEX_DIR", str(tmp_path / "visual_index"))
+    monkeypatch.setattr(model_embeddings, "ONNX_GRAPH_AVAILABLE", False)
+    service = MLService()
+    service.load_models()
+    try:
+        assert not service.use_mock and not service.bundle.embedding_outputs
+        assert service.visual_search_status() == "unavailable"
+        assert any(r.levelname == "ERROR" and "visual search disabled" in r.message for r in caplog.records)
+    finally:
+        service.shutdown()
+
+
+def test_visual_index_round_trip(tmp_path):
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((40, 8)).astype(np.float32)
+    images = [{"path": f"class{i % 4}/{i}.jpg", "label": f"class{i % 4}"} for i in range(40)]
+    VisualIndex.build(embeddings, images, model="mobilenet", nlist=4, dtype="float32").save(str(tmp_path))
+
+    index = VisualIndex.load(str(tmp_path), nprobe=4)
+    assert len(index) == 40 and index.model == "mobilenet"
+    matches = index.search(embeddings[13] * 3, limit=3)
+    assert matches[0]["path"] == "class1/13.jpg"
+    assert matches[0]["similarity_score"] == pytest.approx(1.0, abs=1e-5)
+    with pytest.raises(ValueError):
+        index.search(np.ones(5), limit=3)
+
+
+def test_visual_endpoint_returns_similar_reference_images(client, db_session, embedding_service, monkeypatch):
+    db_session.add(Plant(species_name="Rosa_red", common_name_en="Red"))
+    db_session.commit()
+    colors = {"Rosa_red": "red", "Mentha_green": "green", "Blue_leaf": "blue"}
+    images, data = [], []
+    for label, color in colors.items():
+        for shade in range(3):
+            images.append({"path": f"{label}/{shade}.png", "label": label})
+            data.append(_png_bytes(color))
+    _, embeddings = embedding_service.predict_with_embeddings(data)
+    VisualIndex.build(embeddings, images, model="mobilenet", nlist=2).save(settings.VISUAL_INDEX_DIR)
+    monkeypatch.setattr(recommend_module, "get_ml_service", lambda: embedding_service)
+
+    response = client.post(
+        f"{settings.API_V1_PREFIX}/recommend/visual",
+        params={"limit": 3},
+        files={"file": ("leaf.png", _png_bytes((250, 5, 5)), "image/png")}
+    )
+    assert response.status_code == 200
+    body = response.json()
+    assert body["count"] == 3
+    assert {image["label"] for image in body["images"]} == {"Rosa_red"}
+    assert body["images"][0]["plant"]["species_name"] == "Rosa_red"
+
+    response = client.post(
+        f"{settings.API_V1_PREFIX}/recommend/visual",
+        files={"file": ("notes.txt", b"not an image", "text/plain")}
+    )
+    assert response.status_code == 400
+
+
+def test_visual_endpoint_unavailable_without_index(client, monkeypatch):
+    monkeypatch.setattr(settings, "VISUAL_INDEX_DIR", None)
+    response = client.post(
+        f"{settings.API_V1_PREFIX}/recommend/visual",
+        files={"file": ("leaf.png", _png_bytes("red"), "image/png")}
+    )
+    assert response.status_code == 503
+
+
+def test_cascade_embeds_each_row_once(onnx_model_dir, tmp_path, monkeypatch):
+    from app.tests.conftest import write_tiny_onnx_model
+    monkeypatch.setattr(settings, "INFERENCE_BATCHING_ENABLED", False)
+    monkeypatch.setattr(settings, "ML_WARMUP_BATCH_SIZES", [1])
+    monkeypatch.setattr(settings, "VISUAL_INDEX_DIR", str(tmp_path / "visual_index"))
+    monkeypatch.setattr(settings, "VISUAL_EMBEDDING_MODEL", "efficientnet")
+    write_tiny_onnx_model(settings.ENHANCED_MODEL_PATH, seed=1)
+    service = MLService()
+    service.load_models()
+    try:
+        bundle = service.bundle
+        assert list(bundle.embedding_outputs) == ["efficientnet"]
+        # Mean-zero rows give uniform logits and escalate; the solid white row exits early
+        batch = np.random.default_rng(0).uniform(-1, 1, (4, 3, 224, 224)).astype(np.float32)
+        batch[2] = 1.0
+        expected = {}
+        service._run_members({"symmetric": batch}, bundle, ["efficientnet"], expected)
+
+        rows_run = []
+        session = bundle.sessions["efficientnet"]
+        bundle.sessions["efficientnet"] = type(
+            "CountingSession", (), {
+                "get_inputs": lambda self: session.get_inputs(),
+                "run": lambda self, names, feeds: rows_run.append(len(feeds["input"])) or session.run(names, feeds)
+            }
+        )()
+        monkeypatch.setattr(settings, "ENSEMBLE_EXECUTION_MODE", "cascade")
+        monkeypatch.setattr(settings, "CASCADE_CONFIDENCE_THRESHOLD", 0.0)
+        monkeypatch.setattr(settings, "CASCADE_MARGIN_THRESHOLD", 0.1)
+        embeddings = {}
+        inference = service._infer_batch({"symmetric": batch}, bundle, embeddings)
+
+        escalated = [len(stages) > 1 for stages in inference[4]]
+        assert escalated == [True, True, False, True]
+        assert sum(rows_run) == 4  # Escalated rows in the cascade, the others once more
+        np.testing.assert_allclose(embeddings["efficientnet"], expected["efficientnet"], rtol=1e-5)
+    finally:
+        service.shutdown()
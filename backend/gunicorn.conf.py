@@ -0,0 +1,30 @@
+"""
+Gunicorn configuration for multi-worker deployments
+
+Usage:
+    gunicorn -c gunicorn.conf.py app.main:app
+
+Workers do not inherit ONNX Runtime sessions from the master (their thread
+pools don't survive fork), so `preload_app` stays off and each worker creates
+its own sessions. With ORT_MMAP_WEIGHTS=True those sessions map the same
+external-data files, which the master prepares once in `on_starting`, so the
+model weights are resident once no matter how many workers run.
+"""
+
+import os
+import multiprocessing
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = False
+timeout = 120
+
+
+def on_starting(server):
+    """Runs once in the master before any worker is forked"""
+    from app.services.ml_service import get_ml_service
+
+    prepared = get_ml_service().prepare_model_files()
+    if prepared:
+        server.log.info(f"Prepared {len(prepared)} shared model file(s) for mmap")
@@ -0,0 +1,103 @@
+"""
+ANN Index Benchmark
+Build time, query latency and recall@k of the pure-NumPy IVF index
+(app/services/vector_index.py) against exact brute-force cosine search, on
+synthetic clustered embeddings.
+
+Usage:
+    python scripts/benchmarks/bench_ann.py --sizes 10000 100000 1000000
+    python scripts/benchmarks/bench_ann.py --sizes 100000 --dim 256 --dtype float32 --nprobe 1 4 16 64
+"""
+
+import sys
+import os
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import numpy as np
+
+from app.services.vector_index import IVFIndex, normalize_rows
+
+
+def make_embeddings(count: int, dim: int, clusters: int, rng) -> np.ndarray:
+    """Gaussian blobs around random directions, roughly like model embeddings"""
+    centers = normalize_rows(rng.standard_normal((clusters, dim), dtype=np.float32))
+    vectors = np.empty((count, dim), dtype=np.float32)
+    for start in range(0, count, 100_000):
+        n = min(100_000, count - start)
+        vectors[start:start + n] = centers[rng.integers(0, clusters, n)]
+        vectors[start:start + n] += rng.standard_normal((n, dim), dtype=np.float32) * 0.1
+    return vectors
+
+
+def exact_top_k(normalized: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Brute-force baseline: float32 matrix in RAM, one matmul + partition"""
+    scores = normalize_rows(np.atleast_2d(queries)) @ normalized.T
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    return np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+
+
+def timed_queries(fn, queries, repeat: int = 1):
+    timings = []
+    for _ in range(repeat):
+        for query in queries:
+            start = time.perf_counter()
+            fn(query)
+            timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=128)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for size in args.sizes:
+        vectors = make_embeddings(size, args.dim, clusters=max(10, size // 500), rng=rng)
+        picks = rng.integers(0, size, args.queries)
+        queries = vectors[picks] + rng.standard_normal((args.queries, args.dim), dtype=np.float32) * 0.05
+
+        print(f"\n⏱️  {size:,} vectors x {args.dim} ({args.dtype})")
+        print("-" * 66)
+        start = time.perf_counter()
+        index = IVFIndex.build(vectors, dtype=args.dtype)
+        build_s = time.perf_counter() - start
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            index.save(tmp_dir)
+            index = IVFIndex.load(tmp_dir)  # Memory-mapped, like the service uses it
+            size_mb = os.path.getsize(os.path.join(tmp_dir, "vectors.npy")) / 1e6
+            print(f"🏗️  Build {build_s:.1f}s, nlist={index.nlist}, vectors on disk {size_mb:.0f} MB")
+
+            normalized = normalize_rows(vectors)
+            del vectors
+            truth = np.concatenate([exact_top_k(normalized, queries[i:i + 50], args.k)
+                                    for i in range(0, len(queries), 50)])
+            exact_ms = timed_queries(lambda q: exact_top_k(normalized, q, args.k), queries[:20])
+            del normalized
+            print(f"{'exact':>12}: {exact_ms:8.2f} ms/query   recall@{args.k} 1.000   (float32 brute force)")
+            for nprobe in args.nprobe:
+                if nprobe > index.nlist:
+                    continue
+                found, _ = index.search(queries, args.k, nprobe=nprobe)
+                # Row numbers are the ids here
+                recall = np.mean([len(set(f) & set(t)) / args.k for f, t in zip(found, truth)])
+                ms = timed_queries(lambda q: index.search(q, args.k, nprobe=nprobe), queries[:100])
+                print(f"{'nprobe=' + str(nprobe):>12}: {ms:8.2f} ms/query   recall@{args.k} {recall:.3f}   "
+                      f"({exact_ms / ms:5.1f}x)")
+            del index
+
+
+if __name__ == "__main__":
+    main()
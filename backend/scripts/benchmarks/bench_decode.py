@@ -0,0 +1,92 @@
+"""
+Image Decode Benchmark
+Compares the original full-resolution decode with the Pillow draft-mode and
+OpenCV IMREAD_REDUCED_* paths on representative upload sizes.
+
+Usage:
+    python scripts/benchmarks/bench_decode.py --iterations 30
+"""
+
+import sys
+import io
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[2]
+sys.path.append(str(backend_dir))
+
+import numpy as np
+from PIL import Image
+
+from app.services.preprocessing import OPENCV_AVAILABLE, allocate_batch, preprocess_into
+
+SIZES = {
+    "VGA 640x480": (640, 480),
+    "FHD 1920x1080": (1920, 1080),
+    "12MP 4032x3024": (4032, 3024),
+}
+
+
+def make_photo(width: int, height: int) -> bytes:
+    """Smooth noise JPEG so file sizes resemble real phone photos"""
+    rng = np.random.default_rng(0)
+    small = rng.integers(0, 255, (height // 16 + 1, width // 16 + 1, 3), dtype=np.uint8)
+    image = Image.fromarray(small).resize((width, height), Image.BILINEAR)
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def baseline(image_bytes: bytes) -> np.ndarray:
+    """Original MLService.preprocess_image"""
+    image = Image.open(io.BytesIO(image_bytes))
+    if image.mode != "RGB":
+        image = image.convert("RGB")
+    image = image.resize((224, 224))
+    img_array = np.array(image, dtype=np.float32)
+    img_array = (img_array / 127.5) - 1.0
+    img_array = np.transpose(img_array, (2, 0, 1))
+    return np.expand_dims(img_array, axis=0)
+
+
+def time_it(fn, iterations: int) -> float:
+    fn()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    buffer = allocate_batch(1)[0]
+    paths = {
+        "baseline (full decode)": lambda data: baseline(data),
+        "pillow, no draft": lambda data: preprocess_into(data, buffer, backend="pillow", draft=False),
+        "pillow + draft": lambda data: preprocess_into(data, buffer, backend="pillow", draft=True),
+    }
+    if OPENCV_AVAILABLE:
+        paths["opencv IMREAD_REDUCED"] = lambda data: preprocess_into(data, buffer, backend="opencv")
+    else:
+        print("⚠️  OpenCV not installed, skipping its decode path")
+
+    print("⏱️  DECODE BENCHMARK (median ms per image, 224x224 output)")
+    print("-" * 70)
+    for label, (width, height) in SIZES.items():
+        data = make_photo(width, height)
+        print(f"\n📸 {label} JPEG ({len(data) / 1e6:.2f} MB)")
+        reference = time_it(lambda: paths["baseline (full decode)"](data), args.iterations)
+        for name, fn in paths.items():
+            ms = time_it(lambda: fn(data), args.iterations)
+            print(f"   {name:<24} {ms:8.2f} ms   {reference / ms:5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
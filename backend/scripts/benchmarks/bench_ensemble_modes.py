@@ -0,0 +1,108 @@
+"""
+Ensemble Execution Mode Benchmark
+Compares sequential, parallel and cascade (early exit) execution of the
+ensemble members. Cascade timings depend on how many images MobileNetV2 is
+sure about, so they are only meaningful with the real models and --images.
+
+Uses the real models from MODEL_DIR when present, otherwise three synthetic
+CNNs of different cost (see synthetic_models.py).
+
+Usage:
+    python scripts/benchmarks/bench_ensemble_modes.py --iterations 50 --batch-size 1
+    python scripts/benchmarks/bench_ensemble_modes.py --synthetic
+    python scripts/benchmarks/bench_ensemble_modes.py --images ../dataset/test/Tulsi --batch-size 16
+"""
+
+import sys
+import os
+import time
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[2]
+sys.path.append(str(backend_dir))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import numpy as np
+
+from app.config import settings
+from app.services.ml_service import MLService
+
+
+def use_synthetic_models(tmp_dir: str):
+    from synthetic_models import build_cnn
+
+    # Roughly mimic the relative cost of MobileNetV2 < EfficientNetV2 < ViT
+    settings.MOBILENET_MODEL_PATH = build_cnn(os.path.join(tmp_dir, "mobilenet.onnx"), width=32, depth=4, seed=1)
+    settings.ENHANCED_MODEL_PATH = build_cnn(os.path.join(tmp_dir, "efficientnet.onnx"), width=48, depth=5, seed=2)
+    settings.VIT_MODEL_PATH = build_cnn(os.path.join(tmp_dir, "vit.onnx"), width=64, depth=5, seed=3)
+
+
+def load_batch(image_dir: str, batch_size: int) -> np.ndarray:
+    from app.services.preprocessing import stack_views, get_preprocess_cache
+
+    paths = sorted(p for p in Path(image_dir).rglob("*") if p.suffix.lower() in (".jpg", ".jpeg", ".png"))[:batch_size]
+    if not paths:
+        raise SystemExit(f"❌ No images found in {image_dir}")
+    images = [get_preprocess_cache().get(p.read_bytes(), (224, 224)) for p in paths]
+    return stack_views(images, ["symmetric"])["symmetric"]
+
+
+def bench_mode(mode: str, batch: np.ndarray, iterations: int):
+    settings.ENSEMBLE_EXECUTION_MODE = mode
+    service = MLService()
+    service.load_models()
+    if service.use_mock:
+        raise SystemExit("❌ No models could be loaded; rerun with --synthetic")
+
+    for _ in range(3):
+        stages_run = service._infer_batch(batch)[4]
+    if mode == "cascade":
+        exits = sum(stages == ["mobilenet"] for stages in stages_run)
+        print(f"   {exits}/{len(stages_run)} images exit the cascade after MobileNetV2")
+
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        service._infer_batch(batch)
+        timings.append((time.perf_counter() - start) * 1000)
+    service.shutdown()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--synthetic", action="store_true", help="Always use synthetic models")
+    parser.add_argument("--images", help="Directory of real images to batch instead of random noise")
+    args = parser.parse_args()
+
+    settings.INFERENCE_BATCHING_ENABLED = False
+    if args.images:
+        batch = load_batch(args.images, args.batch_size)
+    else:
+        batch = np.random.uniform(-1, 1, (args.batch_size, 3, 224, 224)).astype(np.float32)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if args.synthetic or not os.path.exists(settings.MOBILENET_MODEL_PATH):
+            print("🧪 Using synthetic models")
+            use_synthetic_models(tmp_dir)
+
+        print(f"⏱️  ENSEMBLE MODE BENCHMARK (batch={len(batch)}, cores={os.cpu_count()})")
+        print("-" * 50)
+        results = {}
+        for mode in ("sequential", "parallel", "cascade"):
+            timings = bench_mode(mode, batch, args.iterations)
+            results[mode] = statistics.median(timings)
+            print(f"{mode:>10}: p50 {results[mode]:8.2f} ms   "
+                  f"p90 {sorted(timings)[int(len(timings) * 0.9)]:8.2f} ms")
+
+    for mode in ("parallel", "cascade"):
+        print(f"\n🚀 {mode.capitalize()} speedup: {results['sequential'] / results[mode]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
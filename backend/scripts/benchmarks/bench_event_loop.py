@@ -0,0 +1,153 @@
+"""
+Event Loop Responsiveness Benchmark
+Measures /health latency while /api/v1/predict/ is saturated.
+
+Runs the FastAPI app in-process (httpx ASGITransport) so the event loop that
+serves /health is the same one handling predictions. The "blocking" scenario
+calls the synchronous MLService.predict from an async route, reproducing the
+old behaviour; the "async" scenario uses the real /predict/ route.
+
+Usage:
+    python scripts/benchmarks/bench_event_loop.py --concurrency 16 --duration 10
+    python scripts/benchmarks/bench_event_loop.py --simulate-ms 80   # no models on disk
+"""
+
+import sys
+import os
+import io
+import time
+import asyncio
+import argparse
+import statistics
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[2]
+sys.path.append(str(backend_dir))
+
+# Benchmark traffic must not trip the per-IP limiter
+os.environ.setdefault("RATE_LIMIT_PER_MINUTE", "100000000")
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import numpy as np
+import httpx
+from PIL import Image
+from fastapi import File, UploadFile
+
+from app.main import app
+from app.database import Base, engine
+from app.services.ml_service import get_ml_service
+
+
+class SimulatedSession:
+    """Session stand-in that holds a core for a fixed time, like ORT does"""
+
+    class _Input:
+        name = "input"
+
+    def __init__(self, latency_ms: float, num_classes: int):
+        self.latency = latency_ms / 1000.0
+        self.num_classes = num_classes
+
+    def get_inputs(self):
+        return [self._Input()]
+
+    def run(self, output_names, feeds):
+        time.sleep(self.latency)
+        batch = feeds["input"].shape[0]
+        return [np.random.randn(batch, self.num_classes).astype(np.float32)]
+
+
+@app.post("/bench/blocking-predict")
+async def blocking_predict(file: UploadFile = File(...)):
+    """Old code path: synchronous inference inside an async route"""
+    image_bytes = await file.read()
+    return get_ml_service().predict(image_bytes)
+
+
+def make_image() -> bytes:
+    img = Image.fromarray(np.random.randint(0, 255, (480, 640, 3), dtype=np.uint8))
+    buffer = io.BytesIO()
+    img.save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def probe_health(client, stop: asyncio.Event, interval: float):
+    latencies = []
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get("/health")
+        latencies.append((time.perf_counter() - start) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+
+async def hammer(client, path: str, image: bytes, stop: asyncio.Event, counter: list):
+    while not stop.is_set():
+        files = {"file": ("leaf.jpg", image, "image/jpeg")}
+        response = await client.post(path, files=files)
+        if response.status_code == 200:
+            counter[0] += 1
+
+
+async def run_scenario(name: str, path: str, args, image: bytes):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        stop = asyncio.Event()
+        counter = [0]
+        workers = [
+            asyncio.create_task(hammer(client, path, image, stop, counter))
+            for _ in range(args.concurrency if path else 0)
+        ]
+        probe = asyncio.create_task(probe_health(client, stop, args.probe_interval))
+        await asyncio.sleep(args.duration)
+        stop.set()
+        latencies = await probe
+        await asyncio.gather(*workers)
+
+    print(f"\n📊 {name}")
+    print(f"   /health samples : {len(latencies)}")
+    print(f"   /health p50     : {statistics.median(latencies):8.2f} ms")
+    print(f"   /health p99     : {percentile(latencies, 99):8.2f} ms")
+    print(f"   /health max     : {max(latencies):8.2f} ms")
+    if path:
+        print(f"   predictions/s   : {counter[0] / args.duration:8.1f}")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent prediction clients")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per scenario")
+    parser.add_argument("--probe-interval", type=float, default=0.01, help="Seconds between /health probes")
+    parser.add_argument("--simulate-ms", type=float, default=None,
+                        help="Replace ONNX sessions with a fake model taking this long per batch")
+    args = parser.parse_args()
+
+    # ASGITransport does not run the lifespan hook
+    Base.metadata.create_all(bind=engine)
+    ml_service = get_ml_service()
+    ml_service.load_models()
+    if args.simulate_ms is not None:
+        ml_service.mobilenet_session = SimulatedSession(args.simulate_ms, len(ml_service.class_names))
+        ml_service.vit_session = None
+        ml_service.efficientnet_session = None
+        ml_service.use_mock = False
+        ml_service._start_batch_scheduler()
+    elif ml_service.use_mock:
+        print("⚠️  Models not found, predictions are mocked. Use --simulate-ms for a meaningful load.")
+
+    image = make_image()
+    print("⏱️  EVENT LOOP BENCHMARK")
+    print("-" * 50)
+    await run_scenario("Idle baseline", None, args, image)
+    await run_scenario("Saturated: blocking predict()", "/bench/blocking-predict", args, image)
+    await run_scenario("Saturated: predict_async()", "/api/v1/predict/", args, image)
+    ml_service.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,149 @@
+"""
+Prediction History Benchmark
+Compares the original /predict/history query pattern (OFFSET paging, one
+Plant lookup per row, COUNT(*) per call) with the keyset-paginated joined
+query in app/services/prediction_history.py, on a seeded SQLite table.
+
+Seeding 1M rows takes a little while; the database file is kept and reused
+on later runs with the same --db and --rows.
+
+Usage:
+    python scripts/benchmarks/bench_history.py --rows 1000000
+    python scripts/benchmarks/bench_history.py --rows 100000 --db /tmp/history.db
+"""
+
+import sys
+import os
+import time
+import random
+import sqlite3
+import argparse
+import statistics
+from pathlib import Path
+from datetime import datetime, timedelta
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.plant import Plant
+from app.models.user import User  # noqa: F401  (registers the users table for create_all)
+from app.models.prediction import Prediction
+from app.services.prediction_history import PredictionCountCache, created_key, encode_cursor, history_page
+
+NUM_PLANTS = 80
+
+
+def seed(db_path: str, rows: int):
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    conn = sqlite3.connect(db_path)
+    existing = conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+    if existing == rows:
+        conn.close()
+        print(f"♻️  Reusing {rows:,} seeded predictions in {db_path}")
+        return
+    print(f"🌱 Seeding {rows:,} predictions into {db_path}...")
+    start = time.perf_counter()
+    conn.execute("DELETE FROM predictions")
+    conn.execute("DELETE FROM plants")
+    conn.executemany(
+        "INSERT INTO plants (id, species_name, common_name_en) VALUES (?, ?, ?)",
+        [(i, f"Species {i}", f"Plant {i}") for i in range(1, NUM_PLANTS + 1)]
+    )
+    rng = random.Random(0)
+    base = datetime(2024, 1, 1)
+
+    def generate():
+        for i in range(1, rows + 1):
+            # A few predictions per second, with timestamp ties
+            created_at = base + timedelta(seconds=i // 3)
+            plant_id = rng.randint(1, NUM_PLANTS) if rng.random() < 0.8 else None
+            yield (i, f"{i:08x}-0000-4000-8000-000000000000", f"uploads/{i}.jpg", plant_id,
+                   rng.random(), "mobilenet-v2", 0, 50.0, created_at.strftime("%Y-%m-%d %H:%M:%S.%f"))
+
+    conn.executemany(
+        "INSERT INTO predictions (id, public_id, image_url, predicted_plant_id, confidence_score, "
+        "model_version, ensemble_used, processing_time_ms, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        generate()
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    print(f"   done in {time.perf_counter() - start:.1f}s")
+
+
+def legacy_history(db, skip: int, limit: int):
+    """The pre-keyset endpoint body"""
+    predictions = db.query(Prediction).order_by(Prediction.created_at.desc()).offset(skip).limit(limit).all()
+    results = []
+    for pred in predictions:
+        plant = db.query(Plant).filter(Plant.id == pred.predicted_plant_id).first()
+        results.append({
+            "id": pred.id,
+            "predicted_plant": plant.species_name if plant else "Unknown",
+            "created_at": pred.created_at.isoformat() if pred.created_at else None,
+        })
+    return results, db.query(Prediction).count()
+
+
+def keyset_history(db, cursor, limit: int, counts: PredictionCountCache):
+    results, next_cursor = history_page(db, cursor, limit)
+    return results, counts.get(db)
+
+
+def bench(fn, iterations: int):
+    fn()
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--db", default="/tmp/bench_history.db")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    seed(args.db, args.rows)
+    engine = create_engine(f"sqlite:///{args.db}")
+    db = sessionmaker(bind=engine)()
+
+    plan = db.execute(text(
+        "EXPLAIN QUERY PLAN SELECT id FROM predictions WHERE (created_at, id) < ('2024-01-02', 1) "
+        "ORDER BY created_at DESC, id DESC LIMIT 21"
+    )).fetchall()
+    print(f"🔎 Keyset plan: {' / '.join(row[-1] for row in plan)}")
+
+    counts = PredictionCountCache(ttl=60)
+    print(f"\n⏱️  HISTORY BENCHMARK ({args.rows:,} rows, limit={args.limit})")
+    print("-" * 64)
+    for depth in (0, args.rows // 10, args.rows // 2, args.rows - args.limit):
+        row = db.query(created_key(db).label("created_key"), Prediction.id).order_by(
+            Prediction.created_at.desc(), Prediction.id.desc()
+        ).offset(depth - 1).first() if depth else None
+        cursor = encode_cursor(row.created_key, row.id) if row else None
+
+        legacy = bench(lambda: legacy_history(db, depth, args.limit), max(3, args.iterations // 4))
+        keyset = bench(lambda: keyset_history(db, cursor, args.limit, counts), args.iterations)
+        print(f"row {depth:>9,}: legacy {legacy:9.2f} ms   keyset {keyset:7.2f} ms   ({legacy / keyset:6.0f}x)")
+
+    start = time.perf_counter()
+    counts.clear()
+    counts.get(db)
+    print(f"\n🧮 COUNT(*) refresh (once per {counts.ttl:.0f}s): {(time.perf_counter() - start) * 1000:.1f} ms")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+"""
+Plant Search Benchmark
+Compares the original ILIKE name search (/plants/search/by-name) with the
+trigram-indexed, re-ranked search in app/services/plant_search.py on a
+seeded SQLite catalogue of synthetic plants with transliterated and
+Devanagari names.
+
+For each kind of query (exact name, 4-letter prefix, one-letter typo,
+Devanagari name) it reports median latency and how often the plant the
+query was made from is in the top 10 results.
+
+The database file is kept and reused on later runs with the same --db and
+--rows.
+
+Usage:
+    python scripts/benchmarks/bench_plant_search.py --rows 100000
+    python scripts/benchmarks/bench_plant_search.py --rows 20000 --db /tmp/plants.db --queries 100
+"""
+
+import sys
+import os
+import time
+import random
+import sqlite3
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base
+from app.models.plant import Plant
+from app.models.user import User  # noqa: F401  (registers the users table for create_all)
+from app.services.plant_search import search_backend, search_plants
+
+CONSONANTS = [
+    ("k", "क"), ("kh", "ख"), ("g", "ग"), ("gh", "घ"), ("ch", "च"), ("j", "ज"), ("t", "त"), ("th", "थ"),
+    ("d", "द"), ("dh", "ध"), ("n", "न"), ("p", "प"), ("ph", "फ"), ("b", "ब"), ("bh", "भ"), ("m", "म"),
+    ("y", "य"), ("r", "र"), ("l", "ल"), ("v", "व"), ("sh", "श"), ("s", "स"), ("h", "ह"),
+]
+VOWELS = [("a", ""), ("aa", "ा"), ("i", "ि"), ("ee", "ी"), ("u", "ु"), ("e", "े"), ("o", "ो")]
+SYLLABLES = [(c + v, dc + dv) for c, dc in CONSONANTS for v, dv in VOWELS]
+
+
+def make_name(rng):
+    """(transliterated name, Devanagari spelling) of 2-4 syllables"""
+    syllables = rng.choices(SYLLABLES, k=rng.randint(2, 4))
+    return "".join(s[0] for s in syllables).capitalize(), "".join(s[1] for s in syllables)
+
+
+def seed(db_path: str, rows: int):
+    engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)  # Also creates the FTS5 table and its triggers
+    engine.dispose()
+
+    conn = sqlite3.connect(db_path)
+    existing = conn.execute("SELECT COUNT(*) FROM plants").fetchone()[0]
+    if existing == rows:
+        conn.close()
+        print(f"♻️  Reusing {rows:,} seeded plants in {db_path}")
+        return
+    print(f"🌱 Seeding {rows:,} plants into {db_path}...")
+    start = time.perf_counter()
+    conn.execute("DELETE FROM plants")
+    rng = random.Random(0)
+
+    def generate():
+        for i in range(1, rows + 1):
+            english, hindi = make_name(rng)
+            genus, species = make_name(rng)[0], make_name(rng)[0].lower()
+            yield (i, f"{genus}_{species}_{i}", english, hindi, f"{english} ({genus}) is a medicinal herb number {i}")
+
+    conn.executemany(
+        "INSERT INTO plants (id, species_name, common_name_en, common_name_hi, description) VALUES (?, ?, ?, ?, ?)",
+        generate()
+    )
+    conn.commit()
+    conn.execute("ANALYZE")
+    conn.close()
+    print(f"   done in {time.perf_counter() - start:.1f}s")
+
+
+def legacy_search(db, q: str):
+    """The pre-index endpoint body"""
+    search_filter = f"%{q}%"
+    return db.query(Plant).filter(
+        (Plant.species_name.ilike(search_filter)) |
+        (Plant.common_name_en.ilike(search_filter)) |
+        (Plant.common_name_hi.ilike(search_filter))
+    ).limit(20).all()
+
+
+def indexed_search(db, q: str):
+    matches, _ = search_plants(db, q, limit=20)
+    return [plant for plant, _ in matches]
+
+
+def typo(name: str, rng) -> str:
+    """Drop, double or swap one letter"""
+    i = rng.randrange(1, len(name) - 1)
+    return rng.choice([
+        name[:i] + name[i + 1:],
+        name[:i] + name[i] + name[i:],
+        name[:i - 1] + name[i] + name[i - 1] + name[i + 1:],
+    ])
+
+
+def run(db, fn, queries):
+    timings, hits = [], 0
+    for plant_id, q in queries:
+        start = time.perf_counter()
+        results = fn(db, q)
+        timings.append((time.perf_counter() - start) * 1000)
+        hits += plant_id in [plant.id for plant in results[:10]]
+    return statistics.median(timings), hits / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--db", default="/tmp/bench_plant_search.db")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    seed(args.db, args.rows)
+    engine = create_engine(f"sqlite:///{args.db}")
+    db = sessionmaker(bind=engine)()
+    print(f"🔎 Search backend: {search_backend(db)}")
+
+    rng = random.Random(1)
+    sample = db.query(Plant).filter(Plant.id.in_(rng.sample(range(1, args.rows + 1), args.queries))).all()
+    kinds = {
+        "exact": [(p.id, p.species_name) for p in sample],
+        "prefix": [(p.id, p.species_name.split("_")[0][:4] + " " + p.species_name.split("_")[1][:4]) for p in sample],
+        "typo": [(p.id, typo(p.species_name, rng)) for p in sample],
+        "devanagari": [(p.id, p.common_name_hi) for p in sample],
+    }
+
+    print(f"\n⏱️  PLANT SEARCH BENCHMARK ({args.rows:,} plants, {args.queries} queries per kind)")
+    print("-" * 78)
+    for kind, queries in kinds.items():
+        legacy_ms, legacy_hits = run(db, legacy_search, queries)
+        indexed_ms, indexed_hits = run(db, indexed_search, queries)
+        print(f"{kind:>11}: legacy {legacy_ms:7.2f} ms  hit@10 {legacy_hits:4.0%}   "
+              f"indexed {indexed_ms:7.2f} ms  hit@10 {indexed_hits:4.0%}   ({legacy_ms / indexed_ms:5.1f}x)")
+    db.close()
+
+
+if __name__ == "__main__":
+    main()
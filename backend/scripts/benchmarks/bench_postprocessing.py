@@ -0,0 +1,113 @@
+"""
+Post-processing Benchmark
+Compares the original per-image post-processing (np.exp softmax per model,
+weighted sum, full argsort and a Python loop per image) with the batched
+kernels in app/services/postprocessing.py, on synthetic member logits.
+
+Usage:
+    python scripts/benchmarks/bench_postprocessing.py --batch-size 32 --classes 80
+"""
+
+import sys
+import os
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+import numpy as np
+
+from app.services.postprocessing import softmax, summarize, weighted_sum
+
+CONFIDENCE_THRESHOLD = 0.65
+AMBIGUOUS_THRESHOLD = 0.80
+
+
+def legacy_postprocess(efficientnet_logits, mobilenet_logits, class_names):
+    """The pre-kernel code path, one image at a time"""
+    results = []
+    for i in range(len(efficientnet_logits)):
+        eff_logits = efficientnet_logits[i:i + 1]
+        mob_logits = mobilenet_logits[i:i + 1]
+        efficientnet_probs = np.exp(eff_logits) / np.sum(np.exp(eff_logits), axis=1, keepdims=True)
+        mobilenet_probs = np.exp(mob_logits) / np.sum(np.exp(mob_logits), axis=1, keepdims=True)
+        final_probs = (efficientnet_probs * 0.7) + (mobilenet_probs * 0.3)
+
+        pred_idx = np.argmax(final_probs[0])
+        confidence = float(final_probs[0][pred_idx])
+        if confidence < CONFIDENCE_THRESHOLD:
+            results.append({"predicted_class": "Unknown Object", "confidence": confidence, "top_predictions": []})
+            continue
+        top_k_indices = np.argsort(final_probs[0])[::-1][:5]
+        top_predictions = []
+        for idx in top_k_indices:
+            if idx < len(class_names):
+                top_predictions.append({"class_name": class_names[idx], "confidence": float(final_probs[0][idx])})
+        results.append({
+            "predicted_class": class_names[pred_idx],
+            "confidence": confidence,
+            "top_predictions": top_predictions,
+            "is_ambiguous": confidence < AMBIGUOUS_THRESHOLD
+        })
+    return results
+
+
+def batched_postprocess(efficientnet_logits, mobilenet_logits, class_names):
+    final_probs = weighted_sum([(softmax(efficientnet_logits), 0.7), (softmax(mobilenet_logits), 0.3)])
+    predictions = summarize(final_probs, CONFIDENCE_THRESHOLD, AMBIGUOUS_THRESHOLD, "efficientnet-mobilenet-ensemble", True)
+    return predictions.to_dicts(class_names)
+
+
+def batched_arrays_only(efficientnet_logits, mobilenet_logits, class_names):
+    final_probs = weighted_sum([(softmax(efficientnet_logits), 0.7), (softmax(mobilenet_logits), 0.3)])
+    return summarize(final_probs, CONFIDENCE_THRESHOLD, AMBIGUOUS_THRESHOLD, "efficientnet-mobilenet-ensemble", True)
+
+
+def bench(fn, args, iterations):
+    for _ in range(3):
+        fn(*args)
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn(*args)
+        timings.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--classes", type=int, default=80)
+    parser.add_argument("--iterations", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    class_names = [f"class_{i}" for i in range(args.classes)]
+    logits = []
+    for scale in (6.0, 4.0):
+        member = rng.normal(size=(args.batch_size, args.classes)).astype(np.float32) * scale
+        member[np.arange(args.batch_size), rng.integers(0, args.classes, args.batch_size)] += 3 * scale
+        logits.append(member)
+
+    print(f"⏱️  POST-PROCESSING BENCHMARK (batch={args.batch_size}, classes={args.classes})")
+    print("-" * 60)
+    legacy = bench(legacy_postprocess, (*logits, class_names), args.iterations)
+    batched = bench(batched_postprocess, (*logits, class_names), args.iterations)
+    arrays = bench(batched_arrays_only, (*logits, class_names), args.iterations)
+    for label, micros in (("per-image (legacy)", legacy), ("batched + dicts", batched), ("batched arrays only", arrays)):
+        print(f"{label:>20}: {micros:9.1f} µs per batch   {micros / args.batch_size:7.2f} µs per image")
+    print(f"\n🚀 Speedup: {legacy / batched:.1f}x with dicts, {legacy / arrays:.1f}x arrays only")
+
+    # Large logits: the legacy softmax overflows to inf / inf = nan
+    extreme = [member * 100 for member in logits]
+    with np.errstate(over="ignore", invalid="ignore"):
+        legacy_nan = sum(np.isnan(r["confidence"]) for r in legacy_postprocess(*extreme, class_names))
+    batched_nan = sum(np.isnan(r["confidence"]) for r in batched_postprocess(*extreme, class_names))
+    print(f"🧮 Logits x100: NaN confidences legacy {legacy_nan}/{args.batch_size}, batched {batched_nan}/{args.batch_size}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""
+Worker Memory Benchmark
+Starts N worker processes that each load the ensemble the way a gunicorn
+worker does, then reports RSS and PSS per worker with and without
+ORT_MMAP_WEIGHTS. PSS (proportional set size) splits shared pages between
+the processes mapping them, so it is the number that shows what each extra
+worker really costs.
+
+Uses the real models from MODEL_DIR when present, otherwise synthetic CNNs
+with large dense heads (see synthetic_models.py). Linux only: reads
+/proc/<pid>/smaps_rollup.
+
+Usage:
+    python scripts/benchmarks/bench_worker_memory.py --workers 4
+    python scripts/benchmarks/bench_worker_memory.py --synthetic --head-size 4096
+"""
+
+import sys
+import os
+import argparse
+import tempfile
+import multiprocessing
+from pathlib import Path
+
+backend_dir = Path(__file__).resolve().parents[2]
+sys.path.append(str(backend_dir))
+sys.path.append(str(Path(__file__).resolve().parent))
+os.environ.setdefault("SECRET_KEY", "benchmark")
+
+from app.config import settings
+
+MODEL_SETTINGS = ("MOBILENET_MODEL_PATH", "VIT_MODEL_PATH", "ENHANCED_MODEL_PATH")
+
+
+def memory_mb(pid: int) -> dict:
+    """RSS and PSS of a process in MB"""
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, *rest = line.split()
+            if key in ("Rss:", "Pss:", "Pss_Anon:", "Pss_File:"):
+                values[key[:-1]] = int(rest[0]) / 1024
+    return values
+
+
+def worker(overrides: dict, load: bool, ready, done):
+    """One API worker: load + warm the models, then idle until measured"""
+    for key, value in overrides.items():
+        setattr(settings, key, value)
+    from app.services.ml_service import MLService
+
+    service = MLService()
+    if load:
+        service.load_models()
+        service.warmup([1])
+    ready.set()
+    done.wait()
+
+
+def measure(label: str, overrides: dict, workers: int, load: bool = True):
+    ctx = multiprocessing.get_context("spawn")
+    done = ctx.Event()
+    procs, events = [], []
+    for _ in range(workers):
+        ready = ctx.Event()
+        proc = ctx.Process(target=worker, args=(overrides, load, ready, done))
+        proc.start()
+        procs.append(proc)
+        events.append(ready)
+    for ready in events:
+        ready.wait()
+
+    stats = [memory_mb(proc.pid) for proc in procs]
+    done.set()
+    for proc in procs:
+        proc.join()
+
+    rss = sum(s["Rss"] for s in stats) / workers
+    pss = sum(s["Pss"] for s in stats) / workers
+    anon = sum(s["Pss_Anon"] for s in stats) / workers
+    print(f"{label:<22} RSS {rss:8.1f} MB   PSS {pss:8.1f} MB   "
+          f"(anon {anon:7.1f} MB)   total PSS {pss * workers:8.1f} MB")
+    return pss, anon
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--synthetic", action="store_true", help="Always use synthetic models")
+    parser.add_argument("--head-size", type=int, default=4096, help="Dense head size of the synthetic models")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        raise SystemExit("❌ /proc/<pid>/smaps_rollup not available (Linux only)")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        overrides = {"INFERENCE_BATCHING_ENABLED": False}
+        if args.synthetic or not os.path.exists(settings.MOBILENET_MODEL_PATH):
+            from synthetic_models import build_cnn
+
+            print(f"🧪 Using synthetic models (head size {args.head_size})")
+            for seed, key in enumerate(MODEL_SETTINGS):
+                path = os.path.join(tmp_dir, f"{key.lower()}.onnx")
+                overrides[key] = build_cnn(path, width=32, depth=4, seed=seed, head_size=args.head_size)
+        else:
+            overrides.update({key: getattr(settings, key) for key in MODEL_SETTINGS})
+        model_mb = sum(os.path.getsize(overrides[key]) for key in MODEL_SETTINGS if os.path.exists(overrides[key])) / 1e6
+
+        print(f"🧠 WORKER MEMORY BENCHMARK ({args.workers} workers, {model_mb:.0f} MB of model files)")
+        print("-" * 100)
+        idle = measure("no models loaded", overrides, args.workers, load=False)
+        private = measure("private weights", {**overrides, "ORT_MMAP_WEIGHTS": False}, args.workers)
+
+        # What gunicorn's on_starting hook does in the master
+        mmap_overrides = {**overrides, "ORT_MMAP_WEIGHTS": True, "ORT_OPTIMIZED_MODEL_DIR": os.path.join(tmp_dir, "optimized")}
+        for key, value in mmap_overrides.items():
+            setattr(settings, key, value)
+        from app.services.ml_service import MLService
+        MLService().prepare_model_files()
+        shared = measure("mmap shared weights", mmap_overrides, args.workers)
+
+    print(f"\n📉 Model PSS per worker above idle: {private[0] - idle[0]:.1f} MB -> {shared[0] - idle[0]:.1f} MB")
+    print(f"   Private (anon) model memory per extra worker: {private[1] - idle[1]:.1f} MB -> {shared[1] - idle[1]:.1f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Synthetic ONNX Models
+Small CNN graphs with a dynamic batch dimension for benchmarking the
+inference stack on machines without the trained model files.
+
+Requires the `onnx` package (pip install onnx).
+"""
+
+import numpy as np
+import onnx
+from onnx import helper, numpy_helper, TensorProto
+
+
+def build_cnn(
+    path: str,
+    num_classes: int = 5,
+    width: int = 32,
+    depth: int = 4,
+    seed: int = 0,
+    input_size: int = 224,
+    head_size: int = 0
+) -> str:
+    """
+    Write a Conv/ReLU stack + global pooling + Gemm classifier to `path`
+
+    Input is NCHW float32 named "input" with a symbolic batch dimension, the
+    same contract as the exported MobileNetV2/ViT/EfficientNetV2 graphs.
+    Larger `width`/`depth` give a slower model; `head_size` > 0 adds two
+    dense layers (about 4 * head_size^2 bytes of weights) for a model whose
+    size resembles the real ones without much extra compute.
+    """
+    rng = np.random.default_rng(seed)
+    nodes, initializers = [], []
+    current, channels = "input", 3
+
+    for i in range(depth):
+        weight = rng.normal(0, np.sqrt(2.0 / (channels * 9)), (width, channels, 3, 3)).astype(np.float32)
+        bias = np.zeros(width, dtype=np.float32)
+        initializers += [numpy_helper.from_array(weight, f"conv{i}_w"), numpy_helper.from_array(bias, f"conv{i}_b")]
+        stride = 2 if i < 3 else 1
+        nodes.append(helper.make_node(
+            "Conv", [current, f"conv{i}_w", f"conv{i}_b"], [f"conv{i}"],
+            kernel_shape=[3, 3], pads=[1, 1, 1, 1], strides=[stride, stride]
+        ))
+        nodes.append(helper.make_node("Relu", [f"conv{i}"], [f"relu{i}"]))
+        current, channels = f"relu{i}", width
+
+    nodes.append(helper.make_node("GlobalAveragePool", [current], ["pooled"]))
+    nodes.append(helper.make_node("Flatten", ["pooled"], ["features"], axis=1))
+    features = "features"
+
+    if head_size:
+        for i, fan_in in enumerate((channels, head_size)):
+            weight = rng.normal(0, np.sqrt(2.0 / fan_in), (fan_in, head_size)).astype(np.float32)
+            bias = np.zeros(head_size, dtype=np.float32)
+            initializers += [numpy_helper.from_array(weight, f"head{i}_w"), numpy_helper.from_array(bias, f"head{i}_b")]
+            nodes.append(helper.make_node("Gemm", [features, f"head{i}_w", f"head{i}_b"], [f"head{i}"]))
+            nodes.append(helper.make_node("Relu", [f"head{i}"], [f"head{i}_relu"]))
+            features = f"head{i}_relu"
+        channels = head_size
+
+    fc_w = rng.normal(0, 0.1, (channels, num_classes)).astype(np.float32)
+    fc_b = np.zeros(num_classes, dtype=np.float32)
+    initializers += [numpy_helper.from_array(fc_w, "fc_w"), numpy_helper.from_array(fc_b, "fc_b")]
+    nodes.append(helper.make_node("Gemm", [features, "fc_w", "fc_b"], ["logits"]))
+
+    graph = helper.make_graph(
+        nodes,
+        "synthetic_cnn",
+        [helper.make_tensor_value_info("input", TensorProto.FLOAT, ["batch", 3, input_size, input_size])],
+        [helper.make_tensor_value_info("logits", TensorProto.FLOAT, ["batch", num_classes])],
+        initializers
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 13)])
+    model.ir_version = 8
+    onnx.checker.check_model(model)
+    onnx.save(model, path)
+    return path
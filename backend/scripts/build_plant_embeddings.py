@@ -0,0 +1,90 @@
+"""
+Build the plant embedding index used by /recommend/similar
+
+Each medicinal property ("<ailment> <usage>") becomes a dense LSA vector
+(TF-IDF followed by truncated SVD); a plant's embedding is the average of its
+property vectors, or of its description when it has none. The vectors are
+stored as an IVF index (app/services/vector_index.py) in
+PLANT_EMBEDDING_INDEX_DIR.
+
+Usage:
+    python scripts/build_plant_embeddings.py --dim 64
+    python scripts/build_plant_embeddings.py --output ./ml_models/plant_embeddings --dtype float32
+"""
+
+import sys
+import os
+import logging
+import argparse
+from collections import defaultdict
+
+import numpy as np
+
+# Add the parent directory to the python path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from sklearn.decomposition import TruncatedSVD
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.plant import Plant, MedicinalProperty
+from app.services.vector_index import IVFIndex
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def plant_text_embeddings(db, dim: int):
+    """(plant ids, [N, dim] float32 embeddings) from averaged property vectors"""
+    plants = db.query(Plant).order_by(Plant.id).all()
+    documents, owners = [], []
+    has_properties = set()
+    for prop in db.query(MedicinalProperty).order_by(MedicinalProperty.id):
+        documents.append(f"{prop.ailment} {prop.usage_description or ''}")
+        owners.append(prop.plant_id)
+        has_properties.add(prop.plant_id)
+    for plant in plants:
+        if plant.id not in has_properties:
+            documents.append(plant.description or plant.species_name)
+            owners.append(plant.id)
+
+    tfidf = TfidfVectorizer(stop_words='english', sublinear_tf=True).fit_transform(documents)
+    dim = max(1, min(dim, tfidf.shape[1] - 1, len(documents) - 1))
+    document_vectors = TruncatedSVD(n_components=dim, random_state=0).fit_transform(tfidf).astype(np.float32)
+
+    rows = defaultdict(list)
+    for row, plant_id in enumerate(owners):
+        rows[plant_id].append(row)
+    ids = np.array([plant.id for plant in plants], dtype=np.int64)
+    embeddings = np.stack([document_vectors[rows[plant_id]].mean(axis=0) for plant_id in ids.tolist()])
+    return ids, embeddings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=settings.PLANT_EMBEDDING_INDEX_DIR or "./ml_models/plant_embeddings")
+    parser.add_argument("--dim", type=int, default=64)
+    parser.add_argument("--nlist", type=int, default=None, help="Inverted lists (default ~sqrt(plants))")
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        ids, embeddings = plant_text_embeddings(db, args.dim)
+    finally:
+        db.close()
+    if len(ids) < 2:
+        logger.error("Need at least two plants in the database to build an embedding index")
+        sys.exit(1)
+
+    index = IVFIndex.build(embeddings, ids=ids, nlist=args.nlist, dtype=args.dtype)
+    index.save(args.output)
+    logger.info(f"Saved {len(index)} plant embeddings ({index.dim}d, {index.nlist} lists) to {args.output}")
+    if not settings.PLANT_EMBEDDING_INDEX_DIR:
+        logger.info(f"Set PLANT_EMBEDDING_INDEX_DIR={args.output} to serve /recommend/similar from it")
+
+
+if __name__ == "__main__":
+    main()
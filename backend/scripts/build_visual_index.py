@@ -0,0 +1,121 @@
+"""
+Build the reference-image index used by /recommend/visual
+
+Every image under --images (one sub-directory per class, the layout of the
+training dataset) is run through the served model once; the penultimate-layer
+features of VISUAL_EMBEDDING_MODEL become its embedding. The embeddings are
+stored as an IVF index (app/services/visual_index.py) in VISUAL_INDEX_DIR,
+with each image's path relative to --images and its class label.
+
+Rebuild the index whenever that member's model file changes.
+
+Usage:
+    python scripts/build_visual_index.py --images "../dataset/Medicinal Leaf dataset"
+    python scripts/build_visual_index.py --images ./reference --max-per-class 50 --dtype float32
+"""
+
+import sys
+import os
+import logging
+import argparse
+
+import numpy as np
+
+# Add the parent directory to the python path so we can import app modules
+sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+
+from app.config import settings
+from app.services.ml_service import MLService
+from app.services.visual_index import VisualIndex
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".webp"}
+
+
+def reference_images(root: str, max_per_class: int = 0):
+    """[{"path", "label"}] for the images in each class directory under `root`"""
+    images = []
+    for label in sorted(os.listdir(root)):
+        class_dir = os.path.join(root, label)
+        if not os.path.isdir(class_dir):
+            continue
+        files = sorted(
+            name for name in os.listdir(class_dir)
+            if os.path.splitext(name)[1].lower() in IMAGE_EXTENSIONS
+        )
+        if max_per_class:
+            files = files[:max_per_class]
+        images.extend({"path": os.path.join(label, name), "label": label} for name in files)
+    return images
+
+
+def embed_images(service: MLService, root: str, images, batch_size: int):
+    """Embeddings of the images that decode, and the entries they belong to"""
+    embedded, vectors = [], []
+    for start in range(0, len(images), batch_size):
+        chunk = images[start:start + batch_size]
+        data = []
+        for image in chunk:
+            with open(os.path.join(root, image["path"]), "rb") as f:
+                data.append(f.read())
+        try:
+            _, embeddings = service.predict_with_embeddings(data)
+        except ValueError:
+            # One unreadable file: embed the chunk image by image to skip it
+            embeddings, kept = [], []
+            for image, image_bytes in zip(chunk, data):
+                try:
+                    embeddings.append(service.predict_with_embeddings([image_bytes])[1][0])
+                    kept.append(image)
+                except ValueError as e:
+                    logger.warning(f"Skipping {image['path']}: {e}")
+            chunk = kept
+        if embeddings is None:
+            raise RuntimeError(
+                f"{settings.VISUAL_EMBEDDING_MODEL} does not provide embeddings (model missing or not rewritable)"
+            )
+        embedded.extend(chunk)
+        vectors.extend(np.asarray(embeddings, dtype=np.float32))
+        logger.info(f"Embedded {min(start + batch_size, len(images))}/{len(images)} images")
+    return embedded, np.stack(vectors) if vectors else np.zeros((0, 0), dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", required=True, help="Reference images, one sub-directory per class")
+    parser.add_argument("--output", default=settings.VISUAL_INDEX_DIR or "./ml_models/visual_index")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--max-per-class", type=int, default=0, help="Images per class (0 = all)")
+    parser.add_argument("--nlist", type=int, default=None, help="Inverted lists (default ~sqrt(images))")
+    parser.add_argument("--dtype", choices=["float16", "float32"], default="float16")
+    args = parser.parse_args()
+
+    images = reference_images(args.images, args.max_per_class)
+    if len(images) < 2:
+        logger.error(f"Need at least two reference images under {args.images}")
+        sys.exit(1)
+
+    # Embeddings are only exposed while a visual index is configured; run the models in-process
+    settings.VISUAL_INDEX_DIR = args.output
+    settings.INFERENCE_BACKEND = "local"
+    service = MLService()
+    try:
+        service.load_models()
+        if service.use_mock:
+            logger.error("No ONNX models loaded; cannot embed reference images")
+            sys.exit(1)
+        images, embeddings = embed_images(service, args.images, images, args.batch_size)
+    finally:
+        service.shutdown()
+
+    index = VisualIndex.build(embeddings, images, model=settings.VISUAL_EMBEDDING_MODEL,
+                              nlist=args.nlist, dtype=args.dtype)
+    index.save(args.output)
+    logger.info(f"Saved {len(index)} reference image embeddings ({index.dim}d) to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -29,7 +29,16 @@ if __name__ == "__main__":
     H5_PATH = BASE_DIR / "models" / "enhanced" / "efficientnetv2_best.h5"
     ONNX_PATH = BASE_DIR.parent / "backend" / "ml_models" / "efficientnetv2_best.onnx"
     
+    DATA_DIR = BASE_DIR.parent / "dataset" / "Indian Medicinal Leaves Image Datasets" / "Medicinal Leaf dataset"
+    
     if os.path.exists(H5_PATH):
         convert_to_onnx(H5_PATH, ONNX_PATH)
+        
+        # INT8 variants for CPU-only hosts, calibrated on the leaf dataset
+        if os.path.exists(DATA_DIR):
+            from quantize_onnx import quantize_models
+            quantize_models([ONNX_PATH], DATA_DIR)
+        else:
+            print(f"⚠️  Dataset not found at {DATA_DIR}; skipping INT8 quantization.")
     else:
         print(f"❌ Error: Enhanced model not found at {H5_PATH}. Please run train_enhanced.py first.")
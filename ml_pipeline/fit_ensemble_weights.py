@@ -0,0 +1,243 @@
+"""
+Ensemble Weight Fitting
+Learns a softmax temperature per model and the mixing weights of each member
+pair the backend ensembles (efficientnet_mobilenet, mobilenet_vit) from a
+labelled validation set, and writes them to `ensemble_weights.json`, which
+MLService loads from ENSEMBLE_WEIGHTS_PATH.
+
+Everything is fitted by minimizing negative log-likelihood on one half of the
+images and reported on the other half. With --per-class, each class also gets
+its own pair weight, shrunk towards the global one, kept only when it beats
+the global weight on the held-out half.
+
+Usage:
+    python fit_ensemble_weights.py --data-dir ../dataset/...
+    python fit_ensemble_weights.py --limit 2000 --per-class
+"""
+
+import sys
+import json
+import argparse
+import numpy as np
+from pathlib import Path
+
+import onnxruntime as ort
+
+from quantize_onnx import (
+    DATA_DIR, MODEL_DIR, RAW_PIXEL_MODELS,
+    collect_images, model_input_spec, predict_all,
+)
+
+MEMBER_FILES = {
+    "mobilenet": "mobilenetv2_best.onnx",
+    "vit": "vit_best.onnx",
+    "efficientnet": "efficientnetv2_best.onnx",
+}
+# Member pairs the backend ensembles, in (first, second) weight order
+COMBINATIONS = {
+    "efficientnet_mobilenet": ("efficientnet", "mobilenet"),
+    "mobilenet_vit": ("mobilenet", "vit"),
+}
+TEMPERATURE_RANGE = (0.05, 20.0)
+
+
+def softmax(logits: np.ndarray, temperature: float = 1.0) -> np.ndarray:
+    """Same transform as MLService._run_session"""
+    scaled = logits / temperature
+    scaled = scaled - scaled.max(axis=1, keepdims=True)
+    exp = np.exp(scaled)
+    return exp / exp.sum(axis=1, keepdims=True)
+
+
+def nll(probs: np.ndarray, labels: np.ndarray) -> float:
+    return float(-np.mean(np.log(np.clip(probs[np.arange(len(labels)), labels], 1e-12, None))))
+
+
+def expected_calibration_error(probs: np.ndarray, labels: np.ndarray, bins: int = 15) -> float:
+    confidences = probs.max(axis=1)
+    correct = probs.argmax(axis=1) == labels
+    edges = np.linspace(0, 1, bins + 1)
+    ece = 0.0
+    for low, high in zip(edges[:-1], edges[1:]):
+        in_bin = (confidences > low) & (confidences <= high)
+        if in_bin.any():
+            ece += in_bin.mean() * abs(confidences[in_bin].mean() - correct[in_bin].mean())
+    return float(ece)
+
+
+def golden_section(objective, low: float, high: float, iterations: int = 60) -> float:
+    """Minimize a unimodal function on [low, high]"""
+    ratio = (np.sqrt(5) - 1) / 2
+    a, b = low, high
+    c, d = b - ratio * (b - a), a + ratio * (b - a)
+    fc, fd = objective(c), objective(d)
+    for _ in range(iterations):
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c = b - ratio * (b - a)
+            fc = objective(c)
+        else:
+            a, c, fc = c, d, fd
+            d = a + ratio * (b - a)
+            fd = objective(d)
+    return (a + b) / 2
+
+
+def fit_temperature(logits: np.ndarray, labels: np.ndarray) -> float:
+    # Searched in log space: NLL is far better conditioned there
+    log_t = golden_section(lambda x: nll(softmax(logits, np.exp(x)), labels), *np.log(TEMPERATURE_RANGE))
+    return float(np.exp(log_t))
+
+
+def fit_pair_weight(first: np.ndarray, second: np.ndarray, labels: np.ndarray) -> float:
+    """Weight of `first` in first * w + second * (1 - w)"""
+    return float(golden_section(lambda w: nll(first * w + second * (1 - w), labels), 0.0, 1.0))
+
+
+def mix_per_class(first: np.ndarray, second: np.ndarray, weights: np.ndarray) -> np.ndarray:
+    """Same transform as EnsembleWeights.combine with per-class weights"""
+    mixed = first * weights + second * (1 - weights)
+    return mixed / mixed.sum(axis=1, keepdims=True)
+
+
+def fit_class_weights(first: np.ndarray, second: np.ndarray, labels: np.ndarray, global_weight: float,
+                      shrinkage: float = 1e-2, steps: int = 500, lr: float = 0.5) -> np.ndarray:
+    """
+    Per-class weight of `first`, by gradient descent on the renormalized
+    mixture NLL with an L2 pull towards the global weight (in logit space)
+    """
+    eps = 1e-6
+    anchor = np.log((global_weight + eps) / (1 - global_weight + eps))
+    params = np.full(first.shape[1], anchor)
+    rows = np.arange(len(labels))
+    diff = first - second
+    for _ in range(steps):
+        weights = 1 / (1 + np.exp(-params))
+        mixed = second + diff * weights
+        total = mixed.sum(axis=1, keepdims=True)
+        # d(-log(mixed_y / total)) / d(weights_c)
+        grad = diff / total
+        grad[rows, labels] -= diff[rows, labels] / np.clip(mixed[rows, labels], 1e-12, None)
+        grad = grad.mean(axis=0) * weights * (1 - weights) + 2 * shrinkage * (params - anchor)
+        params -= lr * grad
+    return 1 / (1 + np.exp(-params))
+
+
+def collect_labelled_images(data_dir: Path, class_names, limit: int):
+    """Images whose class folder is one of the backend's class names"""
+    index = {name: i for i, name in enumerate(class_names)}
+    paths, labels = [], []
+    for path in collect_images(data_dir, limit=10 ** 9):
+        if path.parent.name in index:
+            paths.append(path)
+            labels.append(index[path.parent.name])
+        if len(paths) == limit:
+            break
+    return paths, np.array(labels)
+
+
+def fit(model_dir: Path, data_dir: Path, class_names_path: Path, limit: int, per_class: bool):
+    with open(class_names_path) as f:
+        class_names = json.load(f)
+    paths, labels = collect_labelled_images(data_dir, class_names, limit)
+    if len(paths) < 20:
+        raise ValueError(f"Need at least 20 labelled images under {data_dir}, found {len(paths)}")
+
+    logits = {}
+    for name, filename in MEMBER_FILES.items():
+        model_path = model_dir / filename
+        if not model_path.exists():
+            continue
+        print(f"🔍 Scoring {len(paths)} images with {filename}...")
+        session = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+        _, channels_last = model_input_spec(session)
+        logits[name], _ = predict_all(model_path, paths, channels_last, name in RAW_PIXEL_MODELS)
+    if not logits:
+        raise ValueError(f"No ONNX models found in {model_dir}")
+
+    # Fit on one half, report on the other
+    half = len(paths) // 2
+    fit_rows, eval_rows = slice(0, half), slice(half, None)
+    y_fit, y_eval = labels[fit_rows], labels[eval_rows]
+    report = {"images": {"fit": half, "eval": len(paths) - half}, "members": {}, "combinations": {}}
+    config = {"temperatures": {}, "weights": {}}
+
+    calibrated = {}
+    for name, member_logits in logits.items():
+        temperature = fit_temperature(member_logits[fit_rows], y_fit)
+        config["temperatures"][name] = round(temperature, 4)
+        calibrated[name] = softmax(member_logits, temperature)
+        raw = softmax(member_logits[eval_rows])
+        report["members"][name] = {
+            "temperature": temperature,
+            "accuracy": float(np.mean(raw.argmax(axis=1) == y_eval)),
+            "nll": [nll(raw, y_eval), nll(calibrated[name][eval_rows], y_eval)],
+            "ece": [expected_calibration_error(raw, y_eval),
+                    expected_calibration_error(calibrated[name][eval_rows], y_eval)],
+        }
+        print(f"   {name}: T={temperature:.3f}  NLL {report['members'][name]['nll'][0]:.4f} -> "
+              f"{report['members'][name]['nll'][1]:.4f}")
+
+    for combination, (first, second) in COMBINATIONS.items():
+        if first not in calibrated or second not in calibrated:
+            continue
+        p1, p2 = calibrated[first], calibrated[second]
+        weight = fit_pair_weight(p1[fit_rows], p2[fit_rows], y_fit)
+        config["weights"][combination] = {first: round(weight, 4), second: round(1 - weight, 4)}
+        mixed = p1[eval_rows] * weight + p2[eval_rows] * (1 - weight)
+        entry = {
+            "weights": config["weights"][combination],
+            "accuracy": float(np.mean(mixed.argmax(axis=1) == y_eval)),
+            "nll": nll(mixed, y_eval),
+            "ece": expected_calibration_error(mixed, y_eval),
+        }
+        print(f"   {combination}: {first}={weight:.3f}  accuracy {entry['accuracy']:.4f}  NLL {entry['nll']:.4f}")
+
+        if per_class:
+            class_weights = fit_class_weights(p1[fit_rows], p2[fit_rows], y_fit, weight)
+            per_class_mixed = mix_per_class(p1[eval_rows], p2[eval_rows], class_weights)
+            per_class_nll = nll(per_class_mixed, y_eval)
+            entry["per_class_nll"] = per_class_nll
+            if per_class_nll < entry["nll"]:
+                config.setdefault("class_weights", {})[combination] = {
+                    first: np.round(class_weights, 4).tolist(),
+                    second: np.round(1 - class_weights, 4).tolist(),
+                }
+                print(f"      per-class weights kept (NLL {per_class_nll:.4f})")
+            else:
+                print(f"      per-class weights dropped (NLL {per_class_nll:.4f}, no better than global)")
+        report["combinations"][combination] = entry
+
+    config["fitted_on"] = report
+    return config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=str(DATA_DIR), help="Class-per-folder validation images")
+    parser.add_argument("--model-dir", default=str(MODEL_DIR))
+    parser.add_argument("--class-names", default=None, help="Default: class_names.json in --model-dir")
+    parser.add_argument("--output", default=None, help="Default: ensemble_weights.json in --model-dir")
+    parser.add_argument("--limit", type=int, default=1000, help="Validation images to use")
+    parser.add_argument("--per-class", action="store_true", help="Also fit per-class pair weights")
+    args = parser.parse_args()
+
+    model_dir = Path(args.model_dir)
+    print("=" * 70)
+    print("ENSEMBLE WEIGHT FITTING - Medicinal Plant Detection")
+    print("=" * 70)
+    try:
+        config = fit(model_dir, Path(args.data_dir), Path(args.class_names or model_dir / "class_names.json"),
+                     args.limit, args.per_class)
+    except (ValueError, FileNotFoundError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    output = Path(args.output or model_dir / "ensemble_weights.json")
+    with open(output, "w") as f:
+        json.dump(config, f, indent=2)
+    print(f"\n✓ Saved ensemble weights to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+"""
+INT8 Quantization Stage for ONNX Models
+Produces dynamic and statically-calibrated INT8 variants of the FP32 graphs,
+measures their agreement with FP32 and promotes the best passing variant to
+`<name>_int8.onnx` next to the original (loaded by the backend when
+USE_QUANTIZED_MODELS=True).
+
+Usage:
+    python quantize_onnx.py --data-dir ../dataset/...
+    python quantize_onnx.py --models ../backend/ml_models/mobilenetv2_best.onnx --calibration-size 300
+"""
+
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import numpy as np
+from pathlib import Path
+from PIL import Image
+
+import onnxruntime as ort
+from onnxruntime.quantization import (
+    CalibrationDataReader,
+    CalibrationMethod,
+    QuantFormat,
+    QuantType,
+    quantize_dynamic,
+    quantize_static,
+)
+
+# Paths
+BASE_DIR = Path(__file__).parent
+DATA_DIR = BASE_DIR.parent / "dataset" / "Indian Medicinal Leaves Image Datasets" / "Medicinal Leaf dataset"
+MODEL_DIR = BASE_DIR.parent / "backend" / "ml_models"
+DEFAULT_MODELS = ["mobilenetv2_best.onnx", "vit_best.onnx", "efficientnetv2_best.onnx"]
+
+IMG_SIZE = (224, 224)
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+# Models that rescale internally and expect raw [0, 255] pixels (mirrors MLService)
+RAW_PIXEL_MODELS = ("efficientnet",)
+
+
+def collect_images(data_dir: Path, limit: int, seed: int = 42, skip: int = 0):
+    """Deterministic random sample of image paths from a class-per-folder dataset"""
+    paths = sorted(p for p in Path(data_dir).rglob("*") if p.suffix.lower() in IMAGE_EXTENSIONS)
+    random.Random(seed).shuffle(paths)
+    return paths[skip:skip + limit]
+
+
+def model_input_spec(session):
+    """Input name and whether the graph expects NHWC (Keras export) or NCHW"""
+    model_input = session.get_inputs()[0]
+    shape = model_input.shape
+    channels_last = len(shape) == 4 and shape[-1] == 3
+    return model_input.name, channels_last
+
+
+def load_image(path: Path, channels_last: bool, raw_pixels: bool) -> np.ndarray:
+    """Preprocess one image the same way the backend does, with a batch dim"""
+    image = Image.open(path).convert("RGB").resize(IMG_SIZE)
+    array = np.asarray(image, dtype=np.float32)
+    if not raw_pixels:
+        array = array / 127.5 - 1.0
+    if not channels_last:
+        array = array.transpose(2, 0, 1)
+    return np.ascontiguousarray(array[np.newaxis])
+
+
+class LeafCalibrationReader(CalibrationDataReader):
+    """Feeds preprocessed dataset images to the static quantization calibrator"""
+
+    def __init__(self, paths, input_name: str, channels_last: bool, raw_pixels: bool):
+        self.paths = list(paths)
+        self.input_name = input_name
+        self.channels_last = channels_last
+        self.raw_pixels = raw_pixels
+        self._iter = iter(self.paths)
+
+    def get_next(self):
+        path = next(self._iter, None)
+        if path is None:
+            return None
+        return {self.input_name: load_image(path, self.channels_last, self.raw_pixels)}
+
+    def rewind(self):
+        self._iter = iter(self.paths)
+
+
+def predict_all(model_path: Path, paths, channels_last: bool, raw_pixels: bool, batch_size: int = 16):
+    """Run a model over the evaluation images; returns (logits, ms per image)"""
+    session = ort.InferenceSession(str(model_path), providers=["CPUExecutionProvider"])
+    input_name = session.get_inputs()[0].name
+    outputs, elapsed = [], 0.0
+    for start in range(0, len(paths), batch_size):
+        batch = np.concatenate([load_image(p, channels_last, raw_pixels) for p in paths[start:start + batch_size]])
+        tick = time.perf_counter()
+        outputs.append(session.run(None, {input_name: batch})[0])
+        elapsed += time.perf_counter() - tick
+    return np.concatenate(outputs), elapsed * 1000 / max(1, len(paths))
+
+
+def agreement(reference: np.ndarray, candidate: np.ndarray, k: int = 5):
+    """Top-1 agreement and mean top-k overlap between two logit matrices"""
+    k = min(k, reference.shape[1])
+    top1 = float(np.mean(reference.argmax(axis=1) == candidate.argmax(axis=1)))
+    ref_topk = np.argpartition(-reference, k - 1, axis=1)[:, :k]
+    cand_topk = np.argpartition(-candidate, k - 1, axis=1)[:, :k]
+    overlap = [len(set(r) & set(c)) / k for r, c in zip(ref_topk.tolist(), cand_topk.tolist())]
+    return top1, float(np.mean(overlap))
+
+
+def prepare_for_static(fp32_path: Path, work_dir: Path) -> Path:
+    """Run ORT's quantization pre-processing (shape inference + optimization) when available"""
+    try:
+        from onnxruntime.quantization.shape_inference import quant_pre_process
+    except ImportError:
+        return fp32_path
+
+    prepared = work_dir / f"{fp32_path.stem}_prep.onnx"
+    # Symbolic shape inference helps transformer graphs but needs sympy; CNNs do fine without it
+    for skip_symbolic_shape in (False, True):
+        try:
+            quant_pre_process(str(fp32_path), str(prepared), skip_symbolic_shape=skip_symbolic_shape)
+            return prepared
+        except Exception as e:
+            error = e
+    print(f"   ⚠️  Pre-processing skipped ({error})")
+    return fp32_path
+
+
+def quantize_model(fp32_path: Path, calibration_paths, eval_paths, min_top1: float, work_dir: Path):
+    """Quantize one model, evaluate variants and promote the best passing one"""
+    print(f"\n📦 {fp32_path.name}")
+    probe = ort.InferenceSession(str(fp32_path), providers=["CPUExecutionProvider"])
+    input_name, channels_last = model_input_spec(probe)
+    raw_pixels = any(tag in fp32_path.stem.lower() for tag in RAW_PIXEL_MODELS)
+    del probe
+
+    # Candidates live in the work dir; only the promoted one lands next to the FP32 model
+    variants = {
+        "dynamic": work_dir / f"{fp32_path.stem}_int8_dynamic.onnx",
+        "static": work_dir / f"{fp32_path.stem}_int8_static.onnx",
+    }
+
+    print("   ➜ Dynamic quantization (INT8 weights)...")
+    quantize_dynamic(str(fp32_path), str(variants["dynamic"]), weight_type=QuantType.QInt8)
+
+    print(f"   ➜ Static quantization calibrated on {len(calibration_paths)} images...")
+    quantize_static(
+        str(prepare_for_static(fp32_path, work_dir)),
+        str(variants["static"]),
+        LeafCalibrationReader(calibration_paths, input_name, channels_last, raw_pixels),
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        activation_type=QuantType.QUInt8,
+        weight_type=QuantType.QInt8,
+        calibrate_method=CalibrationMethod.MinMax,
+    )
+
+    print(f"   ➜ Evaluating against FP32 on {len(eval_paths)} held-out images...")
+    reference, fp32_ms = predict_all(fp32_path, eval_paths, channels_last, raw_pixels)
+    report = {
+        "fp32": {
+            "path": str(fp32_path),
+            "size_mb": round(fp32_path.stat().st_size / 1e6, 2),
+            "latency_ms_per_image": round(fp32_ms, 3),
+        },
+        "variants": {},
+        "selected": None,
+    }
+
+    for name, path in variants.items():
+        logits, ms = predict_all(path, eval_paths, channels_last, raw_pixels)
+        top1, top5 = agreement(reference, logits)
+        report["variants"][name] = {
+            "size_mb": round(path.stat().st_size / 1e6, 2),
+            "latency_ms_per_image": round(ms, 3),
+            "top1_agreement": round(top1, 4),
+            "top5_agreement": round(top5, 4),
+            "passed": top1 >= min_top1,
+        }
+        print(f"     {name:>8}: top-1 {top1:.4f}  top-5 {top5:.4f}  {ms:.2f} ms/img  "
+              f"{'✓' if top1 >= min_top1 else '✗'}")
+
+    passing = [n for n, v in report["variants"].items() if v["passed"]]
+    int8_path = fp32_path.with_name(f"{fp32_path.stem}_int8.onnx")
+    if passing:
+        best = min(passing, key=lambda n: report["variants"][n]["latency_ms_per_image"])
+        shutil.copyfile(variants[best], int8_path)
+        report["selected"] = best
+        report["path"] = str(int8_path)
+        print(f"   ✅ Promoted {best} variant to {int8_path.name}")
+    else:
+        # Never leave a stale variant behind for the backend to pick up
+        if int8_path.exists():
+            int8_path.unlink()
+        print(f"   ❌ No variant reached top-1 agreement {min_top1}; FP32 stays in use")
+
+    return report
+
+
+def quantize_models(model_paths, data_dir: Path, calibration_size: int = 200, eval_size: int = 200,
+                    min_top1: float = 0.98, report_path: Path = None):
+    """
+    Quantize every model in `model_paths` and write a JSON agreement report
+
+    Entries for models not quantized in this run are kept from an existing
+    report, so quantizing one model does not drop the others.
+    """
+    calibration_paths = collect_images(data_dir, calibration_size)
+    eval_paths = collect_images(data_dir, eval_size, skip=calibration_size)
+    if not calibration_paths or not eval_paths:
+        raise ValueError(f"Not enough images found under {data_dir}")
+
+    model_paths = [Path(p) for p in model_paths if Path(p).exists()]
+    if not model_paths:
+        raise ValueError("No FP32 models found to quantize")
+
+    work_dir = model_paths[0].parent / ".quantization"
+    work_dir.mkdir(exist_ok=True)
+    report_path = Path(report_path or model_paths[0].parent / "quantization_report.json")
+    previous = {}
+    if report_path.exists():
+        try:
+            with open(report_path) as f:
+                previous = json.load(f).get("models", {})
+        except (ValueError, AttributeError):
+            print(f"⚠️  Ignoring unreadable report {report_path}")
+    report = {
+        "data_dir": str(data_dir),
+        "calibration_images": len(calibration_paths),
+        "evaluation_images": len(eval_paths),
+        "min_top1_agreement": min_top1,
+        "models": previous,
+    }
+    try:
+        for path in model_paths:
+            report["models"][path.name] = quantize_model(path, calibration_paths, eval_paths, min_top1, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n✓ Report saved to {report_path}")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="INT8 quantization for the ONNX ensemble")
+    parser.add_argument("--models", nargs="*", default=[str(MODEL_DIR / m) for m in DEFAULT_MODELS])
+    parser.add_argument("--data-dir", default=str(DATA_DIR))
+    parser.add_argument("--calibration-size", type=int, default=200)
+    parser.add_argument("--eval-size", type=int, default=200)
+    parser.add_argument("--min-top1-agreement", type=float, default=0.98)
+    parser.add_argument("--report", default=None, help="Report path (default: next to the models)")
+    args = parser.parse_args()
+
+    print("=" * 70)
+    print("INT8 QUANTIZATION - Medicinal Plant Detection")
+    print("=" * 70)
+    try:
+        quantize_models(args.models, Path(args.data_dir), args.calibration_size, args.eval_size,
+                        args.min_top1_agreement, args.report)
+    except ValueError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -324,6 +324,8 @@ def export_to_onnx(model):
         
         print(f"✓ Exported model to {onnx_path}")
         
+        quantize_exported_model(onnx_path)
+        
     except ImportError:
         print("⚠️  tf2onnx not installed. Skipping ONNX export.")
         print("   Install with: pip install tf2onnx")
@@ -331,6 +333,16 @@ def export_to_onnx(model):
         print(f"⚠️  ONNX export failed: {e}")
 
 
+def quantize_exported_model(onnx_path):
+    """Produce INT8 variants calibrated on the training dataset"""
+    try:
+        from quantize_onnx import quantize_models
+        quantize_models([onnx_path], DATA_DIR)
+    except Exception as e:
+        print(f"⚠️  INT8 quantization skipped: {e}")
+        print("   Run manually with: python quantize_onnx.py")
+
+
 def main():
     """Main training pipeline"""
     start_time = datetime.now()